@@ -0,0 +1,83 @@
+# spawnwind
+# Copyright (C) 2018-2019, Simmovation Ltd.
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301  USA
+"""Runs the benchmark suites once each without asv, printing the results
+
+Usage: ``python -m benchmarks [suite ...]`` where suites are named as ``module.ClassName`` or ``module``
+"""
+import sys
+import pkgutil
+import importlib
+import itertools
+import inspect
+import timeit
+
+import benchmarks
+
+
+def _suites(selected):
+    for module_info in pkgutil.iter_modules(benchmarks.__path__):
+        if module_info.name in ('common', '__main__'):
+            continue
+        module = importlib.import_module('benchmarks.' + module_info.name)
+        for name, suite in inspect.getmembers(module, inspect.isclass):
+            if suite.__module__ != module.__name__ or not name.endswith('Suite'):
+                continue
+            full_name = module_info.name + '.' + name
+            if not selected or full_name in selected or module_info.name in selected:
+                yield full_name, suite
+
+
+def _param_sets(suite):
+    params = getattr(suite, 'params', [])
+    if not params:
+        return [()]
+    if not isinstance(params[0], list):
+        params = [params]
+    return list(itertools.product(*params))
+
+
+def _run_benchmark(suite_instance, name, args):
+    benchmark = getattr(suite_instance, name)
+    if name.startswith('time_'):
+        return timeit.timeit(lambda: benchmark(*args), number=1), 'seconds'
+    return benchmark(*args), getattr(benchmark, 'unit', '')
+
+
+def main(selected):
+    """Run the selected suites, or all suites if none are selected
+    """
+    for full_name, suite in _suites(selected):
+        # as in asv, the result of setup_cache is passed to setup, teardown and the benchmarks before the parameters
+        cache = (suite().setup_cache(),) if hasattr(suite, 'setup_cache') else ()
+        for params in _param_sets(suite):
+            args = cache + params
+            names = sorted(n for n in dir(suite) if n.startswith(('time_', 'track_')))
+            for name in names:
+                instance = suite()
+                if hasattr(instance, 'setup'):
+                    instance.setup(*args)
+                try:
+                    value, unit = _run_benchmark(instance, name, args)
+                finally:
+                    if hasattr(instance, 'teardown'):
+                        instance.teardown(*args)
+                params_str = '({})'.format(', '.join(str(p) for p in params)) if params else ''
+                print('{}.{}{}: {:.6g} {}'.format(full_name, name, params_str, value, unit))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,80 @@
+# spawnwind
+# Copyright (C) 2018-2019, Simmovation Ltd.
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301  USA
+"""Helpers shared by the benchmark suites
+"""
+import os
+from os import path, pardir
+
+import luigi.configuration
+
+from spawnwind.nrel import TurbsimInput, Fast7Input, Fast8Input, TurbsimSpawner, FastSimulationSpawner
+from spawnwind.nrel.tasks import WindGenerationTask, FastSimulationTask
+
+EXAMPLE_DATA_FOLDER = path.abspath(path.join(path.dirname(__file__), pardir, 'example_data'))
+FAST_INPUT_FOLDER = path.join(EXAMPLE_DATA_FOLDER, 'fast_input_files')
+TURBSIM_INPUT_FILE = path.join(FAST_INPUT_FOLDER, 'TurbSim.inp')
+FAST_INPUT_FILES = {
+    'v7': path.join(FAST_INPUT_FOLDER, 'v7', 'NRELOffshrBsline5MW_Onshore.fst'),
+    'v8': path.join(FAST_INPUT_FOLDER, 'v8', 'NREL5MW.fst')
+}
+INPUT_FILE_EXTENSIONS = ['.fst', '.dat', '.ipt', '.inp']
+STUB_EXECUTABLE = path.join(path.dirname(path.abspath(__file__)), 'stub_executable.py')
+FAST_INPUT_CLASSES = {
+    'v7': Fast7Input,
+    'v8': Fast8Input
+}
+
+
+def example_input_files():
+    """The example FAST v7 and v8 input decks, excluding outputs and summary files
+
+    :returns: generator of file paths
+    """
+    for version in ['v7', 'v8']:
+        folder = path.join(FAST_INPUT_FOLDER, version)
+        for name in sorted(os.listdir(folder)):
+            if path.splitext(name)[1] in INPUT_FILE_EXTENSIONS:
+                yield path.join(folder, name)
+
+
+def configure_luigi(stub_executables=False):
+    """Set the luigi parameters needed to construct tasks
+
+    :param stub_executables: If `True`, the tasks run :mod:`benchmarks.stub_executable` in place of TurbSim and FAST,
+        otherwise the tasks have no executable and can only be constructed
+    """
+    config = luigi.configuration.get_config()
+    for task_cls in [WindGenerationTask, FastSimulationTask]:
+        config.set(task_cls.__name__, '_runner_type', 'python' if stub_executables else 'process')
+        config.set(task_cls.__name__, '_exe_path', STUB_EXECUTABLE if stub_executables else '')
+
+
+def create_spawner(fast_version, prereq_outdir, stub_executables=False):
+    """Create a spawner from the example FAST and TurbSim decks
+
+    :param fast_version: Major version of FAST {'v7', 'v8'}
+    :param prereq_outdir: The output directory for prerequisites
+    :param stub_executables: If `True`, the spawned tasks run :mod:`benchmarks.stub_executable` in place of TurbSim and
+        FAST, so that they can be run on any platform
+    :returns: :class:`FastSimulationSpawner` that generates Bladed-style wind files
+    """
+    configure_luigi(stub_executables)
+    fast_input = FAST_INPUT_CLASSES[fast_version].from_file(FAST_INPUT_FILES[fast_version])
+    spawner = FastSimulationSpawner(fast_input, TurbsimSpawner(TurbsimInput.from_file(TURBSIM_INPUT_FILE)),
+                                    prereq_outdir)
+    spawner.wind_type = 'bladed'
+    return spawner
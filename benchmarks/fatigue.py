@@ -0,0 +1,73 @@
+# spawnwind
+# Copyright (C) 2018-2019, Simmovation Ltd.
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301  USA
+"""Benchmarks of rainflow counting, against a reference implementation in pure Python
+"""
+import numpy as np
+
+from spawnwind.analysis import rainflow, damage_sums
+
+
+def reference_rainflow(values):
+    """Four-point rainflow counting in pure Python, one turning point at a time, as in typical post-processing scripts
+
+    :param values: The time series
+    :returns: Tuple of lists of the ranges of closed cycles and of half cycles
+    """
+    points = [values[0]]
+    for value in values[1:]:
+        if value == points[-1]:
+            continue
+        if len(points) >= 2 and (points[-1] - points[-2]) * (value - points[-1]) > 0:
+            points[-1] = value
+        else:
+            points.append(value)
+    stack, ranges = [], []
+    for point in points:
+        stack.append(point)
+        while len(stack) >= 4:
+            a, b, c, d = stack[-4:]  # pylint: disable=invalid-name
+            if abs(c - b) <= abs(b - a) and abs(c - b) <= abs(d - c):
+                ranges.append(abs(c - b))
+                del stack[-3:-1]
+            else:
+                break
+    return ranges, [abs(b - a) for a, b in zip(stack[:-1], stack[1:])]
+
+
+class RainflowSuite:
+    """Rainflow counting a 600 s channel sampled at 20 Hz, as a random walk of 12000 points
+    """
+    def setup(self):
+        # pylint: disable=attribute-defined-outside-init
+        values = np.cumsum(np.random.RandomState(0).normal(size=12000))
+        self._values = values
+        self._values_list = values.tolist()
+
+    def time_rainflow(self):
+        """Vectorised four-point rainflow counting
+        """
+        rainflow(self._values)
+
+    def time_reference_rainflow(self):
+        """Pure Python four-point rainflow counting
+        """
+        reference_rainflow(self._values_list)
+
+    def time_damage_sums(self):
+        """Rainflow counting and damage sums for six Wöhler exponents
+        """
+        damage_sums(self._values)
@@ -0,0 +1,75 @@
+# spawnwind
+# Copyright (C) 2018-2019, Simmovation Ltd.
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301  USA
+"""Memory benchmarks for spawning
+"""
+from os import path
+import tempfile
+import tracemalloc
+
+from spawnwind.nrel import NRELSimulationInput
+
+from .common import create_spawner, example_input_files
+
+
+class LeafMemorySuite:
+    """Memory retained for each spawned leaf: the branched spawner and its simulation task
+    """
+    params = ['v7', 'v8']
+    param_names = ['fast_version']
+    number_of_leaves = 200
+
+    def setup(self, fast_version):
+        # pylint: disable=attribute-defined-outside-init
+        self._tmpdir = tempfile.TemporaryDirectory()
+        self._spawner = create_spawner(fast_version, path.join(self._tmpdir.name, 'prereq'))
+
+    def teardown(self, _fast_version):
+        self._tmpdir.cleanup()
+
+    def track_bytes_per_leaf(self, _fast_version):
+        """Traced bytes allocated and retained per leaf, where each leaf branches from a common parent and edits the
+        wind and initial conditions
+        """
+        leaves = []
+        tracemalloc.start()
+        start, _ = tracemalloc.get_traced_memory()
+        for i in range(self.number_of_leaves):
+            leaf = self._spawner.branch()
+            leaf.wind_speed = 4.0 + i % 20
+            leaf.initial_yaw = float(i % 3 - 1) * 8.0
+            leaf.turbulence_seed = i
+            leaves.append((leaf, leaf.spawn(path.join(self._tmpdir.name, 'runs', str(i)), {})))
+        end, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return (end - start) / self.number_of_leaves
+    track_bytes_per_leaf.unit = 'bytes'
+
+
+class ParsedLineMemorySuite:
+    """Memory used by the parsed lines of the example input decks
+    """
+    def track_bytes_per_line(self):
+        """Traced bytes allocated and retained per line of input
+        """
+        tracemalloc.start()
+        start, _ = tracemalloc.get_traced_memory()
+        inputs = [NRELSimulationInput.from_file(f) for f in example_input_files()]
+        end, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        # pylint: disable=protected-access
+        return (end - start) / sum(len(i._input_lines) for i in inputs)
+    track_bytes_per_line.unit = 'bytes'
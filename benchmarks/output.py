@@ -0,0 +1,95 @@
+# spawnwind
+# Copyright (C) 2018-2019, Simmovation Ltd.
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301  USA
+"""Benchmarks for reading FAST binary output files
+"""
+from os import path
+import tempfile
+
+from spawnwind.nrel.output import FastOutput, compact_output, open_output, read_outb
+
+from .stub_executable import write_outb
+
+
+class ReadOutbSuite:
+    """Reading a 600 s output of 100 channels at 20 Hz, in each of which the values are scaled 16-bit integers
+    """
+    number_of_channels = 100
+    channels = ['Channel{}'.format(i) for i in range(number_of_channels)]
+
+    def setup(self):
+        # pylint: disable=attribute-defined-outside-init
+        self._tmpdir = tempfile.TemporaryDirectory()
+        self._file_path = path.join(self._tmpdir.name, 'fast.outb')
+        write_outb(self._file_path, self.channels, ['(-)'] * self.number_of_channels, 12001, 0.0, 0.05)
+
+    def teardown(self):
+        self._tmpdir.cleanup()
+
+    def time_open(self):
+        """Open the file and decode its header
+        """
+        FastOutput(self._file_path)
+
+    def time_read_all_channels(self):
+        """Read all channels over the whole time series
+        """
+        read_outb(self._file_path)
+
+    def time_read_channel_window(self):
+        """Read one channel over the last 100 s
+        """
+        read_outb(self._file_path, ['Channel50'], start_time=500.0)
+
+
+class CompactOutputSuite:
+    """Compacting the same output to 10 of its channels at every other time step, and the size and read time of the
+    result, with and without compression
+    """
+    params = [False, True]
+    param_names = ['compress']
+    number_of_channels = 100
+    channels = ['Channel{}'.format(i) for i in range(number_of_channels)]
+    kept_channels = channels[::10]
+
+    def setup(self, compress):
+        # pylint: disable=attribute-defined-outside-init
+        self._tmpdir = tempfile.TemporaryDirectory()
+        self._raw_path = path.join(self._tmpdir.name, 'fast.outb')
+        write_outb(self._raw_path, self.channels, ['(-)'] * self.number_of_channels, 12001, 0.0, 0.05)
+        self._compact_path = compact_output(self._raw_path, path.join(self._tmpdir.name, 'fast.npz'),
+                                            self.kept_channels, decimation=2, compress=compress)
+
+    def teardown(self, _compress):
+        self._tmpdir.cleanup()
+
+    def time_compact(self, compress):
+        """Compact the output, including reading back the compact file to verify it
+        """
+        compact_output(self._raw_path, path.join(self._tmpdir.name, 'other.npz'), self.kept_channels, decimation=2,
+                       compress=compress)
+
+    def time_read_compact_channel(self, _compress):
+        """Read one channel of the compact output over the whole time series
+        """
+        with open_output(self._compact_path) as output:
+            output.channel('Channel50')
+
+    def track_size_ratio(self, _compress):
+        """Size of the compact output as a fraction of the raw output
+        """
+        return path.getsize(self._compact_path) / path.getsize(self._raw_path)
+    track_size_ratio.unit = 'ratio'
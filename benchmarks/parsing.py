@@ -0,0 +1,83 @@
+# spawnwind
+# Copyright (C) 2018-2019, Simmovation Ltd.
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301  USA
+"""Parsing benchmarks for NREL input files
+"""
+import timeit
+from os import path
+
+from spawnwind.nrel import Fast8Input
+from spawnwind.nrel.nrel_input_line import NrelInputLine, parse_lines
+from spawnwind.nrel.input_cache import parsed_input_cache
+
+from .common import example_input_files, FAST_INPUT_FOLDER
+
+
+class ParseThroughputSuite:
+    """Tokenising throughput on the lines of the example input decks, held in memory so that disk access is excluded
+    """
+    repeats = 20
+
+    def setup(self):
+        # pylint: disable=attribute-defined-outside-init
+        self._files = []
+        for file_path in example_input_files():
+            with open(file_path) as fp:
+                self._files.append(fp.readlines())
+        self._number_of_lines = sum(len(lines) for lines in self._files)
+
+    def _lines_per_second(self, parse):
+        seconds = min(timeit.repeat(lambda: [parse(lines) for lines in self._files], number=1, repeat=self.repeats))
+        return self._number_of_lines / seconds
+
+    def track_lines_per_second(self):
+        """Lines tokenised per second by :func:`parse_lines`, one call per file
+        """
+        return self._lines_per_second(parse_lines)
+    track_lines_per_second.unit = 'lines/s'
+
+    def track_lines_per_second_by_line(self):
+        """Lines tokenised per second when constructing each :class:`NrelInputLine` individually
+        """
+        return self._lines_per_second(lambda lines: [NrelInputLine(line) for line in lines])
+    track_lines_per_second_by_line.unit = 'lines/s'
+
+    def time_parse_example_decks(self):
+        """Time to tokenise every example input deck once
+        """
+        for lines in self._files:
+            parse_lines(lines)
+
+
+class LoadFromFileSuite:
+    """Loading the example FAST v8 deck from disk, with and without the parsed input cache
+    """
+    def setup(self):
+        # pylint: disable=attribute-defined-outside-init
+        self._file_path = path.join(FAST_INPUT_FOLDER, 'v8', 'NREL5MW.fst')
+        parsed_input_cache.invalidate()
+        Fast8Input.from_file(self._file_path)
+
+    def time_load_cached(self):
+        """Time to load a file that is already in the cache
+        """
+        Fast8Input.from_file(self._file_path)
+
+    def time_load_uncached(self):
+        """Time to load a file that must be read and tokenised
+        """
+        parsed_input_cache.invalidate()
+        Fast8Input.from_file(self._file_path)
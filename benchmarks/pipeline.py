@@ -0,0 +1,92 @@
+# spawnwind
+# Copyright (C) 2018-2019, Simmovation Ltd.
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301  USA
+"""End-to-end benchmarks of spawning and running tasks with luigi, using stand-ins for FAST and TurbSim
+"""
+import os
+import sys
+import time
+import tempfile
+import subprocess
+from os import path
+
+import luigi
+
+from .common import STUB_EXECUTABLE, create_spawner
+from .spawning import FAST_VERSIONS, synthetic_spec
+
+
+def _process_seconds(input_file, repeats=3):
+    """Shortest wall time of running the stub executable on an input file, including starting the interpreter
+    """
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, STUB_EXECUTABLE, input_file], check=True)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+class PipelineSuite:
+    """Spawn a specification, then run all of its wind generation and simulation tasks with the luigi local scheduler
+    and the stub executable, which returns immediately. The time per task that is not spent running the stub is the
+    overhead of luigi and the tasks
+    """
+    params = FAST_VERSIONS
+    param_names = ['fast_version']
+    number_of_leaves = 66
+    timeout = 600
+
+    def setup(self, fast_version):
+        # pylint: disable=import-outside-toplevel,attribute-defined-outside-init
+        import spawnwind  # pylint: disable=unused-import
+        from spawn.config import DefaultConfiguration
+        from spawn.parsers import SpecificationParser
+        from spawn.plugins import PluginLoader
+        from spawn.tasks.generate import generate_tasks_from_spec
+
+        os.environ['SPAWNWIND_STUB_SECONDS'] = '0'
+        self._tmpdir = tempfile.TemporaryDirectory()
+        spec = SpecificationParser(PluginLoader(DefaultConfiguration())).parse(synthetic_spec(self.number_of_leaves))
+        spawner = create_spawner(fast_version, path.join(self._tmpdir.name, 'prereq'), stub_executables=True)
+        self._tasks = generate_tasks_from_spec(spawner, spec.root_node, path.join(self._tmpdir.name, 'runs'))
+        self._wind_tasks = {t.task_id: t for task in self._tasks for t in task.requires()}
+
+    def teardown(self, _fast_version):
+        self._tmpdir.cleanup()
+
+    def _run(self):
+        start = time.perf_counter()
+        if not luigi.build(self._tasks, local_scheduler=True, workers=1, log_level='WARNING'):
+            raise RuntimeError('Pipeline tasks failed')
+        return time.perf_counter() - start
+
+    def track_seconds_per_task(self, _fast_version):
+        """Wall time per wind generation and simulation task
+        """
+        return self._run() / (len(self._tasks) + len(self._wind_tasks))
+    track_seconds_per_task.unit = 'seconds'
+
+    def track_overhead_per_task(self, _fast_version):
+        """Wall time per task, less the time of running the stub executable for the task on its own
+        """
+        wall_time = self._run()
+        # pylint: disable=protected-access
+        stub_time = len(self._tasks) * _process_seconds(self._tasks[0]._input_file_path)
+        wind_task = next(iter(self._wind_tasks.values()))
+        stub_time += len(self._wind_tasks) * _process_seconds(wind_task._input_file_path)
+        return (wall_time - stub_time) / (len(self._tasks) + len(self._wind_tasks))
+    track_overhead_per_task.unit = 'seconds'
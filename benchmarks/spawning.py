@@ -0,0 +1,147 @@
+# spawnwind
+# Copyright (C) 2018-2019, Simmovation Ltd.
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301  USA
+"""Spawning benchmarks for the example IEC specification and large synthetic specifications
+"""
+import sys
+import json
+import math
+import time
+import tempfile
+import multiprocessing
+from os import path
+
+from .common import EXAMPLE_DATA_FOLDER, create_spawner
+
+IEC_SPEC_FILE = path.join(EXAMPLE_DATA_FOLDER, 'iec_spec.json')
+SPECS = ['iec', '10k', '100k']
+FAST_VERSIONS = ['v7', 'v8']
+
+
+def synthetic_spec(number_of_leaves):
+    """A fatigue-like specification of wind speeds, turbulence seeds and yaw errors, in which every wind file is used
+    by three leaves
+
+    :param number_of_leaves: Approximate number of leaves
+    :returns: Specification dictionary
+    """
+    wind_speeds = list(range(4, 26, 2))
+    yaw_angles = [-8.0, 0.0, 8.0]
+    seeds = math.ceil(number_of_leaves / (len(wind_speeds) * len(yaw_angles)))
+    return {
+        'spec': {
+            'wind_speed': wind_speeds,
+            'turbulence_seed': list(range(1, seeds + 1)),
+            'initial_yaw': yaw_angles
+        }
+    }
+
+
+def load_spec(spec_name):
+    """
+    :param spec_name: 'iec' for the example IEC specification, or the number of leaves of a synthetic specification
+        such as '10k'
+    :returns: Specification dictionary
+    """
+    if spec_name == 'iec':
+        with open(IEC_SPEC_FILE) as fp:
+            return json.load(fp)
+    return synthetic_spec(int(spec_name.rstrip('k')) * 1000)
+
+
+def _peak_rss_bytes():
+    try:
+        import resource  # pylint: disable=import-outside-toplevel
+    except ImportError:
+        return float('nan')
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def measure_spawn(fast_version, spec_name):
+    """Spawn a specification and measure it. This should be run in a fresh process so that the peak RSS is its own
+
+    :returns: dictionary of wall time, peak RSS, number of tasks, files written and wind-task dedup ratio
+    """
+    # pylint: disable=import-outside-toplevel,too-many-locals
+    import spawnwind  # pylint: disable=unused-import
+    from spawn.config import DefaultConfiguration
+    from spawn.parsers import SpecificationParser
+    from spawn.plugins import PluginLoader
+    from spawn.tasks.generate import generate_tasks_from_spec
+    from spawnwind.profiling import profiler
+
+    spec = SpecificationParser(PluginLoader(DefaultConfiguration())).parse(load_spec(spec_name))
+    with tempfile.TemporaryDirectory() as outdir:
+        spawner = create_spawner(fast_version, path.join(outdir, 'prereq'))
+        profiler.enable()
+        start = time.perf_counter()
+        tasks = generate_tasks_from_spec(spawner, spec.root_node, path.join(outdir, 'runs'))
+        wall_time = time.perf_counter() - start
+        counters = profiler.summary()['counters']
+    wind_lookups = counters.get('wind_dedup_hits', 0) + counters.get('wind_dedup_misses', 0)
+    return {
+        'wall_time': wall_time,
+        'peak_rss': _peak_rss_bytes(),
+        'tasks': len(tasks),
+        'files_written': counters.get('files_written', 0),
+        'wind_dedup_ratio': counters.get('wind_dedup_hits', 0) / wind_lookups if wind_lookups else 0.0
+    }
+
+
+class SpawnSpecSuite:
+    """Spawning whole specifications with the example decks. Each specification is spawned once, in a fresh process,
+    and the measurements are reported by the track methods
+    """
+    params = [SPECS, FAST_VERSIONS]
+    param_names = ['spec', 'fast_version']
+    timeout = 3600
+
+    def setup_cache(self):
+        """Spawn each specification with each version of FAST
+        """
+        context = multiprocessing.get_context('spawn')
+        results = {}
+        for spec_name in SPECS:
+            for fast_version in FAST_VERSIONS:
+                with context.Pool(1) as pool:
+                    results[(spec_name, fast_version)] = pool.apply(measure_spawn, (fast_version, spec_name))
+        return results
+
+    def track_wall_time(self, results, spec_name, fast_version):
+        """Wall time to generate all the tasks of the specification
+        """
+        return results[(spec_name, fast_version)]['wall_time']
+    track_wall_time.unit = 'seconds'
+
+    def track_peak_rss(self, results, spec_name, fast_version):
+        """Peak resident set size of the spawning process
+        """
+        return results[(spec_name, fast_version)]['peak_rss']
+    track_peak_rss.unit = 'bytes'
+
+    def track_files_written(self, results, spec_name, fast_version):
+        """Number of files written while spawning
+        """
+        return results[(spec_name, fast_version)]['files_written']
+    track_files_written.unit = 'files'
+
+    def track_wind_dedup_ratio(self, results, spec_name, fast_version):
+        """Fraction of leaves whose wind generation task was shared with an earlier leaf
+        """
+        return results[(spec_name, fast_version)]['wind_dedup_ratio']
+    track_wind_dedup_ratio.unit = 'ratio'
@@ -0,0 +1,73 @@
+# spawnwind
+# Copyright (C) 2018-2019, Simmovation Ltd.
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301  USA
+"""Benchmarks of querying simulation outputs from the columnar store, against reading the binary output files
+"""
+import os
+from os import path
+import tempfile
+
+from spawnwind.nrel import FastSimulationTask
+from spawnwind.nrel.output import FastOutput
+from spawnwind.analysis import collect_outputs
+
+from .common import configure_luigi
+from .stub_executable import write_outb
+
+
+class SelectSuite:
+    """Maximum of one channel over the yaw = +10 simulations of a DLC of 120 simulations, each of 50 channels over
+    300 s at 10 Hz
+    """
+    number_of_channels = 50
+    wind_speeds = [4.0 + 2.0 * i for i in range(10)]
+    yaw_angles = [-10.0, 0.0, 10.0]
+    seeds = [1, 2, 3, 4]
+    timeout = 600
+
+    def setup(self):
+        # pylint: disable=attribute-defined-outside-init
+        configure_luigi()
+        self._tmpdir = tempfile.TemporaryDirectory()
+        runs_dir = path.join(self._tmpdir.name, 'runs')
+        channels = ['Channel{}'.format(i) for i in range(self.number_of_channels)]
+        self._tasks = []
+        for wind_speed in self.wind_speeds:
+            for yaw in self.yaw_angles:
+                for seed in self.seeds:
+                    run_dir = path.join(runs_dir, 'dlc1.2', 'WS_{}'.format(wind_speed), 'yaw{}'.format(yaw), str(seed))
+                    os.makedirs(run_dir)
+                    task = FastSimulationTask(run_dir, _input_file_path=path.join(run_dir, 'fast.fst'),
+                                              _metadata={'wind_speed': wind_speed, 'initial_yaw': yaw,
+                                                         'turbulence_seed': seed})
+                    write_outb(task.output().path, channels, ['(-)'] * len(channels), 3001, 0.0, 0.1)
+                    self._tasks.append(task)
+        self._store = collect_outputs(self._tasks, path.join(self._tmpdir.name, 'store'), runs_dir, processes=1)
+
+    def teardown(self):
+        self._tmpdir.cleanup()
+
+    def time_select_from_store(self):
+        """Select the simulations by metadata and read the channel from the store
+        """
+        selected = self._store.select('dlc1.2', ['Channel25'], initial_yaw=10.0)
+        return max(channels['Channel25'].max() for _, channels in selected)
+
+    def time_select_from_output_files(self):
+        """Select the simulations by the metadata of their tasks and read the channel from each output file
+        """
+        return max(FastOutput(task.output().path).channel('Channel25').max()
+                   for task in self._tasks if task.metadata['initial_yaw'] == 10.0)
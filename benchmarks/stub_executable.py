@@ -0,0 +1,265 @@
+# spawnwind
+# Copyright (C) 2018-2019, Simmovation Ltd.
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301  USA
+"""Stand-in for the FAST and TurbSim executables, for load testing the spawn, luigi and output pipeline on
+machines that cannot run them. Run as ``python stub_executable.py <input file>``, where the input file is a TurbSim
+input, which is recognised by its ``RandSeed1`` key, or otherwise a FAST deck.
+
+The stub parses the input, checks that the files a simulation depends on exist, spends a configurable time and then
+writes output files of the size and layout that the real program would for the same input. The time is set by the
+environment variables ``SPAWNWIND_STUB_SECONDS`` (default 0) and ``SPAWNWIND_STUB_MODE``, which is ``sleep``
+(default) or ``burn`` to keep a CPU busy. Only the standard library is used, so that starting the stub is cheap
+"""
+import os
+import re
+import sys
+import math
+import time
+import struct
+from array import array
+from os import path
+
+_LINE_PATTERN = re.compile(r'\s*(?:"(.*?)"|(\S+))\s+([a-zA-Z0-9_()]+)')
+_OUTLIST_CHANNEL = re.compile(r'"([^"]*)"')
+# Module input files of FAST v7 and v8 decks, which are written by the spawner
+_MODULE_KEYS = ('ADFile', 'EDFile', 'InflowFile', 'AeroFile', 'ServoFile')
+# Characters in each channel name and unit of .outb files
+_CHANNEL_NAME_LENGTH = 10
+_INT16_RANGE = 32768.0
+
+
+def parse_input(file_path):
+    """Values of an NREL-style input file by key, and the output channels listed in its OutList
+
+    :param file_path: The input file
+    :returns: Tuple of dictionary of lists of the values of each key, in order of occurrence, and list of channel
+        names
+    """
+    values = {}
+    channels = []
+    in_outlist = False
+    with open(file_path) as fp:
+        for line in fp:
+            if in_outlist:
+                if line.lstrip().upper().startswith('END'):
+                    in_outlist = False
+                else:
+                    channels.extend(name.strip() for c in _OUTLIST_CHANNEL.findall(line.split(' -')[0])
+                                    for name in c.split(',') if name.strip())
+                continue
+            if line.split()[:1] == ['OutList']:
+                in_outlist = True
+                continue
+            match = _LINE_PATTERN.match(line)
+            if match is None or line.lstrip().startswith(('-', '=')):
+                continue
+            key = match.group(3)
+            values.setdefault(key, []).append(match.group(1) if match.group(1) is not None else match.group(2))
+    return values, channels
+
+
+def _value(values, key, default=None, occurrence=1):
+    occurrences = values.get(key, ())
+    return occurrences[occurrence - 1] if len(occurrences) >= occurrence else default
+
+
+def spend_time():
+    """Sleep, or keep a CPU busy, for the time set by the environment
+    """
+    seconds = float(os.environ.get('SPAWNWIND_STUB_SECONDS', '0'))
+    if os.environ.get('SPAWNWIND_STUB_MODE', 'sleep') == 'burn':
+        end = time.perf_counter() + seconds
+        while time.perf_counter() < end:
+            math.sqrt(end)
+    elif seconds > 0:
+        time.sleep(seconds)
+
+
+def _samples(count, period):
+    """Repeating int16 samples of a sine wave, which are cheap to generate in bulk
+    """
+    cycle = array('h', (int(16000 * math.sin(2 * math.pi * i / period)) for i in range(period)))
+    samples = cycle * (count // period + 1)
+    del samples[count:]
+    return samples
+
+
+def _relative_to(file_path, value):
+    value = value.strip('"')
+    return value if path.isabs(value) else path.join(path.dirname(file_path), value)
+
+
+def _is_true(value):
+    return value.strip('"').lower() in ('true', 't')
+
+
+def _require(file_path):
+    if not path.isfile(file_path):
+        sys.stderr.write('Required file not found: {}\n'.format(file_path))
+        sys.exit(1)
+
+
+def _wind_file(inflow_file, inflow):
+    """The wind file read by an InflowWind input, if any
+    """
+    wind_type = int(_value(inflow, 'WindType', '1'))
+    if wind_type == 3:
+        return _relative_to(inflow_file, _value(inflow, 'FilenameT3') or _value(inflow, 'Filename', '', 2))
+    if wind_type == 4:
+        return _relative_to(inflow_file, _value(inflow, 'FilenameT4') or _value(inflow, 'FilenameRoot', '')) + '.wnd'
+    return None
+
+
+def write_outb(file_path, channels, units, samples, time_out1, time_incr):
+    """Write a FAST binary output file in the format without a time channel (FileID 2), in which each channel is
+    scaled to 16-bit integers
+
+    :param file_path: The output file
+    :param channels: Names of the output channels, excluding time
+    :param units: Units of the output channels, excluding time
+    :param samples: Number of time steps
+    :param time_out1: Time of the first output
+    :param time_incr: Time between outputs
+    """
+    description = 'Predictions were generated by a stub FAST executable'.encode('ascii')
+
+    def fixed_width(names):
+        return b''.join(n[:_CHANNEL_NAME_LENGTH].ljust(_CHANNEL_NAME_LENGTH).encode('ascii') for n in names)
+
+    num_channels = len(channels)
+    with open(file_path, 'wb') as fp:
+        fp.write(struct.pack('<hiidd', 2, num_channels, samples, time_out1, time_incr))
+        fp.write(array('f', [_INT16_RANGE / 100.0] * num_channels).tobytes())
+        fp.write(array('f', [0.0] * num_channels).tobytes())
+        fp.write(struct.pack('<i', len(description)) + description)
+        fp.write(fixed_width(['Time'] + channels))
+        fp.write(fixed_width(['(s)'] + units))
+        fp.write(_samples(samples * num_channels, 97).tobytes())
+
+
+def write_out(file_path, channels, units, samples, time_out1, time_incr):
+    """Write a FAST text output file
+
+    :param file_path: The output file
+    :param channels: Names of the output channels, excluding time
+    :param units: Units of the output channels, excluding time
+    :param samples: Number of time steps
+    :param time_out1: Time of the first output
+    :param time_incr: Time between outputs
+    """
+    pattern = _samples(97, 97)
+    with open(file_path, 'w') as fp:
+        fp.write('Predictions were generated by a stub FAST executable\n\n\n\n\n\n')
+        fp.write('\t'.join(['Time'] + channels) + '\n')
+        fp.write('\t'.join(['(s)'] + units) + '\n')
+        for i in range(samples):
+            value = '{:10.4E}'.format(pattern[i % 97] / 100.0)
+            fp.write('\t'.join(['{:10.4E}'.format(time_out1 + i * time_incr)] + [value] * len(channels)) + '\n')
+
+
+def run_fast(input_file):
+    """Stand-in for FAST v7 or v8, which writes the outputs of the deck in the formats selected by `OutFileFmt`
+
+    :param input_file: The main FAST input file
+    """
+    values, channels = parse_input(input_file)
+    for key in _MODULE_KEYS:
+        if key not in values:
+            continue
+        module_file = _relative_to(input_file, _value(values, key))
+        _require(module_file)
+        module_values, module_channels = parse_input(module_file)
+        channels.extend(module_channels)
+        if key == 'ADFile' and 'WindFile' in module_values:
+            _require(_relative_to(module_file, _value(module_values, 'WindFile')))
+        elif key == 'InflowFile':
+            wind_file = _wind_file(module_file, module_values)
+            if wind_file is not None:
+                _require(wind_file)
+    spend_time()
+
+    step = float(_value(values, 'DT'))
+    dt_out = _value(values, 'DT_Out', 'default').strip('"')
+    if dt_out.lower() == 'default':
+        dt_out = step * int(_value(values, 'DecFact', '1'))
+    time_out1 = float(_value(values, 'TStart', '0'))
+    samples = int(math.floor((float(_value(values, 'TMax')) - time_out1) / float(dt_out) + 1e-6)) + 1
+    units = ['(-)'] * len(channels)
+    output_format = int(_value(values, 'OutFileFmt', '2'))
+    root_name = path.splitext(input_file)[0]
+    if output_format in (1, 3):
+        write_out(root_name + '.out', channels, units, samples, time_out1, float(dt_out))
+    if output_format in (2, 3):
+        write_outb(root_name + '.outb', channels, units, samples, time_out1, float(dt_out))
+
+
+def run_turbsim(input_file):
+    """Stand-in for TurbSim, which writes the full-field wind files selected by `WrBLFF` and `WrADFF` with the grid
+    and duration of the input, and a summary file
+
+    :param input_file: The TurbSim input file
+    """
+    # pylint: disable=too-many-locals
+    values, _ = parse_input(input_file)
+    spend_time()
+
+    def number(key):
+        return float(_value(values, key))
+
+    num_z, num_y = int(number('NumGrid_Z')), int(number('NumGrid_Y'))
+    time_step, mean_speed = number('TimeStep'), number('URef')
+    duration = max(number('AnalysisTime'), number('UsableTime') + number('GridWidth') / mean_speed)
+    steps = int(math.ceil(duration / time_step))
+    hub_height, grid_height = number('HubHt'), number('GridHeight')
+    dz, dy = grid_height / (num_z - 1), number('GridWidth') / (num_y - 1)
+    data = _samples(steps * num_z * num_y * 3, 101).tobytes()
+    root_name = path.splitext(input_file)[0]
+    if _is_true(_value(values, 'WrBLFF', 'False')):
+        with open(root_name + '.wnd', 'wb') as fp:
+            fp.write(struct.pack('<hhifffffffffifffffffiii', -99, 4, 3, 0.0, 0.03, hub_height, 10.0, 8.0, 5.0,
+                                 dz, dy, time_step * mean_speed, steps // 2, mean_speed, 0.0, 0.0, 0.0, 0.0, 0.0,
+                                 0, int(_value(values, 'RandSeed1')), num_z, num_y))
+            fp.write(data)
+    if _is_true(_value(values, 'WrADFF', 'False')):
+        description = 'Generated by a stub TurbSim executable'.encode('ascii')
+        with open(root_name + '.bts', 'wb') as fp:
+            fp.write(struct.pack('<hiiiiffffff', 7, num_z, num_y, 0, steps, dz, dy, time_step, mean_speed,
+                                 hub_height, hub_height - grid_height / 2))
+            fp.write(struct.pack('<ffffff', 1000.0, 0.0, 1000.0, 0.0, 1000.0, 0.0))
+            fp.write(struct.pack('<i', len(description)) + description)
+            fp.write(data)
+    with open(root_name + '.sum', 'w') as fp:
+        fp.write('Generated by a stub TurbSim executable\n\n')
+        fp.write('{:.3f}  mean wind speed at hub height (m/s)\n'.format(mean_speed))
+        fp.write('{:.3f}  height offset (m)\n'.format(0.0))
+        fp.write('{}  time steps\n'.format(steps))
+
+
+def main(input_file):
+    """Run the stand-in for TurbSim or FAST, according to the keys of the input file
+
+    :param input_file: The input file
+    """
+    with open(input_file) as fp:
+        is_turbsim = any('RandSeed1' in line for line in fp)
+    if is_turbsim:
+        run_turbsim(input_file)
+    else:
+        run_fast(input_file)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1])
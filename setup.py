@@ -47,6 +47,7 @@ tests_require = [
 extras_require = {
     'test': tests_require,
     'docs': ['sphinx', 'm2r'],
+    'output': ['numpy'],
     'publish': ['twine']
 }
 
@@ -55,7 +56,7 @@ setup(
     install_requires=install_requires,
     tests_require=tests_require,
     extras_require=extras_require,
-    packages=find_packages(exclude=('tests*',)),
+    packages=find_packages(exclude=('tests*', 'benchmarks*')),
     cmdclass=versioneer.get_cmdclass(),
     license='GPLv3',
     version=versioneer.get_version(),
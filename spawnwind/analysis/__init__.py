@@ -0,0 +1,25 @@
+# spawnwind
+# Copyright (C) 2018-2019, Simmovation Ltd.
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301  USA
+"""Post-processing of the outputs of spawned simulations. Requires :mod:`numpy`, which is installed with the `output`
+extra
+"""
+from .run_set import completed_outputs, map_outputs
+from .table import write_table, read_table
+from .statistics import StreamingStatistics, output_statistics, run_set_statistics
+from .fatigue import turning_points, rainflow, damage_sums, damage_equivalent_load, weibull_bin_probabilities, \
+    run_set_equivalent_loads, lifetime_equivalent_loads
+from .store import ColumnarStore, collect_outputs, dlc_partition
@@ -0,0 +1,246 @@
+# spawnwind
+# Copyright (C) 2018-2019, Simmovation Ltd.
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301  USA
+"""
+Rainflow counting and damage equivalent loads (DELs) of simulation outputs. Cycles are counted with the four-point
+method, vectorised so that each pass over the turning points removes every closed cycle that does not overlap another
+"""
+import math
+import logging
+from collections import Counter
+
+import numpy as np
+
+from ..nrel.output import open_output
+from .run_set import completed_outputs, map_outputs
+from .table import column_array, metadata_columns, write_table
+
+LOGGER = logging.getLogger(__name__)
+
+# Wöhler (S-N curve) exponents typical of steel (3 to 5) and composite (8 to 12) components
+DEFAULT_EXPONENTS = (3, 4, 5, 8, 10, 12)
+_SECONDS_PER_YEAR = 365.25 * 24 * 3600
+
+
+def turning_points(values):
+    """
+    Turning points of a time series: its first and last values and the values at which it changes direction. Repeated
+    values are treated as a single value
+    :param values: 1-d array of the time series
+    :return: 1-d array of the turning points, in order
+    """
+    values = np.asarray(values, dtype=np.float64)
+    if len(values) == 0:
+        return values
+    values = values[np.concatenate(([True], np.diff(values) != 0))]
+    if len(values) < 3:
+        return values
+    diffs = np.diff(values)
+    return values[np.concatenate(([True], diffs[:-1] * diffs[1:] < 0, [True]))]
+
+
+def rainflow(values):
+    """
+    Count the cycles of a time series by the four-point rainflow method. Of four consecutive turning points A, B, C, D,
+    B and C close a cycle if the range B-C is no greater than either A-B or C-D. Closed cycles are removed until none
+    remain; each range between the remaining turning points (the residue) is counted as half a cycle
+    :param values: 1-d array of the time series
+    :return: Tuple of 1-d arrays of the ranges of the cycles and their counts (1 for closed cycles, 0.5 for half cycles)
+    """
+    points = turning_points(values)
+    closed = []
+    while len(points) >= 4:
+        ranges = np.abs(np.diff(points))
+        inner = ranges[1:-1]
+        closes = (inner <= ranges[:-2]) & (inner <= ranges[2:])
+        if not closes.any():
+            break
+        # Adjacent candidates share a turning point (their ranges are equal), so only the first of them is removed in
+        # this pass. Removing a closed cycle never reduces the ranges either side of it, so the rest remain closed
+        removed = closes.copy()
+        removed[1:] &= ~closes[:-1]
+        closed.append(inner[removed])
+        first = np.flatnonzero(removed) + 1
+        keep = np.ones(len(points), dtype=bool)
+        keep[first] = keep[first + 1] = False
+        points = points[keep]
+    full_ranges = np.concatenate(closed) if closed else np.empty(0)
+    half_ranges = np.abs(np.diff(points))
+    return (np.concatenate((full_ranges, half_ranges)),
+            np.concatenate((np.ones(len(full_ranges)), np.full(len(half_ranges), 0.5))))
+
+
+def damage_sums(values, exponents=DEFAULT_EXPONENTS):
+    """
+    Sum over the rainflow cycles of a time series of count times range to the power of each Wöhler exponent, to which
+    fatigue damage is proportional
+    :param values: 1-d array of the time series
+    :param exponents: Wöhler exponents
+    :return: 1-d array of the sums, one for each exponent
+    """
+    ranges, counts = rainflow(values)
+    exponents = np.asarray(exponents, dtype=np.float64)
+    return (ranges[np.newaxis, :] ** exponents[:, np.newaxis]) @ counts
+
+
+def damage_equivalent_load(damage_sum, exponent, equivalent_cycles):
+    """
+    Range of the constant-amplitude load that, applied for a number of cycles, does the same damage as the cycles of a
+    damage sum
+    :param damage_sum: Sum of count times range to the power of the exponent, as from :func:`damage_sums`
+    :param exponent: Wöhler exponent
+    :param equivalent_cycles: Number of cycles of the equivalent load
+    :return: Damage equivalent load range
+    """
+    return (damage_sum / equivalent_cycles) ** (1.0 / exponent)
+
+
+def output_damage_sums(file_path, channels=None, exponents=DEFAULT_EXPONENTS, start_time=None, end_time=None):
+    """
+    Damage sums (see :func:`damage_sums`) of the channels of a FAST binary output file. Channels are read one at a time
+    :param file_path: Path of the `.outb` file, or of the output compacted after the run
+    :param channels: Names of the channels. Defaults to all channels of the output
+    :param exponents: Wöhler exponents
+    :param start_time: Earliest time to include, e.g. to leave out the start-up transient
+    :param end_time: Latest time to include
+    :return: Tuple of the duration of the time series in seconds and a dictionary of 1-d arrays of damage sums (one for
+        each exponent) by channel name
+    """
+    with open_output(file_path) as output:
+        time = output.time(start_time, end_time)
+        duration = float(len(time) * (time[1] - time[0])) if len(time) > 1 else 0.0
+        channels = output.channels if channels is None else list(channels)
+        return duration, {name: damage_sums(output.channel(name, start_time, end_time), exponents)
+                          for name in channels}
+
+
+def weibull_bin_probabilities(wind_speeds, mean_wind_speed, shape=2.0):
+    """
+    Probabilities of wind speed bins under a Weibull distribution. Each bin is centred on one of the wind speeds and
+    extends half way to its neighbours, with the outer bins as wide as their inner halves. A shape of 2 (the default)
+    is the Rayleigh distribution of the IEC standard, for which the mean is 0.2 times the reference wind speed
+    :param wind_speeds: Wind speeds at the centres of the bins
+    :param mean_wind_speed: Annual mean wind speed
+    :param shape: Weibull shape factor
+    :return: Dictionary of probabilities by wind speed
+    """
+    speeds = sorted(set(wind_speeds))
+    if len(speeds) == 1:
+        return {speeds[0]: 1.0}
+    scale = mean_wind_speed / math.gamma(1.0 + 1.0 / shape)
+    edges = ([speeds[0] - (speeds[1] - speeds[0]) / 2.0] +
+             [(low + high) / 2.0 for low, high in zip(speeds[:-1], speeds[1:])] +
+             [speeds[-1] + (speeds[-1] - speeds[-2]) / 2.0])
+    cdf = [1.0 - math.exp(-(max(edge, 0.0) / scale) ** shape) for edge in edges]
+    return {speed: high - low for speed, low, high in zip(speeds, cdf[:-1], cdf[1:])}
+
+
+def _run_set_damage(tasks, channels, exponents, start_time, end_time, processes):
+    outputs = completed_outputs(tasks)
+    results = map_outputs(output_damage_sums,
+                          [(file_path, channels, exponents, start_time, end_time) for file_path, _ in outputs],
+                          processes)
+    return outputs, results
+
+
+def run_set_equivalent_loads(tasks, channels=None, exponents=DEFAULT_EXPONENTS, equivalent_frequency=1.0,
+                             start_time=None, end_time=None, processes=None, table_file=None):
+    """
+    Short-term damage equivalent loads of the channels of all the completed simulations of a set of spawned tasks,
+    computed in a pool of processes. The result is a table with a row for each channel and Wöhler exponent of each
+    simulation, with columns of the output file, the spawn metadata of the simulation, the channel, the exponent and
+    the load
+    :param tasks: Tasks, as generated from a specification
+    :param channels: Names of the channels. Defaults to all channels of each output
+    :param exponents: Wöhler exponents
+    :param equivalent_frequency: Frequency in Hz of the cycles of the equivalent loads, which are applied for the
+        duration of each simulation
+    :param start_time: Earliest time of each output to include
+    :param end_time: Latest time of each output to include
+    :param processes: Number of processes. Defaults to the number of CPUs
+    :param table_file: Path of a `.npz` or `.csv` file to write the table to (see :func:`write_table`), if given
+    :return: Dictionary of equal-length 1-d arrays by column name
+    """
+    # pylint: disable=too-many-arguments
+    outputs, results = _run_set_damage(tasks, channels, exponents, start_time, end_time, processes)
+    rows = [(file_path, metadata, channel, exponent,
+             damage_equivalent_load(damage_sum, exponent, duration * equivalent_frequency))
+            for (file_path, metadata), (duration, damage) in zip(outputs, results)
+            for channel, sums in damage.items()
+            for exponent, damage_sum in zip(exponents, sums)]
+    columns = {'output_file': column_array([row[0] for row in rows])}
+    columns.update(metadata_columns([row[1] for row in rows],
+                                    reserved=('output_file', 'channel', 'exponent', 'equivalent_load')))
+    columns['channel'] = column_array([row[2] for row in rows])
+    columns['exponent'] = np.array([row[3] for row in rows], dtype=np.float64)
+    columns['equivalent_load'] = np.array([row[4] for row in rows], dtype=np.float64)
+    if table_file is not None:
+        write_table(columns, table_file)
+    return columns
+
+
+def lifetime_equivalent_loads(tasks, mean_wind_speed, channels=None, exponents=DEFAULT_EXPONENTS, weibull_shape=2.0,
+                              lifetime_years=20.0, equivalent_cycles=1e7, start_time=None, end_time=None,
+                              processes=None, table_file=None):
+    """
+    Lifetime damage equivalent loads of a set of fatigue simulations, such as the leaves of the `fatigue` branch of a
+    specification. Each simulation stands for an equal share of the time spent in the bin of its `wind_speed`, as given
+    by :func:`weibull_bin_probabilities`, so seeds and yaw errors at a wind speed share its probability. Simulations
+    without a `wind_speed` (such as start-ups and shut-downs, which are counted by occurrence rather than time) are
+    left out
+    :param tasks: Tasks of the fatigue simulations, as generated from a specification
+    :param mean_wind_speed: Annual mean wind speed of the site or turbine class
+    :param channels: Names of the channels. Defaults to all channels of each output
+    :param exponents: Wöhler exponents
+    :param weibull_shape: Shape factor of the Weibull distribution of wind speeds. Defaults to 2 (Rayleigh)
+    :param lifetime_years: Design lifetime in years
+    :param equivalent_cycles: Number of cycles of the equivalent loads over the lifetime
+    :param start_time: Earliest time of each output to include
+    :param end_time: Latest time of each output to include
+    :param processes: Number of processes. Defaults to the number of CPUs
+    :param table_file: Path of a `.npz` or `.csv` file to write the table to (see :func:`write_table`), if given
+    :return: Dictionary of 1-d arrays of the `channel`, `exponent` and `equivalent_load` columns, with a row for each
+        channel and exponent
+    """
+    # pylint: disable=too-many-arguments,too-many-locals
+    with_wind_speed = [task for task in tasks if 'wind_speed' in task.metadata]
+    if len(with_wind_speed) < len(tasks):
+        LOGGER.info('Leaving %d simulations without a wind speed out of lifetime loads',
+                    len(tasks) - len(with_wind_speed))
+    outputs, results = _run_set_damage(with_wind_speed, channels, exponents, start_time, end_time, processes)
+    wind_speeds = [float(metadata['wind_speed']) for _, metadata in outputs]
+    probabilities = weibull_bin_probabilities(wind_speeds, mean_wind_speed, weibull_shape)
+    simulations_per_bin = Counter(wind_speeds)
+    lifetime = lifetime_years * _SECONDS_PER_YEAR
+    lifetime_damage = {}
+    for wind_speed, (duration, damage) in zip(wind_speeds, results):
+        if duration <= 0.0:
+            continue
+        # Number of times the simulation is repeated over the lifetime
+        repeats = probabilities[wind_speed] / simulations_per_bin[wind_speed] * lifetime / duration
+        for channel, sums in damage.items():
+            lifetime_damage[channel] = lifetime_damage.get(channel, 0.0) + repeats * sums
+    rows = [(channel, exponent, damage_equivalent_load(damage_sum, exponent, equivalent_cycles))
+            for channel, sums in lifetime_damage.items()
+            for exponent, damage_sum in zip(exponents, sums)]
+    columns = {
+        'channel': column_array([row[0] for row in rows]),
+        'exponent': np.array([row[1] for row in rows], dtype=np.float64),
+        'equivalent_load': np.array([row[2] for row in rows], dtype=np.float64)
+    }
+    if table_file is not None:
+        write_table(columns, table_file)
+    return columns
@@ -0,0 +1,63 @@
+# spawnwind
+# Copyright (C) 2018-2019, Simmovation Ltd.
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301  USA
+"""
+Finding the outputs of a set of spawned simulations and processing each of them in a pool of processes
+"""
+import logging
+from multiprocessing import Pool
+
+from ..nrel.tasks import FastSimulationTask
+
+LOGGER = logging.getLogger(__name__)
+
+
+def completed_outputs(tasks):
+    """
+    Output files and metadata of the FAST simulations among a list of spawned tasks whose outputs exist. Simulations
+    without outputs (for example because they have not been run) are logged and left out
+    :param tasks: Tasks, as generated from a specification
+    :type tasks: list of :class:`luigi.Task`
+    :return: List of tuples of output file path and dictionary of metadata, in task order
+    """
+    outputs = []
+    missing = 0
+    for task in tasks:
+        if not isinstance(task, FastSimulationTask):
+            continue
+        target = task.output()
+        if target.exists():
+            outputs.append((target.path, dict(task.metadata)))
+        else:
+            missing += 1
+    if missing:
+        LOGGER.warning('%d of %d simulations have no output', missing, missing + len(outputs))
+    return outputs
+
+
+def map_outputs(function, arguments, processes=None):
+    """
+    Apply a function to each of a list of outputs in a pool of processes. Each process is given one output at a time, so
+    holds at most one output in memory
+    :param function: Picklable function, which is called with each item of `arguments` unpacked
+    :param arguments: List of tuples of arguments, typically starting with the output file path
+    :param processes: Number of processes. If 1, the function is applied in this process. Defaults to the number of CPUs
+    :return: List of the results, in the order of `arguments`
+    """
+    if processes == 1:
+        return [function(*args) for args in arguments]
+    with Pool(processes) as pool:
+        return pool.starmap(function, arguments, chunksize=1)
@@ -0,0 +1,138 @@
+# spawnwind
+# Copyright (C) 2018-2019, Simmovation Ltd.
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301  USA
+"""
+Statistics of the channels of simulation outputs, computed chunk by chunk so that outputs are never decoded in full
+"""
+import numpy as np
+
+from ..nrel.output import open_output
+from .run_set import completed_outputs, map_outputs
+from .table import column_array, metadata_columns, write_table
+
+STATISTICS = ('min', 'max', 'mean', 'std', 'time_of_min', 'time_of_max')
+
+
+class StreamingStatistics:
+    """
+    Minimum, maximum, mean and (population) standard deviation of several channels, and the times of their extremes,
+    updated with consecutive chunks of values. Means and variances of chunks are combined with the parallel algorithm of
+    Chan et al., which is numerically stable for long time series
+    """
+
+    def __init__(self, channels):
+        """Initialises :class:`StreamingStatistics`
+
+        :param channels: Names of the channels
+        :type channels: list of str
+        """
+        self._channels = list(channels)
+        size = len(self._channels)
+        self._count = 0
+        self._mean = np.zeros(size)
+        self._sum_sq = np.zeros(size)
+        self._min = np.full(size, np.inf)
+        self._max = np.full(size, -np.inf)
+        self._time_of_min = np.full(size, np.nan)
+        self._time_of_max = np.full(size, np.nan)
+
+    def update(self, time, values):
+        """
+        Update the statistics with a chunk of values
+        :param time: 1-d array of the times of the chunk
+        :param values: Dictionary of 1-d arrays of the values of each channel
+        """
+        # pylint: disable=too-many-locals
+        count = len(time)
+        if count == 0:
+            return
+        chunk = np.stack([np.asarray(values[name], dtype=np.float64) for name in self._channels])
+        chunk_mean = chunk.mean(axis=1)
+        chunk_sum_sq = ((chunk - chunk_mean[:, np.newaxis]) ** 2).sum(axis=1)
+        total = self._count + count
+        delta = chunk_mean - self._mean
+        self._mean += delta * count / total
+        self._sum_sq += chunk_sum_sq + delta ** 2 * self._count * count / total
+        self._count = total
+
+        # Earlier extremes are kept when equal, so the times are of the first occurrence
+        arg_min, arg_max = chunk.argmin(axis=1), chunk.argmax(axis=1)
+        rows = np.arange(len(self._channels))
+        chunk_min, chunk_max = chunk[rows, arg_min], chunk[rows, arg_max]
+        lower, higher = chunk_min < self._min, chunk_max > self._max
+        self._min[lower], self._time_of_min[lower] = chunk_min[lower], time[arg_min[lower]]
+        self._max[higher], self._time_of_max[higher] = chunk_max[higher], time[arg_max[higher]]
+
+    def result(self):
+        """
+        :return: Dictionary by channel name of dictionaries of statistics by name (see :data:`STATISTICS`). The
+            statistics of channels without values are NaN
+        """
+        if self._count == 0:
+            return {name: dict.fromkeys(STATISTICS, np.nan) for name in self._channels}
+        std = np.sqrt(self._sum_sq / self._count)
+        columns = zip(self._min, self._max, self._mean, std, self._time_of_min, self._time_of_max)
+        return {name: dict(zip(STATISTICS, (float(v) for v in values)))
+                for name, values in zip(self._channels, columns)}
+
+
+def output_statistics(file_path, channels=None, start_time=None, end_time=None, chunk_size=65536):
+    """
+    Statistics of the channels of a FAST binary output file, reading at most `chunk_size` time steps at a time
+    :param file_path: Path of the `.outb` file, or of the output compacted after the run
+    :param channels: Names of the channels. Defaults to all channels of the output
+    :param start_time: Earliest time to include, e.g. to leave out the start-up transient. Defaults to the start of the
+        output
+    :param end_time: Latest time to include. Defaults to the end of the output
+    :param chunk_size: Maximum number of time steps read at a time
+    :return: Dictionary by channel name of dictionaries of statistics by name (see :data:`STATISTICS`)
+    """
+    with open_output(file_path) as output:
+        channels = output.channels if channels is None else list(channels)
+        statistics = StreamingStatistics(channels)
+        for chunk in output.chunks(['Time'] + channels, start_time, end_time, chunk_size):
+            statistics.update(chunk['Time'], chunk)
+    return statistics.result()
+
+
+def run_set_statistics(tasks, channels=None, start_time=None, end_time=None, processes=None, table_file=None):
+    """
+    Statistics of the channels of all the completed simulations of a set of spawned tasks, computed in a pool of
+    processes. The result is a table with a row for each channel of each simulation, with columns of the output file,
+    the spawn metadata of the simulation, the channel and its statistics
+    :param tasks: Tasks, as generated from a specification
+    :type tasks: list of :class:`luigi.Task`
+    :param channels: Names of the channels. Defaults to all channels of each output
+    :param start_time: Earliest time to include. Defaults to the start of each output
+    :param end_time: Latest time to include. Defaults to the end of each output
+    :param processes: Number of processes. Defaults to the number of CPUs
+    :param table_file: Path of a `.npz` or `.csv` file to write the table to (see :func:`write_table`), if given
+    :return: Dictionary of equal-length 1-d arrays by column name
+    """
+    outputs = completed_outputs(tasks)
+    results = map_outputs(output_statistics,
+                          [(file_path, channels, start_time, end_time) for file_path, _ in outputs], processes)
+    rows = [(file_path, metadata, channel, statistics)
+            for (file_path, metadata), result in zip(outputs, results)
+            for channel, statistics in result.items()]
+    columns = {'output_file': column_array([row[0] for row in rows])}
+    columns.update(metadata_columns([row[1] for row in rows], reserved=('output_file', 'channel') + STATISTICS))
+    columns['channel'] = column_array([row[2] for row in rows])
+    for name in STATISTICS:
+        columns[name] = np.array([row[3][name] for row in rows], dtype=np.float64)
+    if table_file is not None:
+        write_table(columns, table_file)
+    return columns
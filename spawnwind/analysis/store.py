@@ -0,0 +1,206 @@
+# spawnwind
+# Copyright (C) 2018-2019, Simmovation Ltd.
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301  USA
+"""
+Columnar store of simulation outputs, partitioned by design load case (DLC). Each partition is a directory with a
+`runs` table of the spawn metadata of its simulations and a `channels` directory with one `.npy` file per channel,
+in which the time series of all the simulations of the partition are concatenated. Files are memory-mapped when read,
+so queries read only the channels and simulations they select
+"""
+import os
+from os import path
+
+import numpy as np
+
+from ..nrel.output import open_output
+from .run_set import completed_outputs, map_outputs
+from .table import column_array, metadata_columns
+
+_RUNS_DIR = 'runs'
+_CHANNELS_DIR = 'channels'
+_TIME = 'Time'
+
+
+def dlc_partition(relative_path, _metadata):
+    """
+    Default partition of a simulation: the first directory of its output path, relative to the root output directory,
+    whose name starts with `dlc` (as in the example IEC specification), otherwise the first directory
+    :param relative_path: Path of the output file relative to the root output directory
+    :param _metadata: Spawn metadata of the simulation
+    :return: Name of the partition
+    """
+    directories = path.normpath(path.dirname(relative_path)).split(os.sep)
+    for directory in directories:
+        if directory.lower().startswith('dlc'):
+            return directory
+    return directories[0] if directories[0] not in ('', '.') else 'default'
+
+
+def collect_outputs(tasks, store_dir, runs_dir, channels=None, start_time=None, end_time=None, partition=dlc_partition,
+                    processes=None):
+    """
+    Convert the completed outputs of a set of spawned simulations into a :class:`ColumnarStore`. Existing partitions
+    of the store with the same names are replaced. Channels are stored as 32-bit floats and time as 64-bit floats;
+    channels that a simulation does not output are NaN. Simulations are written into their rows of the channel files
+    in a pool of processes, each reading one output at a time
+    :param tasks: Tasks, as generated from a specification
+    :param store_dir: Root directory of the store
+    :param runs_dir: Root output directory of the simulations, from which partitions are named
+    :param channels: Names of the channels to store. Defaults to all channels of the outputs
+    :param start_time: Earliest time of each output to store
+    :param end_time: Latest time of each output to store
+    :param partition: Function of the output path relative to `runs_dir` and the metadata of a simulation, returning the
+        name of its partition. Defaults to :func:`dlc_partition`
+    :param processes: Number of processes. Defaults to the number of CPUs
+    :return: The store
+    """
+    # pylint: disable=too-many-arguments,too-many-locals
+    partitions = {}
+    for file_path, metadata in completed_outputs(tasks):
+        name = partition(path.relpath(file_path, runs_dir), metadata)
+        partitions.setdefault(name, []).append((file_path, metadata))
+    arguments = []
+    for name, outputs in partitions.items():
+        partition_dir = path.join(store_dir, name)
+        row_counts, channel_names = [], []
+        for file_path, _ in outputs:
+            with open_output(file_path) as output:
+                row_counts.append(len(output.time(start_time, end_time)))
+                channel_names.extend(c for c in (channels or output.channels) if c not in channel_names)
+        row_starts = np.concatenate(([0], np.cumsum(row_counts)[:-1])).astype(np.int64)
+        _write_runs(partition_dir, outputs, row_starts, row_counts)
+        _create_channels(partition_dir, channel_names, int(sum(row_counts)))
+        arguments.extend((file_path, partition_dir, channel_names, int(start), start_time, end_time)
+                         for (file_path, _), start in zip(outputs, row_starts))
+    map_outputs(_write_output, arguments, processes)
+    return ColumnarStore(store_dir)
+
+
+def _write_runs(partition_dir, outputs, row_starts, row_counts):
+    runs_dir = path.join(partition_dir, _RUNS_DIR)
+    _clear_dir(runs_dir)
+    columns = metadata_columns([metadata for _, metadata in outputs],
+                               reserved=('output_file', 'row_start', 'row_count'))
+    columns['output_file'] = column_array([file_path for file_path, _ in outputs])
+    columns['row_start'] = np.asarray(row_starts, dtype=np.int64)
+    columns['row_count'] = np.asarray(row_counts, dtype=np.int64)
+    for name, values in columns.items():
+        np.save(path.join(runs_dir, name + '.npy'), values)
+
+
+def _create_channels(partition_dir, channel_names, rows):
+    channels_dir = path.join(partition_dir, _CHANNELS_DIR)
+    _clear_dir(channels_dir)
+    for name in [_TIME] + channel_names:
+        dtype = np.float64 if name == _TIME else np.float32
+        channel = np.lib.format.open_memmap(path.join(channels_dir, name + '.npy'), mode='w+', dtype=dtype,
+                                            shape=(rows,))
+        channel[:] = np.nan
+        del channel
+
+
+def _clear_dir(dir_path):
+    os.makedirs(dir_path, exist_ok=True)
+    for name in os.listdir(dir_path):
+        if name.endswith('.npy'):
+            os.remove(path.join(dir_path, name))
+
+
+def _write_output(file_path, partition_dir, channel_names, row_start, start_time, end_time):
+    channels_dir = path.join(partition_dir, _CHANNELS_DIR)
+    with open_output(file_path) as output:
+        names = [_TIME] + [name for name in channel_names if name in output.units]
+        stored = {name: np.load(path.join(channels_dir, name + '.npy'), mmap_mode='r+') for name in names}
+        row = row_start
+        for chunk in output.chunks(names, start_time, end_time):
+            count = len(chunk[_TIME])
+            for name in names:
+                stored[name][row:row + count] = chunk[name]
+            row += count
+        for channel in stored.values():
+            channel.flush()
+
+
+class ColumnarStore:
+    """
+    Columnar store of simulation outputs written by :func:`collect_outputs`
+    """
+
+    def __init__(self, store_dir):
+        """Initialises :class:`ColumnarStore`
+
+        :param store_dir: Root directory of the store
+        :type store_dir: path-like
+        """
+        self._store_dir = store_dir
+
+    @property
+    def partitions(self):
+        """
+        :return: Names of the partitions
+        """
+        return sorted(name for name in os.listdir(self._store_dir)
+                      if path.isdir(path.join(self._store_dir, name, _RUNS_DIR)))
+
+    def channels(self, partition):
+        """
+        :param partition: Name of the partition
+        :return: Names of the channels stored in the partition, excluding time
+        """
+        names = (path.splitext(name)[0] for name in os.listdir(path.join(self._store_dir, partition, _CHANNELS_DIR)))
+        return sorted(name for name in names if name != _TIME)
+
+    def runs(self, partition, columns=None):
+        """
+        Table of the simulations of a partition: their metadata, `output_file`, and the `row_start` and `row_count` of
+        their rows in the channel files
+        :param partition: Name of the partition
+        :param columns: Names of the columns to read. Defaults to all columns
+        :return: Dictionary of 1-d arrays by column name
+        """
+        runs_dir = path.join(self._store_dir, partition, _RUNS_DIR)
+        if columns is None:
+            columns = sorted(path.splitext(name)[0] for name in os.listdir(runs_dir))
+        return {name: np.load(path.join(runs_dir, name + '.npy')) for name in columns}
+
+    def select(self, partition, channels, **conditions):
+        """
+        Time series of the simulations of a partition whose metadata match conditions. Of the channel files, only the
+        requested channels are read, and only the rows of the matching simulations. For example,
+        `store.select('dlc1.2', ['TwrBsMyt'], initial_yaw=10.0)`
+        :param partition: Name of the partition
+        :param channels: Names of the channels to read, which may include `'Time'`
+        :param conditions: Values of metadata that the simulations must have. Numeric values are compared with a
+            tolerance
+        :return: List of tuples of the metadata (including `output_file`) of each matching simulation and a dictionary
+            of 1-d arrays by channel name
+        """
+        runs = self.runs(partition)
+        matches = np.ones(len(runs['output_file']), dtype=bool)
+        for name, value in conditions.items():
+            column = runs[name]
+            if np.issubdtype(column.dtype, np.number):
+                matches &= np.isclose(column, value)
+            else:
+                matches &= column == str(value)
+        channels_dir = path.join(self._store_dir, partition, _CHANNELS_DIR)
+        stored = {name: np.load(path.join(channels_dir, name + '.npy'), mmap_mode='r') for name in channels}
+        selected = []
+        for i in np.flatnonzero(matches):
+            rows = slice(int(runs['row_start'][i]), int(runs['row_start'][i] + runs['row_count'][i]))
+            metadata = {name: runs[name][i].item() for name in runs if name not in ('row_start', 'row_count')}
+            selected.append((metadata, {name: stored[name][rows] for name in channels}))
+        return selected
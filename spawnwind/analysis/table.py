@@ -0,0 +1,85 @@
+# spawnwind
+# Copyright (C) 2018-2019, Simmovation Ltd.
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301  USA
+"""
+Result tables, held as dictionaries of equal-length NumPy arrays by column name and stored column by column
+"""
+import csv
+from os import path
+import numbers
+
+import numpy as np
+
+
+def column_array(values):
+    """
+    Array of the values of a column. Columns of numbers (and missing values, given as `None`) are numeric, with missing
+    values as NaN; any other column is of strings, with missing values as empty strings
+    :param values: List of values
+    :return: 1-d array
+    """
+    present = [v for v in values if v is not None]
+    if all(isinstance(v, numbers.Number) for v in present):
+        if len(present) == len(values) and all(isinstance(v, numbers.Integral) for v in present):
+            return np.array(values, dtype=np.int64)
+        return np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+    return np.array(['' if v is None else str(v) for v in values], dtype=str)
+
+
+def metadata_columns(metadata, reserved=()):
+    """
+    Columns of the metadata of a list of simulations, with a column for each key that appears in any simulation
+    :param metadata: List of dictionaries of metadata
+    :param reserved: Names of the other columns of the table, which metadata keys must not take
+    :return: Dictionary of arrays by key, in key order
+    """
+    keys = sorted({key for item in metadata for key in item})
+    clashes = [key for key in keys if key in reserved]
+    if clashes:
+        raise ValueError('metadata {} clash with result columns of the same name'.format(
+            ', '.join('\'{}\''.format(key) for key in clashes)))
+    return {key: column_array([item.get(key) for item in metadata]) for key in keys}
+
+
+def write_table(columns, file_path):
+    """
+    Write a table to a file. `.npz` files store each column as an array, so that single columns are read without reading
+    the whole table; `.csv` files are text, with a header row of column names
+    :param columns: Dictionary of equal-length 1-d arrays by column name
+    :param file_path: Path of the `.npz` or `.csv` file
+    """
+    extension = path.splitext(file_path)[1].lower()
+    if extension == '.npz':
+        np.savez(file_path, **columns)
+    elif extension == '.csv':
+        names = list(columns)
+        with open(file_path, 'w', newline='') as fp:
+            writer = csv.writer(fp)
+            writer.writerow(names)
+            writer.writerows(zip(*(columns[name].tolist() for name in names)))
+    else:
+        raise ValueError('Unsupported table format \'{}\'. Use .npz or .csv'.format(extension))
+
+
+def read_table(file_path, columns=None):
+    """
+    Read a table written by :func:`write_table` in `.npz` format
+    :param file_path: Path of the `.npz` file
+    :param columns: Names of the columns to read. Defaults to all columns
+    :return: Dictionary of 1-d arrays by column name
+    """
+    with np.load(file_path) as table:
+        return {name: table[name] for name in (columns or table.files)}
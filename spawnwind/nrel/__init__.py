@@ -19,6 +19,8 @@
 from .fast_spawner import FastSimulationSpawner
 from .turbsim_spawner import TurbsimSpawner
 from .tasks import WindGenerationTask, FastSimulationTask
+from .wind_registry import WindFileRegistry
+from .input_files import ModuleStore, BackgroundFileWriter
 from .simulation_input import NRELSimulationInput, TurbsimInput
 from .fast_input import Fast7Input, Fast8Input
 from .wind_input import WindInput, AerodynInput
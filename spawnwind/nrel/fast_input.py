@@ -39,6 +39,23 @@ class FastInput(NRELSimulationInput):
     """
     Base class manager for main FAST input file
     """
+    # Whether the output list of all modules is in the main input file, rather than in each module's input file
+    output_list_in_main_file = False
+
+    @property
+    def output_time_step(self):
+        """
+        :return: Time step in seconds between output samples
+        """
+        raise NotImplementedError()
+
+    @output_time_step.setter
+    def output_time_step(self, time_step):
+        """
+        :param time_step: Time step in seconds between output samples
+        """
+        raise NotImplementedError()
+
     def get_wind_input(self, wind_gen_spawner):
         """
         :param wind_gen_spawner: Spawner of wind generation tasks
@@ -72,6 +89,22 @@ class Fast7Input(FastInput):
     """
     Manager for main FAST input file v7
     """
+    output_list_in_main_file = True
+
+    @property
+    def output_time_step(self):
+        return float(self['DT']) * int(self['DecFact'])
+
+    @output_time_step.setter
+    def output_time_step(self, time_step):
+        # Outputs are written every DecFact integration time steps
+        time_step, integration_step = float(time_step), float(self['DT'])
+        factor = int(round(time_step / integration_step))
+        if factor < 1 or abs(factor * integration_step - time_step) > 1e-6 * time_step:
+            raise ValueError('output time step {} is not a multiple of the time step {}'.format(
+                time_step, integration_step))
+        self['DecFact'] = factor
+
     def _lines_with_paths(self):
         def is_file_path(key):
             return key in ['TwrFile', 'ADFile', 'ADAMSFile'] or 'BldFile' in key
@@ -94,6 +127,15 @@ class Fast8Input(FastInput):
     """
     Manager for main FAST input file v8
     """
+    @property
+    def output_time_step(self):
+        time_step = self['DT_Out']
+        return float(self['DT']) if time_step.lower() == 'default' else float(time_step)
+
+    @output_time_step.setter
+    def output_time_step(self, time_step):
+        self['DT_Out'] = time_step
+
     def _lines_with_paths(self):
         def is_file_path(key):
             return 'File' in key and key != 'OutFileFmt'
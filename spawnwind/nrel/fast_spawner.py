@@ -22,13 +22,21 @@ import copy
 
 from ..spawners import AeroelasticSimulationSpawner
 from .tasks import FastSimulationTask
+from .input_files import InputFileSnapshot
+from ..profiling import profiler, timed
 
 
-# pylint: disable=too-many-public-methods
+# pylint: disable=too-many-public-methods,too-many-instance-attributes
 class FastSimulationSpawner(AeroelasticSimulationSpawner):
     """Spawns FAST simulation tasks with wind generation dependency if necessary"""
-
-    def __init__(self, fast_input, wind_spawner, prereq_outdir):
+    # Output formats by value of OutFileFmt
+    _output_formats = (None, 'text', 'binary', 'both')
+    # Relative cost of a time step with full-field wind, which is interpolated from a grid at each step
+    _full_field_wind_cost = 1.2
+
+    # pylint: disable=too-many-arguments
+    def __init__(self, fast_input, wind_spawner, prereq_outdir, deferred_writes=False, module_store=None,
+                 file_writer=None, compact_output=False, compact_channels=None):
         """Initialises :class:`FastSimulationSpawner`
 
         :param fast_input: The FAST input
@@ -37,21 +45,54 @@ class FastSimulationSpawner(AeroelasticSimulationSpawner):
         :type wind_spawner: :class:`TurbsimSpawner`
         :param prereq_outdir: The output directory for prerequisites
         :type prereq_outdir: path-like
+        :param deferred_writes: If `True`, the input files of each simulation are recorded when it is spawned but
+            only written when it is run
+        :type deferred_writes: bool
+        :param module_store: Store into which module input files are written, so that simulations with identical
+            modules share the files. If `None`, module files are written to the directory of each simulation
+        :type module_store: :class:`ModuleStore`
+        :param file_writer: Writer of input files in the background. If `None`, files are written as each simulation
+            is spawned
+        :type file_writer: :class:`BackgroundFileWriter`
+        :param compact_output: If `True`, the output of each simulation is compacted once it has run, which requires
+            binary FAST output
+        :type compact_output: bool
+        :param compact_channels: Names of the channels kept in compacted outputs, which must each be in the output
+            list of a module. If empty or `None`, all channels are kept
+        :type compact_channels: list
         """
         self._input = fast_input
         self._wind_spawner = wind_spawner
         self._prereq_outdir = prereq_outdir
+        self._deferred_writes = deferred_writes
+        self._module_store = module_store
+        self._file_writer = file_writer
+        self._compact_output = compact_output
+        self._compact_channels = list(compact_channels or [])
         # non-arguments:
         self._wind_input = fast_input.get_wind_input(wind_spawner)
         self._aero_input = fast_input.get_aero_input(self._wind_input)
         self._elastodyn_input = self._input.get_elastodyn_input()
         self._blade_range = list(range(1, self.get_number_of_blades()+1))
         self._servodyn_input = self._input.get_servodyn_input(self._blade_range)
+        # channels in the output list of each module of the base input, which may be selected by `output_channels`
+        self._available_output_channels = [
+            [name.lower() for name in module.output_channels] for module in self._output_list_inputs()
+        ]
         # intermediate parameters
         self._pitch_manoeuvre_rate = None
         self._yaw_manoeuvre_rate = None
 
+    def __setattr__(self, name, value):
+        # Properties set by the specification are each timed as a phase of spawning
+        if name[0] == '_' or not profiler.enabled:
+            super().__setattr__(name, value)
+        else:
+            with profiler.time('set_' + name):
+                super().__setattr__(name, value)
+
     # pylint: disable=arguments-differ
+    @timed('spawn')
     def spawn(self, path_, metadata):
         """Spawn a simulation task
 
@@ -65,36 +106,88 @@ class FastSimulationSpawner(AeroelasticSimulationSpawner):
         """
         if not path.isabs(path_):
             raise ValueError('Must provide an absolute path')
-        if not path.isdir(path_):
+        extension = self._output_extension()
+        if self._compact_output:
+            self._check_compaction(extension)
+        profiler.count('leaves')
+        input_files = InputFileSnapshot() if self._deferred_writes else None
+        if input_files is None and self._file_writer is None and not path.isdir(path_):
             os.makedirs(path_)
         wind_tasks = self._wind_input.get_wind_gen_tasks(self._prereq_outdir, metadata)
-        self._write_linked_module_input(self._wind_input, path_)
-        self._write_linked_module_input(self._aero_input, path_)
-        self._write_linked_module_input(self._elastodyn_input, path_)
-        self._write_linked_module_input(self._servodyn_input, path_)
-        sim_input_file = path.join(path_, 'fast.input')
-        self._input.to_file(sim_input_file)
+        self._write_linked_module_input(self._wind_input, path_, input_files)
+        self._write_linked_module_input(self._aero_input, path_, input_files)
+        self._write_linked_module_input(self._elastodyn_input, path_, input_files)
+        self._write_linked_module_input(self._servodyn_input, path_, input_files)
+        sim_input_file = self._write_input(self._input, path.join(path_, 'fast.input'), input_files)
         sim_task = FastSimulationTask(
             'run ' + path_,
             _input_file_path=sim_input_file,
             _dependencies=wind_tasks,
-            _metadata=metadata
+            _metadata=metadata,
+            _input_files=input_files,
+            _extension=extension,
+            _cost=self.estimated_cost(),
+            _compact_output=self._compact_output,
+            _compact_channels=self._compact_channels
         )
         return sim_task
 
-    def _write_linked_module_input(self, module, path_):
-        if hasattr(module, 'key'):
-            self._input[module.key] = module.to_file(path.join(path_, module.key + '.input'))
+    def estimated_cost(self):
+        """Estimate the relative cost of running the simulation, which is its number of time steps weighted by the
+        cost of the wind, which is higher for full-field wind files. Costs are used as the priorities of tasks, so that
+        the longest are started first
+
+        :returns: The estimated cost
+        :rtype: int
+        """
+        time_steps = float(self._input['TMax']) / float(self._input['DT'])
+        weight = self._full_field_wind_cost if self._wind_input.full_field_wind else 1.0
+        return int(round(time_steps * weight))
+
+    def _output_extension(self):
+        # Inputs without OutFileFmt, or with formats other than text only, are taken to write binary output
+        try:
+            text_only = int(self._input['OutFileFmt']) == 1
+        except (KeyError, ValueError):
+            text_only = False
+        return '.out' if text_only else '.outb'
+
+    def _check_compaction(self, extension):
+        if extension != '.outb':
+            raise ValueError('Outputs can only be compacted when FAST writes binary output, not text output')
+        # Channel names are matched in any case, as they are when the output is compacted
+        output_channels = {name.lower() for name in self.get_output_channels()}
+        missing = [name for name in self._compact_channels if name.lower() not in output_channels]
+        if missing:
+            raise ValueError('compacted channels {} are not in the output list of any module'.format(
+                ', '.join('\'{}\''.format(name) for name in missing)))
+
+    def _write_linked_module_input(self, module, path_, input_files):
+        if not hasattr(module, 'key'):
+            return
+        if self._module_store is not None:
+            self._input[module.key] = self._module_store.add(module.key, module, input_files)
+        else:
+            self._input[module.key] = self._write_input(module, path.join(path_, module.key + '.input'), input_files)
+
+    def _write_input(self, simulation_input, file_path, input_files):
+        if input_files is not None:
+            return input_files.add(file_path, simulation_input)
+        if self._file_writer is not None:
+            return self._file_writer.write(file_path, simulation_input.render())
+        return simulation_input.to_file(file_path, atomic=True)
 
+    @timed('branch')
     def branch(self):
         """Create a copy of this spawner
 
         :returns: A copy of this spawner with all values equal
         :rtype: :class:`FastSimulationSpawner`
         """
+        profiler.count('branches')
+        # input lines are copy-on-write, so this only copies lines that have been edited
         branched_spawner = copy.deepcopy(self)
         # pylint: disable=protected-access
-        branched_spawner._input = copy.deepcopy(self._input)
         branched_spawner._wind_spawner = self._wind_spawner.branch()
         branched_spawner._wind_input.wind_gen_spawner = branched_spawner._wind_spawner
         return branched_spawner
@@ -122,6 +215,49 @@ class FastSimulationSpawner(AeroelasticSimulationSpawner):
         self._wind_spawner.analysis_time = time
         self._wind_spawner.duration = total_time
 
+    # pylint: disable=missing-docstring
+    def get_output_time_step(self):
+        return self._input.output_time_step
+
+    # pylint: disable=missing-docstring
+    def set_output_time_step(self, time_step):
+        self._input.output_time_step = time_step
+
+    # pylint: disable=missing-docstring
+    def get_output_format(self):
+        code = int(self._input['OutFileFmt'])
+        if not 0 < code < len(self._output_formats):
+            raise ValueError('OutFileFmt {} is not a known output format'.format(code))
+        return self._output_formats[code]
+
+    # pylint: disable=missing-docstring
+    def set_output_format(self, output_format):
+        self._input['OutFileFmt'] = self._output_formats.index(output_format)
+
+    # pylint: disable=missing-docstring
+    def get_output_channels(self):
+        return [name for module in self._output_list_inputs() for name in module.output_channels]
+
+    # pylint: disable=missing-docstring
+    def set_output_channels(self, channels):
+        if isinstance(channels, str):
+            channels = [name.strip() for name in channels.split(',') if name.strip()]
+        modules = self._output_list_inputs()
+        if self._input.output_list_in_main_file:
+            modules[0].output_channels = channels
+            return
+        # Each channel is written by the module whose output list has it in the base input
+        module_channels = [[] for _ in modules]
+        for name in channels:
+            for selected, available in zip(module_channels, self._available_output_channels):
+                if name.lower() in available:
+                    selected.append(name)
+                    break
+            else:
+                raise ValueError('output channel \'{}\' is not in the output list of any module'.format(name))
+        for module, selected in zip(modules, module_channels):
+            module.output_channels = selected
+
     # Initial Conditions
     # pylint: disable=missing-docstring
     def get_initial_rotor_speed(self):
@@ -369,6 +505,12 @@ class FastSimulationSpawner(AeroelasticSimulationSpawner):
         return int(self._elastodyn_input['NumBl'])
 
     # non-properties
+    def _output_list_inputs(self):
+        if self._input.output_list_in_main_file:
+            return [self._input]
+        modules = [self._elastodyn_input, self._servodyn_input, self._aero_input, self._wind_input]
+        return [module for module in modules if module is not None and module.has_output_list()]
+
     def _fix_pitch(self, pitch_angle=None):
         if pitch_angle is not None:
             self.initial_pitch = pitch_angle
@@ -0,0 +1,110 @@
+# spawnwind
+# Copyright (C) 2018-2019, Simmovation Ltd.
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301  USA
+"""
+Process-wide cache of parsed input files, so that loading the same file again skips reading and tokenising it
+"""
+import os
+from os import path
+import copy
+import threading
+from collections import OrderedDict
+
+
+def cache_key(file_path, input_cls):
+    """
+    Key identifying a particular version of a file as loaded by a particular input class
+    :param file_path: Path of the input file
+    :param input_cls: The class of input that loads the file, since it may edit the lines (e.g. to absolutise paths)
+    :return: Tuple of (absolute path, modification time, size, class)
+    """
+    stat = os.stat(file_path)
+    return path.abspath(file_path), stat.st_mtime_ns, stat.st_size, input_cls
+
+
+class ParsedInputCache:
+    """
+    Least-recently-used cache of :class:`NrelInputLines` by :func:`cache_key`. Lines are stored as snapshots and
+    returned as copy-on-write copies, so callers can edit the lines they get without affecting the cache
+    """
+
+    def __init__(self, max_entries=128):
+        """Initialises :class:`ParsedInputCache`
+
+        :param max_entries: Maximum number of files to hold before evicting the least recently used
+        :type max_entries: int
+        """
+        self._max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def max_entries(self):
+        """
+        :return: Maximum number of files held before evicting the least recently used
+        """
+        return self._max_entries
+
+    @max_entries.setter
+    def max_entries(self, max_entries):
+        with self._lock:
+            self._max_entries = max_entries
+            self._evict()
+
+    def get(self, key):
+        """
+        :param key: Key as created by :func:`cache_key`
+        :return: Copy of the cached :class:`NrelInputLines`, or `None` if not cached
+        """
+        with self._lock:
+            lines = self._entries.get(key)
+            if lines is None:
+                return None
+            self._entries.move_to_end(key)
+        return copy.copy(lines)
+
+    def put(self, key, lines):
+        """
+        :param key: Key as created by :func:`cache_key`
+        :param lines: :class:`NrelInputLines` of the file, as loaded by the input class
+        """
+        with self._lock:
+            self._entries[key] = lines.snapshot()
+            self._entries.move_to_end(key)
+            self._evict()
+
+    def invalidate(self, file_path=None):
+        """
+        Remove cached files
+        :param file_path: Path of the file to remove from the cache. All files are removed if `None`
+        """
+        with self._lock:
+            if file_path is None:
+                self._entries.clear()
+                return
+            file_path = path.abspath(file_path)
+            for key in [k for k in self._entries if k[0] == file_path]:
+                del self._entries[key]
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _evict(self):
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+
+
+parsed_input_cache = ParsedInputCache()
@@ -0,0 +1,335 @@
+# spawnwind
+# Copyright (C) 2018-2019, Simmovation Ltd.
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301  USA
+"""
+Writing of simulation input files, either deferred until the simulation runs, in the background or shared between
+simulations
+"""
+import os
+from os import path
+import hashlib
+import threading
+import queue
+
+from ..profiling import profiler
+
+# All background writers in this process, which are flushed by :func:`flush_background_writes`
+_BACKGROUND_WRITERS = []
+
+
+def write_file(file_path, contents, atomic=False):
+    """
+    Write a string to a file in a single write
+    :param file_path: The path of the file to write
+    :param contents: The contents of the file
+    :param atomic: If `True`, write to a temporary file that is then renamed, so that the file is either written
+        whole or not at all, even if writing is interrupted or done by several processes at once
+    :return: The path of the file
+    """
+    profiler.count('files_written')
+    if profiler.enabled:
+        profiler.count('bytes_written', len(contents.encode('utf8')))
+    with profiler.time('write_file'):
+        if not atomic:
+            with open(file_path, 'w') as fp:
+                fp.write(contents)
+        else:
+            _write_atomic(file_path, contents)
+    return file_path
+
+
+def _write_atomic(file_path, contents):
+    temp_path = '{}.{}.{}.tmp'.format(file_path, os.getpid(), threading.get_ident())
+    try:
+        with open(temp_path, 'w') as fp:
+            fp.write(contents)
+        os.replace(temp_path, file_path)
+    except BaseException:
+        if path.isfile(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def _write_shared_file(file_path, contents):
+    # Shared files may be written by several workers at once
+    if path.isfile(file_path):
+        return
+    os.makedirs(path.dirname(file_path), exist_ok=True)
+    write_file(file_path, contents, atomic=True)
+
+
+class InputFileSnapshot:
+    """
+    Frozen contents of the input files of a simulation, recorded when the simulation is spawned and written when it is
+    run. Recording a file only copies the lines that have been edited, so spawning does no file system access
+    """
+
+    def __init__(self):
+        """Initialises :class:`InputFileSnapshot`
+        """
+        self._files = []
+
+    def add(self, file_path, simulation_input, shared=False):
+        """
+        Record the current contents of an input
+        :param file_path: The path of the file to write
+        :param simulation_input: The input
+        :type simulation_input: :class:`NRELSimulationInput`
+        :param shared: `True` if the file is shared with other simulations (see :class:`ModuleStore`), in which case
+            it is only written if it does not already exist
+        :return: The path of the file
+        """
+        self._files.append((file_path, simulation_input.frozen_lines(), shared))
+        return file_path
+
+    @property
+    def file_paths(self):
+        """
+        :return: The paths of the files, in the order in which they were added
+        """
+        return [file_path for file_path, _, _ in self._files]
+
+    def write(self):
+        """
+        Write the files, creating their directories if necessary
+        """
+        for file_path, lines, shared in self._files:
+            contents = lines if isinstance(lines, str) else lines.render()
+            if shared:
+                _write_shared_file(file_path, contents)
+            else:
+                os.makedirs(path.dirname(file_path), exist_ok=True)
+                write_file(file_path, contents, atomic=True)
+
+    def __getstate__(self):
+        # Copies of lines share all the lines of the file, so only the rendered contents are sent to other processes
+        return [(file_path, lines if isinstance(lines, str) else lines.render(), shared)
+                for file_path, lines, shared in self._files]
+
+    def __setstate__(self, state):
+        self._files = state
+
+    def __str__(self):
+        return ','.join(self.file_paths)
+
+
+class ModuleStore:
+    """
+    Content-addressed store of module input files. Each distinct module file is written once, named by the hash of its
+    contents, and shared by all simulations that use it. The store is shared by all copies of a spawner
+    """
+
+    def __init__(self, root_dir):
+        """Initialises :class:`ModuleStore`
+
+        :param root_dir: Directory in which module files are stored
+        :type root_dir: path-like
+        """
+        self._root_dir = root_dir
+        self._stored_files = set()
+        self._lock = threading.Lock()
+
+    @property
+    def root_dir(self):
+        """
+        :return: Directory in which module files are stored
+        """
+        return self._root_dir
+
+    def add(self, name, simulation_input, input_files=None):
+        """
+        Add the current contents of a module input to the store
+        :param name: Name of the module, which is the folder of the store in which the file is put
+        :param simulation_input: The module input
+        :type simulation_input: :class:`NRELSimulationInput`
+        :param input_files: Snapshot in which to record the file to be written later. If `None`, the file is written
+            now if it does not already exist
+        :type input_files: :class:`InputFileSnapshot`
+        :return: Path of the file in the store
+        """
+        contents = simulation_input.render()
+        file_hash = hashlib.md5(contents.encode('utf8')).hexdigest()
+        file_path = path.join(self._root_dir, name, file_hash + '.input')
+        if input_files is not None:
+            return input_files.add(file_path, simulation_input, shared=True)
+        with self._lock:
+            if file_path not in self._stored_files:
+                _write_shared_file(file_path, contents)
+                self._stored_files.add(file_path)
+        return file_path
+
+    def __getstate__(self):
+        return self._root_dir
+
+    def __setstate__(self, state):
+        self.__init__(state)
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+
+class BackgroundFileWriter:
+    """
+    Writes files on a pool of threads, so that spawning does not wait for the file system. The number of files waiting
+    to be written is bounded, so spawning is held back if it gets too far ahead. Files must be flushed, with
+    :meth:`flush` or :func:`flush_background_writes`, before they are used. The threads are started by the first write
+    and stopped by :meth:`close`. The writer is shared by all copies of a spawner. Files are only written by the threads
+    of the process that queued them, so writers must be closed before tasks are run in other processes
+    """
+
+    def __init__(self, threads=4, max_pending=1024):
+        """Initialises :class:`BackgroundFileWriter`
+
+        :param threads: Number of writing threads
+        :type threads: int
+        :param max_pending: Maximum number of files waiting to be written, beyond which :meth:`write` blocks
+        :type max_pending: int
+        """
+        self._threads = threads
+        self._max_pending = max_pending
+        self._reset()
+
+    def write(self, file_path, contents):
+        """
+        Queue a file to be written atomically, creating its directory if necessary
+        :param file_path: The path of the file to write
+        :param contents: The contents of the file
+        :return: The path of the file
+        """
+        if self._pid != os.getpid():
+            # A copy forked into another process writes on threads of its own
+            self._reset()
+        self._start()
+        self._queue.put((file_path, contents))
+        return file_path
+
+    def flush(self):
+        """
+        Wait for all queued files to be written
+        :raises: The first error raised while writing files. Errors are raised by every flush until they are cleared
+        with :meth:`clear_errors`
+        :raises RuntimeError: If files were queued by another process, whose threads this process cannot wait for
+        """
+        self._check_process()
+        self._queue.join()
+        if self._errors:
+            raise self._errors[0]
+
+    def clear_errors(self):
+        """
+        Clear the errors raised while writing files, once they have been handled
+        :return: The errors that were cleared
+        """
+        errors, self._errors = self._errors, []
+        return errors
+
+    def close(self):
+        """
+        Write all queued files, then stop the writing threads and remove this writer from those flushed by
+        :func:`flush_background_writes`. Writing again restarts the threads
+        :raises: The first error raised while writing files, as :meth:`flush` does
+        """
+        self._check_process()
+        with self._lock:
+            workers, self._workers = self._workers, []
+            for _ in workers:
+                self._queue.put(None)
+            for worker in workers:
+                worker.join()
+            if self in _BACKGROUND_WRITERS:
+                _BACKGROUND_WRITERS.remove(self)
+        self.flush()
+
+    def _reset(self):
+        self._queue = queue.Queue(maxsize=self._max_pending)
+        self._errors = []
+        self._workers = []
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+
+    def _check_process(self):
+        if self._pid == os.getpid():
+            return
+        # The threads, and possibly the lock, of the process that queued the files were not copied into this one
+        if self._queue.unfinished_tasks:
+            raise RuntimeError('{} files queued in process {} cannot be written by process {}. Background writers must '
+                               'be closed before tasks are run in other processes'.format(
+                                   self._queue.unfinished_tasks, self._pid, os.getpid()))
+        self._reset()
+
+    def _start(self):
+        with self._lock:
+            if not self._workers:
+                self._workers = [threading.Thread(target=self._drain, daemon=True) for _ in range(self._threads)]
+                for worker in self._workers:
+                    worker.start()
+                if self not in _BACKGROUND_WRITERS:
+                    _BACKGROUND_WRITERS.append(self)
+
+    def _drain(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                self._queue.task_done()
+                return
+            file_path, contents = item
+            try:
+                os.makedirs(path.dirname(file_path), exist_ok=True)
+                write_file(file_path, contents, atomic=True)
+            except Exception as error:  # pylint: disable=broad-except
+                self._errors.append(error)
+            finally:
+                self._queue.task_done()
+
+    def __getstate__(self):
+        # Other processes get their own queue, and threads once they write
+        return self._threads, self._max_pending
+
+    def __setstate__(self, state):
+        self._threads, self._max_pending = state
+        self._reset()
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+
+def flush_background_writes():
+    """
+    Wait for the files queued by all :class:`BackgroundFileWriter` in this process to be written
+    """
+    for writer in list(_BACKGROUND_WRITERS):
+        writer.flush()
+
+
+def close_background_writers():
+    """
+    Write the files queued by all :class:`BackgroundFileWriter` in this process and stop their threads
+    :raises: The first error raised while writing files
+    """
+    errors = []
+    for writer in list(_BACKGROUND_WRITERS):
+        try:
+            writer.close()
+        except Exception as error:  # pylint: disable=broad-except
+            errors.append(error)
+    if errors:
+        raise errors[0]
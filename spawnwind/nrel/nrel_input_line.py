@@ -18,6 +18,71 @@
 Handling of individual lines in NREL style input files
 """
 import re
+import copy
+import hashlib
+
+from .input_files import write_file
+
+
+# A line is a value, either quoted or up to the first whitespace, followed by the first contiguous key string
+_LINE_PATTERN = re.compile(r'(?:"(.*?)"|(\S+))[^a-zA-Z0-9_()]*([a-zA-Z0-9_()]+)?')
+_COMMENT_PREFIXES = ('- ', '--', '=')
+# Digests of lines are combined by addition, so that replacing one line updates the combined digest in O(1)
+_DIGEST_MODULUS = 2 ** 128
+
+
+def parse_lines(lines):
+    """
+    Tokenise all the lines of an input file in a single pass
+    :param lines: iterable of line strings, such as an open file
+    :return: list of :class:`NrelInputLine`
+    """
+    new_line = NrelInputLine.__new__
+    parsed_lines = []
+    for line_str in lines:
+        line = new_line(NrelInputLine)
+        _tokenise(line, line_str)
+        parsed_lines.append(line)
+    return parsed_lines
+
+
+def canonical_value(value):
+    """
+    Canonical form of a value, so that values that are read as equal by the NREL codes compare equal, e.g. `10`,
+    `10.0` and `1e1` or `True` and `true`
+    :param value: Value string
+    :return: Canonical value string
+    """
+    value = value.strip('"')
+    try:
+        # Integers, such as large random seeds, are kept exact rather than rounded to a float
+        return str(int(value))
+    except ValueError:
+        pass
+    try:
+        number = float(value)
+    except ValueError:
+        lowered = value.lower()
+        return lowered if lowered in ('true', 'false') else value
+    return str(int(number)) if number.is_integer() else repr(number)
+
+
+def _line_digest(position, line):
+    # The position is included so that values swapped between lines give a different combined digest
+    line_str = '{}\n{}\n{}'.format(position, line.key, canonical_value(line.value))
+    return int.from_bytes(hashlib.md5(line_str.encode('utf8')).digest(), 'big')
+
+
+def _tokenise(line, line_str, match=_LINE_PATTERN.match):
+    # pylint: disable=protected-access
+    line._line_str = line_str = line_str.lstrip()
+    if line_str and not line_str.startswith(_COMMENT_PREFIXES):
+        tokens = match(line_str)
+        line._value_begin, line._value_end = tokens.span(1) if tokens.start(1) >= 0 else tokens.span(2)
+        line._key_begin, line._key_end = tokens.span(3) if tokens.start(3) >= 0 else (None, None)
+    else:
+        line._value_begin, line._value_end = None, None
+        line._key_begin, line._key_end = None, None
 
 
 class NrelInputLine:
@@ -26,43 +91,11 @@ class NrelInputLine:
     contiguous alphanumeric string and the value precedes it. Any text after a hyphen (-) is a comment, unless it's the
     first non-whitespace character (negative values) or part of a quoted string
     """
+    # Input files have many lines, each of which may be copied when edited on a branch, so avoid a per-instance __dict__
+    __slots__ = ('_line_str', '_value_begin', '_value_end', '_key_begin', '_key_end')
 
     def __init__(self, line_str):
-        self._line_str = line_str.lstrip()
-        if self._line_str and \
-                not (self._line_str.startswith('- ') or self._line_str.startswith('--') or self._line_str[0] == '='):
-            self._value_begin, self._value_end = self._find_value_indices(self._line_str)
-            self._key_begin, self._key_end = self._find_key_indices(self._line_str, self._value_end)
-        else:
-            self._key_begin = None
-            self._value_begin = None
-
-    @staticmethod
-    def _find_value_indices(line_str):
-        """
-        Find the indices identifying where the value lies in the input line string
-        :param line_str: The input line string
-        :return: Interval [start, end) as tuple identifying start and end of value string
-        """
-        match = re.search('^".*?"', line_str)
-        if match:
-            return match.start() + 1, match.end() - 1
-        else:
-            match = re.search(r'[^\s]+', line_str)
-            return match.start(), match.end()
-
-    @staticmethod
-    def _find_key_indices(line_str, start):
-        """
-        Find the indices identifying where the key lies in the input line string
-        :param line_str: The input line string
-        :param start: Index of where to start looking for the key in the input line string
-        :return: Interval [start, end) as tuple identifying start and end of key string
-        """
-        match = re.search('[a-zA-Z0-9_()]+', line_str[start:])
-        if match is None:
-            return None, None
-        return start + match.start(), start + match.end()
+        _tokenise(self, line_str)
 
     @property
     def key(self):
@@ -98,8 +131,178 @@ class NrelInputLine:
     def __bool__(self):
         return self._key_begin is not None and self._value_begin is not None
 
+    def __copy__(self):
+        # pylint: disable=attribute-defined-outside-init
+        other = NrelInputLine.__new__(NrelInputLine)
+        other._line_str = self._line_str
+        other._value_begin, other._value_end = self._value_begin, self._value_end
+        other._key_begin, other._key_end = self._key_begin, self._key_end
+        return other
+
     def __str__(self):
         if self._line_str:
             return self._line_str
         else:
             return '\n'
+
+
+class NrelInputLines:
+    """
+    Copy-on-write container for the lines of an NREL-style input file. The lines as parsed, and the index of their keys,
+    are shared between all copies of the container and never modified. Each copy only holds the lines that have been
+    edited since the original was created, so copying costs O(number of edits) rather than O(number of lines).
+    Similarly, the digest of the shared lines is computed once and each copy only tracks the change due to its edits
+    """
+
+    def __init__(self, lines):
+        """Initialises :class:`NrelInputLines`
+
+        :param lines: The lines of the input file
+        :type lines: iterable of :class:`NrelInputLine`
+        """
+        self._lines = tuple(lines)
+        self._key_index = self._build_key_index(self._lines)
+        self._edited_lines = {}
+        self._rendered = None
+        # Single-element lists, so that these are shared by copies once any of them has computed them
+        self._base_rendered = [None]
+        self._base_digest = [None]
+        self._digest_delta = 0
+
+    def positions(self, key):
+        """
+        :param key: Key of the input line(s)
+        :return: Tuple of the positions of lines with the key, in order of occurrence
+        """
+        return self._key_index.get(key, ())
+
+    def keys(self):
+        """
+        :return: The distinct keys of the lines
+        """
+        return self._key_index.keys()
+
+    def set_value(self, position, value):
+        """
+        Set the value of a line. The line is copied so that copies of this container are unaffected
+        :param position: Position of the line
+        :param value: New value as a string
+        """
+        line = self[position]
+        if line.value == value:
+            return
+        new_line = copy.copy(line)
+        new_line.value = value
+        self._edited_lines[position] = new_line
+        self._rendered = None
+        self._digest_delta += _line_digest(position, new_line) - _line_digest(position, line)
+
+    def replace_lines(self, begin, end, lines):
+        """
+        Replace a range of lines with any number of lines, such as the entries of a list whose length changes. This
+        moves the lines that follow, so unlike :meth:`set_value` it merges the edits into new shared lines and rebuilds
+        the key index and digest, which is O(number of lines). Copies of this container are unaffected
+        :param begin: Position of the first line to replace
+        :param end: Position after the last line to replace
+        :param lines: New lines
+        :type lines: iterable of :class:`NrelInputLine`
+        """
+        all_lines = list(self)
+        all_lines[begin:end] = lines
+        self._lines = tuple(all_lines)
+        self._key_index = self._build_key_index(self._lines)
+        self._edited_lines = {}
+        self._rendered = None
+        self._base_rendered = [None]
+        self._base_digest = [None]
+        self._digest_delta = 0
+
+    def digest(self, ignored_keys=()):
+        """
+        Digest of the keys and values of all lines. Lines with equal keys and canonical values (see
+        :func:`canonical_value`) in the same positions have equal digests. The digest of the shared lines is computed
+        on first use, after which this is O(number of ignored lines)
+        :param ignored_keys: Keys of lines to leave out of the digest
+        :return: The digest as a hexadecimal string
+        """
+        base_digest = self._base_digest[0]
+        if base_digest is None:
+            base_digest = sum(_line_digest(i, line) for i, line in enumerate(self._lines)) % _DIGEST_MODULUS
+            self._base_digest[0] = base_digest
+        digest = base_digest + self._digest_delta
+        for key in ignored_keys:
+            for i in self.positions(key):
+                digest -= _line_digest(i, self[i])
+        return '{:032x}'.format(digest % _DIGEST_MODULUS)
+
+    def render(self):
+        """
+        :return: The contents of the file as a string, which is kept until the next edit. Copies without edits share
+            the contents of the shared lines, so they are only rendered once
+        """
+        if not self._edited_lines:
+            if self._base_rendered[0] is None:
+                self._base_rendered[0] = ''.join(str(line) for line in self._lines)
+            return self._base_rendered[0]
+        if self._rendered is None:
+            self._rendered = ''.join(str(line) for line in self)
+        return self._rendered
+
+    def to_file(self, file_path, atomic=False):
+        """
+        Write the lines to a file in a single write
+        :param file_path: The path of the file to write
+        :param atomic: If `True`, the file is written to a temporary file which is then renamed
+        :return: The path of the file
+        """
+        return write_file(file_path, self.render(), atomic)
+
+    def snapshot(self):
+        """
+        :return: A copy of these lines in which the edits are merged into the shared lines, so that copies of the
+            snapshot are unaffected by the number of edits made before it was taken
+        """
+        # pylint: disable=protected-access
+        other = NrelInputLines.__new__(NrelInputLines)
+        other._lines = tuple(self)
+        other._key_index = self._key_index
+        other._edited_lines = {}
+        other._rendered = None
+        other._base_rendered = [self._rendered if self._edited_lines else self._base_rendered[0]]
+        base_digest = self._base_digest[0]
+        other._base_digest = [None if base_digest is None else (base_digest + self._digest_delta) % _DIGEST_MODULUS]
+        other._digest_delta = 0
+        return other
+
+    @staticmethod
+    def _build_key_index(lines):
+        index = {}
+        for i, line in enumerate(lines):
+            index.setdefault(line.key, []).append(i)
+        return {key: tuple(positions) for key, positions in index.items()}
+
+    def __getitem__(self, position):
+        return self._edited_lines.get(position, self._lines[position])
+
+    def __len__(self):
+        return len(self._lines)
+
+    def __iter__(self):
+        edited_lines = self._edited_lines
+        for i, line in enumerate(self._lines):
+            yield edited_lines.get(i, line)
+
+    def __copy__(self):
+        other = NrelInputLines.__new__(NrelInputLines)
+        other._lines = self._lines
+        other._key_index = self._key_index
+        other._edited_lines = dict(self._edited_lines)
+        # Copies are recorded for every simulation, so they do not keep the contents, which are rendered again if needed
+        other._rendered = None
+        other._base_rendered = self._base_rendered
+        other._base_digest = self._base_digest
+        other._digest_delta = self._digest_delta
+        return other
+
+    def __deepcopy__(self, memo):
+        return self.__copy__()
@@ -0,0 +1,420 @@
+# spawnwind
+# Copyright (C) 2018-2019, Simmovation Ltd.
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301  USA
+"""
+Reading of FAST binary output (`.outb`) files into NumPy arrays. Files are memory-mapped and only the requested
+channels and time steps are decoded, so that reading a few channels of many outputs does not load each file in full.
+Outputs may be compacted after a run into `.npz` files holding a subset of the channels as 32-bit floats, which are read
+through the same interface. Requires :mod:`numpy`, which is installed with the `output` extra
+"""
+import os
+import struct
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+# Formats of .outb files, by FileID
+WITH_TIME = 1
+WITHOUT_TIME = 2
+NO_COMPRESS_WITHOUT_TIME = 3
+CHAN_LEN_IN = 4
+_FILE_IDS = (WITH_TIME, WITHOUT_TIME, NO_COMPRESS_WITHOUT_TIME, CHAN_LEN_IN)
+_DEFAULT_NAME_LENGTH = 10
+# Keys of the arrays in compact output files other than the channels, which are stored as 'channel_0', 'channel_1', ...
+_COMPACT_TIME = 'time'
+_COMPACT_CHANNEL = 'channel_{}'
+_COMPACT_CHANNELS = 'channels'
+_COMPACT_UNITS = 'units'
+_COMPACT_DESCRIPTION = 'description'
+_COMPACT_DECIMATION = 'decimation'
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError('numpy is required to read FAST output files. Install spawn-wind[output]')
+
+
+def _time_slice(times, start_time, end_time):
+    begin = 0 if start_time is None else int(np.searchsorted(times, start_time, side='left'))
+    end = len(times) if end_time is None else int(np.searchsorted(times, end_time, side='right'))
+    return slice(begin, end)
+
+
+class _Output:
+    """
+    Base class of output files, whose channels are read by name for all time steps or within a time window
+    """
+    _file_path = None
+    _description = ''
+    _channels = ()
+    _units = ()
+    _channel_index = {}
+    _num_samples = 0
+
+    @property
+    def file_path(self):
+        """
+        :return: Path of the output file
+        """
+        return self._file_path
+
+    @property
+    def description(self):
+        """
+        :return: Description of the run written by FAST
+        """
+        return self._description
+
+    @property
+    def channels(self):
+        """
+        :return: Names of the output channels, excluding time
+        """
+        return list(self._channels)
+
+    @property
+    def units(self):
+        """
+        :return: Units of the output channels, excluding time, by channel name
+        """
+        return dict(zip(self._channels, self._units))
+
+    @property
+    def num_samples(self):
+        """
+        :return: Number of time steps
+        """
+        return self._num_samples
+
+    def time(self, start_time=None, end_time=None):
+        """
+        Output times, optionally within a window
+        :param start_time: Earliest time to include. Defaults to the start of the output
+        :param end_time: Latest time to include. Defaults to the end of the output
+        :return: 1-d array of times
+        """
+        return self._time(self._slice(start_time, end_time))
+
+    def channel(self, name, start_time=None, end_time=None):
+        """
+        Values of a single channel, optionally within a time window
+        :param name: Name of the channel, or `'Time'`
+        :param start_time: Earliest time to include. Defaults to the start of the output
+        :param end_time: Latest time to include. Defaults to the end of the output
+        :return: 1-d array of values
+        """
+        return self.read([name], start_time, end_time)[name]
+
+    def read(self, channels=None, start_time=None, end_time=None):
+        """
+        Values of several channels, optionally within a time window
+        :param channels: Names of the channels to read, which may include `'Time'`. Defaults to all channels
+        :param start_time: Earliest time to include. Defaults to the start of the output
+        :param end_time: Latest time to include. Defaults to the end of the output
+        :return: Dictionary of 1-d arrays by channel name
+        """
+        return self._read_rows(channels, self._slice(start_time, end_time))
+
+    def chunks(self, channels=None, start_time=None, end_time=None, chunk_size=65536):
+        """
+        Values of several channels in consecutive chunks of time steps, so that long outputs can be processed without
+        decoding them in full
+        :param channels: Names of the channels to read, which may include `'Time'`. Defaults to all channels
+        :param start_time: Earliest time to include. Defaults to the start of the output
+        :param end_time: Latest time to include. Defaults to the end of the output
+        :param chunk_size: Maximum number of time steps in each chunk
+        :return: Generator of dictionaries of 1-d arrays by channel name
+        """
+        begin, end, _ = self._slice(start_time, end_time).indices(self._num_samples)
+        for chunk_begin in range(begin, end, chunk_size):
+            yield self._read_rows(channels, slice(chunk_begin, min(chunk_begin + chunk_size, end)))
+
+    def close(self):
+        """
+        Release the file
+        """
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _read_rows(self, channels, rows):
+        if channels is None:
+            channels = ['Time'] + self._channels
+        values = {}
+        for name in channels:
+            if name == 'Time':
+                values[name] = self._time(rows)
+                continue
+            try:
+                i = self._channel_index[name]
+            except KeyError as err:
+                raise KeyError('channel \'{}\' not found in {}'.format(name, self._file_path)) from err
+            values[name] = self._column(i, rows)
+        return values
+
+    def _column(self, index, rows):
+        raise NotImplementedError()
+
+    def _time(self, rows):
+        raise NotImplementedError()
+
+    def _slice(self, start_time, end_time):
+        raise NotImplementedError()
+
+
+class FastOutput(_Output):
+    # pylint: disable=too-many-instance-attributes
+    """
+    Memory-mapped FAST binary output file, in any of the formats written by FAST v7 and v8 (FileID 1 to 4).
+    The header is decoded once when the file is opened. Channels of files stored as 64-bit floats (FileID 3) are views
+    of the mapped file without copying; channels of files stored as scaled 16-bit integers are decoded for the selected
+    time steps only
+    """
+
+    def __init__(self, file_path):
+        """Initialises :class:`FastOutput`
+
+        :param file_path: Path of the `.outb` file
+        :type file_path: path-like
+        """
+        _require_numpy()
+        self._file_path = file_path
+        with open(file_path, 'rb') as fp:
+            self._read_header(fp)
+        self._data = self._map(self._data_dtype, self._data_offset, (self._num_samples, len(self._channels)))
+        self._channel_index = {name: i for i, name in reversed(list(enumerate(self._channels)))}
+
+    @property
+    def file_id(self):
+        """
+        :return: Format of the file (1: with time channel, 2: without time channel, 3: without time channel or
+            compression, 4: without time channel and with channel name length)
+        """
+        return self._file_id
+
+    def close(self):
+        """
+        Unmap the file. Views returned by :meth:`channel` and :meth:`read` keep the file mapped until they are released
+        """
+        self._data = self._packed_time = None
+
+    def _column(self, index, rows):
+        column = self._data[rows, index]
+        if self._scales is None:
+            return column
+        return (column.astype(np.float32) - self._offsets[index]) / self._scales[index]
+
+    def _time(self, rows):
+        if self._packed_time is not None:
+            return (self._packed_time[rows].astype(np.float64) - self._time_offset) / self._time_scale
+        indices = np.arange(*rows.indices(self._num_samples))
+        return self._time_start + self._time_increment * indices
+
+    def _slice(self, start_time, end_time):
+        if start_time is None and end_time is None:
+            return slice(None)
+        if self._packed_time is not None:
+            return _time_slice(self._time(slice(None)), start_time, end_time)
+        # Times are evenly spaced, so the rows are found without decoding them. Allow for rounding in the times
+        tolerance = 1e-6 * self._time_increment
+        begin = 0
+        if start_time is not None:
+            begin = max(0, int(np.ceil((start_time - self._time_start - tolerance) / self._time_increment)))
+        end = self._num_samples
+        if end_time is not None:
+            end = min(end, int(np.floor((end_time - self._time_start + tolerance) / self._time_increment)) + 1)
+        return slice(begin, max(begin, end))
+
+    def _map(self, dtype, offset, shape):
+        if 0 in shape:
+            # Empty arrays cannot be mapped
+            return np.empty(shape, dtype=dtype)
+        return np.memmap(self._file_path, dtype=dtype, mode='r', offset=offset, shape=shape)
+
+    def _read_header(self, fp):
+        # pylint: disable=attribute-defined-outside-init
+        def unpack(fmt):
+            return struct.unpack(fmt, fp.read(struct.calcsize(fmt)))
+
+        self._file_id, = unpack('<h')
+        if self._file_id not in _FILE_IDS:
+            raise ValueError('{} is not a FAST binary output file (FileID {})'.format(self._file_path, self._file_id))
+        name_length = unpack('<h')[0] if self._file_id == CHAN_LEN_IN else _DEFAULT_NAME_LENGTH
+        num_channels, self._num_samples = unpack('<ii')
+        time_scale_or_start, time_offset_or_increment = unpack('<dd')
+        if self._file_id == NO_COMPRESS_WITHOUT_TIME:
+            self._scales = self._offsets = None
+        else:
+            self._scales = np.frombuffer(fp.read(4 * num_channels), dtype='<f4')
+            self._offsets = np.frombuffer(fp.read(4 * num_channels), dtype='<f4')
+        description_length, = unpack('<i')
+        self._description = fp.read(description_length).decode('ascii', 'replace').strip()
+
+        def names():
+            raw = fp.read(name_length * (num_channels + 1)).decode('ascii', 'replace')
+            return [raw[i:i + name_length].strip() for i in range(name_length, len(raw), name_length)]
+
+        # The first name and unit are those of the time channel
+        self._channels = names()
+        self._units = names()
+        if self._file_id == WITH_TIME:
+            self._time_scale, self._time_offset = time_scale_or_start, time_offset_or_increment
+            self._packed_time = self._map('<i4', fp.tell(), (self._num_samples,))
+            self._data_offset = fp.tell() + 4 * self._num_samples
+        else:
+            self._time_start, self._time_increment = time_scale_or_start, time_offset_or_increment
+            self._packed_time = None
+            self._data_offset = fp.tell()
+        self._data_dtype = '<f8' if self._file_id == NO_COMPRESS_WITHOUT_TIME else '<i2'
+
+
+class CompactOutput(_Output):
+    """
+    Output compacted by :func:`compact_output` into a `.npz` file, holding time as 64-bit floats and each channel as
+    32-bit floats. Each channel is decompressed (if compressed) on first use only
+    """
+
+    def __init__(self, file_path):
+        """Initialises :class:`CompactOutput`
+
+        :param file_path: Path of the `.npz` file
+        :type file_path: path-like
+        """
+        _require_numpy()
+        self._file_path = file_path
+        self._archive = np.load(file_path)
+        self._channels = [str(name) for name in self._archive[_COMPACT_CHANNELS]]
+        self._units = [str(unit) for unit in self._archive[_COMPACT_UNITS]]
+        self._description = str(self._archive[_COMPACT_DESCRIPTION])
+        self._decimation = int(self._archive[_COMPACT_DECIMATION])
+        self._times = self._archive[_COMPACT_TIME]
+        self._num_samples = len(self._times)
+        self._channel_index = {name: i for i, name in reversed(list(enumerate(self._channels)))}
+        self._columns = {}
+
+    @property
+    def decimation(self):
+        """
+        :return: Number of time steps of the original output for each time step kept
+        """
+        return self._decimation
+
+    def close(self):
+        """
+        Close the file
+        """
+        self._archive.close()
+        self._columns = {}
+
+    def _column(self, index, rows):
+        if index not in self._columns:
+            self._columns[index] = self._archive[_COMPACT_CHANNEL.format(index)]
+        return self._columns[index][rows]
+
+    def _time(self, rows):
+        return self._times[rows]
+
+    def _slice(self, start_time, end_time):
+        return _time_slice(self._times, start_time, end_time)
+
+
+def open_output(file_path):
+    """
+    Open an output file, which is either a FAST binary output file or an output compacted by :func:`compact_output`
+    :param file_path: Path of the `.outb` or `.npz` file
+    :return: :class:`FastOutput` or :class:`CompactOutput`
+    """
+    if os.path.splitext(file_path)[1].lower() == '.npz':
+        return CompactOutput(file_path)
+    return FastOutput(file_path)
+
+
+def read_outb(file_path, channels=None, start_time=None, end_time=None):
+    """
+    Read channels of a FAST binary output file
+    :param file_path: Path of the `.outb` file
+    :param channels: Names of the channels to read, which may include `'Time'`. Defaults to all channels and time
+    :param start_time: Earliest time to include. Defaults to the start of the output
+    :param end_time: Latest time to include. Defaults to the end of the output
+    :return: Dictionary of 1-d arrays by channel name
+    """
+    return FastOutput(file_path).read(channels, start_time, end_time)
+
+
+def compact_output(raw_path, compact_path, channels=None, decimation=1, compress=False, delete_raw=False):
+    """
+    Compact an output file into a `.npz` file holding a subset of its channels as 32-bit floats, optionally keeping
+    only every nth time step and compressing the arrays. The compact file is read back and compared with the values
+    written before it is moved into place and the raw output is deleted, so that a failure leaves the raw output
+    :param raw_path: Path of the output file to compact, which may be read by :func:`open_output`
+    :param compact_path: Path of the `.npz` file to write
+    :param channels: Names of the channels to keep, in any case, as FAST channel names are not case sensitive. The
+        names are stored as they are in the raw output. Defaults to all channels
+    :param decimation: Number of time steps of the raw output for each time step kept
+    :param compress: If `True`, the arrays are compressed with zlib
+    :param delete_raw: If `True`, the raw output is deleted once the compact file is written
+    :return: Path of the compact file
+    """
+    # pylint: disable=too-many-arguments
+    if decimation < 1:
+        raise ValueError('decimation must be a positive integer, not {}'.format(decimation))
+    with open_output(raw_path) as raw:
+        names = raw.channels if channels is None else _match_channels(raw.channels, channels)
+        values = raw.read(['Time'] + names)
+        units = raw.units
+        arrays = {
+            _COMPACT_TIME: np.asarray(values['Time'][::decimation], dtype=np.float64),
+            _COMPACT_CHANNELS: np.array(names, dtype=str),
+            _COMPACT_UNITS: np.array([units[name] for name in names], dtype=str),
+            _COMPACT_DESCRIPTION: np.array(raw.description),
+            _COMPACT_DECIMATION: np.array(decimation)
+        }
+        for i, name in enumerate(names):
+            arrays[_COMPACT_CHANNEL.format(i)] = np.asarray(values[name][::decimation], dtype=np.float32)
+    temp_path = compact_path + '.tmp'
+    try:
+        # Writing to an open file stops numpy appending .npz to the temporary path
+        with open(temp_path, 'wb') as fp:
+            (np.savez_compressed if compress else np.savez)(fp, **arrays)
+        _verify_compact_output(temp_path, names, arrays)
+        os.replace(temp_path, compact_path)
+    finally:
+        if os.path.isfile(temp_path):
+            os.remove(temp_path)
+    if delete_raw:
+        os.remove(raw_path)
+    return compact_path
+
+
+def _match_channels(available, names):
+    by_lower_name = {}
+    for name in available:
+        by_lower_name.setdefault(name.lower(), name)
+    return [by_lower_name.get(name.lower(), name) for name in names]
+
+
+def _verify_compact_output(file_path, names, arrays):
+    with CompactOutput(file_path) as compact:
+        written = compact.read()
+        if compact.channels != names or not all(
+                np.array_equal(written[name], arrays[_COMPACT_CHANNEL.format(i)], equal_nan=True)
+                for i, name in enumerate(names)) or not np.array_equal(written['Time'], arrays[_COMPACT_TIME]):
+            raise IOError('compacted output {} does not match the values written'.format(file_path))
@@ -27,11 +27,18 @@ from .simulation_input import TurbsimInput
 from .fast_input import Fast7Input, Fast8Input
 from .turbsim_spawner import TurbsimSpawner
 from .fast_spawner import FastSimulationSpawner
-from .tasks import WindGenerationTask, FastSimulationTask
+from .tasks import WindGenerationTask, FastSimulationTask, MEMORY_RESOURCE
+from .wind_registry import WindFileRegistry
+from .input_files import ModuleStore, BackgroundFileWriter
+from ..profiling import profiler
 
+# pylint: disable=too-many-arguments,too-many-locals
 def create_spawner(
         turbsim_exe, fast_exe, turbsim_base_file, fast_base_file, fast_version,
-        runner_type, turbsim_working_dir, fast_working_dir, outdir, prereq_outdir
+        runner_type, turbsim_working_dir, fast_working_dir, outdir, prereq_outdir, wind_file_registry=None,
+        deferred_writes=None, module_store=None, writer_threads=None, profile_file=None, compact_output=None,
+        compact_channels=None, output_decimation=None, compress_output=None, keep_raw_output=None,
+        memory_limit_mb=None
     ):
     """
 
@@ -42,14 +49,37 @@ def create_spawner(
     :param fast_base_file: FAST input file (typically `.fst`) to which all parameter
         editions are made and from which simulations are spawned
     :param fast_version: Major version of FAST {'v7', 'v8'}
-    :param runner_type: default is `process`
+    :param runner_type: default is `process`, which runs the executables directly. `python` runs executables that are
+        Python scripts, such as the stand-ins for FAST and TurbSim in `benchmarks/stub_executable.py`, with the
+        interpreter running spawnwind
     :param turbsim_working_dir: Directory in which TurbSim wind generation tasks are executed
     :param fast_working_dir: Directory in which FAST simulations are executed.
         Note that the discon.dll must be in this directory
     :param outdir: Root output directory for spawning and thus where simulation outputs are located
     :param prereq_outdir: Root output directory for prerequisite tasks (i.e. wind file generation)
+    :param wind_file_registry: Path of the database of generated wind files, which are reused by later runs.
+        If not given, generated wind files are not registered or reused
+    :param deferred_writes: If true, input files are written when each simulation runs rather than when it is spawned
+    :param module_store: Directory in which module input files are stored by the hash of their contents, so that they
+        are shared by simulations. If not given, the module files are written to the directory of each simulation
+    :param writer_threads: Number of threads writing input files in the background while simulations are spawned.
+        If not given, files are written as each simulation is spawned
+    :param profile_file: Path, relative to the output directory, of a JSON file to which counts and times of the phases
+        of spawning are written at the end of the run. If not given, spawning is not profiled
+    :param compact_output: If true, the output of each simulation is compacted into a `.npz` file of 32-bit floats
+        once it has run, and the FAST output is deleted. The FAST output must be binary
+    :param compact_channels: Comma-separated names of the channels kept in compacted outputs, which must each be in the
+        output list of a module. Defaults to all channels
+    :param output_decimation: Number of time steps of the FAST output for each time step kept in compacted outputs.
+        Defaults to 1
+    :param compress_output: If true, compacted outputs are compressed
+    :param keep_raw_output: If true, the FAST output is kept after it has been compacted
+    :param memory_limit_mb: Memory in MB that wind generation tasks running at once may use, according to the estimate
+        of each. If not given, the number of tasks running at once is only limited by the number of workers
     :returns: `FastSimulationSpawner` object
     """
+    if profile_file:
+        profiler.enable(path.join(outdir, profile_file))
     validate_file(turbsim_exe, 'turbsim_exe')
     validate_file(fast_exe, 'fast_exe')
     validate_file(turbsim_base_file, 'turbsim_base_file')
@@ -65,15 +95,44 @@ def create_spawner(
     luigi_config.set(FastSimulationTask.__name__, '_exe_path', fast_exe)
     luigi_config.set(FastSimulationTask.__name__, '_runner_type', runner_type)
     luigi_config.set(FastSimulationTask.__name__, '_working_dir', fast_working_dir)
-
-    wind_spawner = TurbsimSpawner(TurbsimInput.from_file(turbsim_base_file))
+    luigi_config.set(FastSimulationTask.__name__, '_output_decimation', str(int(output_decimation or 1)))
+    luigi_config.set(FastSimulationTask.__name__, '_compress_output', str(_is_true(compress_output)))
+    luigi_config.set(FastSimulationTask.__name__, '_keep_raw_output', str(_is_true(keep_raw_output)))
+    if memory_limit_mb:
+        luigi_config.set('resources', MEMORY_RESOURCE, str(int(memory_limit_mb)))
+
+    prereq_dir = path.join(outdir, prereq_outdir)
+    file_writer = BackgroundFileWriter(int(writer_threads)) if writer_threads and int(writer_threads) > 0 else None
+    registry = WindFileRegistry(wind_file_registry) if wind_file_registry else None
+    wind_spawner = TurbsimSpawner(TurbsimInput.from_file(turbsim_base_file), registry, file_writer)
     fast_input_cls = {
         'v7': Fast7Input,
         'v8': Fast8Input
     }
     return FastSimulationSpawner(fast_input_cls[fast_version].from_file(fast_base_file),
                                  wind_spawner,
-                                 path.join(outdir, prereq_outdir))
+                                 prereq_dir,
+                                 deferred_writes=_is_true(deferred_writes),
+                                 module_store=ModuleStore(path.join(outdir, module_store)) if module_store else None,
+                                 file_writer=file_writer,
+                                 compact_output=_is_true(compact_output),
+                                 compact_channels=_split_list(compact_channels))
+
+
+def _is_true(value):
+    # Options from the configuration file are strings
+    if isinstance(value, str):
+        return value.strip().lower() in ('true', 'yes', 'on', '1')
+    return bool(value)
+
+
+def _split_list(value):
+    # Lists in the configuration file are comma-separated strings
+    if not value:
+        return []
+    if isinstance(value, str):
+        value = value.split(',')
+    return [item.strip() for item in value if item.strip()]
 
 
 #pylint: disable=invalid-name
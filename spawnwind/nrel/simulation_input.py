@@ -17,9 +17,16 @@
 """Contains definitions for NREL :class:`SimulationInput`
 """
 from os import path
+import copy
+import re
 from spawn.simulation_inputs import SimulationInput
-from spawn.util.hash import string_hash
-from .nrel_input_line import NrelInputLine
+from .nrel_input_line import NrelInputLines, NrelInputLine, parse_lines
+from .input_cache import parsed_input_cache, cache_key
+from ..profiling import profiler, timed
+
+
+# Channel names in an output list are separated by commas and/or whitespace, and may be quoted together or separately
+_CHANNEL_SEPARATOR = re.compile(r'[\s,"]+')
 
 
 def _absolutise_path(line, root_dir, local_path):
@@ -32,22 +39,30 @@ class NRELSimulationInput(SimulationInput):
     Handles contents of input files for NREL's aeroelastic modules such as FAST, AeroDyn and TurbSim.
     These tend to be of a whitespace separated {value|key} format with newlines separating key:value pairs
     """
+    # Keys whose values do not affect the results of the simulation, which are left out of the hash
+    _hash_ignored_keys = ()
+
     def __init__(self, input_lines, root_folder):
         """Initialises :class:`NRELSimulationInput`
 
-        :param input_lines: The lines of the input file
-        :type input_lines: list
+        :param input_lines: The lines of the input file. If :class:`NrelInputLines` are given, they are shared with
+            this input so that edits made by either are visible to both
+        :type input_lines: list or :class:`NrelInputLines`
         :param root_folder: The root folder containing the input file
         :type root_folder: path-like
         """
+        if not isinstance(input_lines, NrelInputLines):
+            input_lines = NrelInputLines(input_lines)
         self._input_lines = input_lines
         self._root_folder = root_folder
         self._absolutise_paths(root_folder, self._lines_with_paths())
 
     # pylint: disable=arguments-differ
     @classmethod
+    @timed('load_input_file')
     def from_file(cls, file_path, **kwargs):
-        """Creates a :class:`NRELSimulationInput` by loading a file
+        """Creates a :class:`NRELSimulationInput` by loading a file. Files that have already been loaded by the same
+        class, and not modified since, are copied from :data:`parsed_input_cache` rather than read again
 
         :param file_path: The file path to load
         :type file_path: path-like
@@ -55,31 +70,55 @@ class NRELSimulationInput(SimulationInput):
         :returns: The simulation input object
         :rtype: An instance of :class:`NRELSimulationInput`
         """
-        with open(file_path, 'r') as fp:
-            input_lines = fp.readlines()
         root_folder = path.abspath(path.split(file_path)[0])
-        return cls([NrelInputLine(line) for line in input_lines], root_folder, **kwargs)
-
-    def to_file(self, file_path):
-        """Writes the contents of the input file to disk
+        key = cache_key(file_path, cls)
+        input_lines = parsed_input_cache.get(key)
+        if input_lines is not None:
+            profiler.count('input_file_cache_hits')
+            return cls(input_lines, root_folder, **kwargs)
+        with profiler.time('parse'), open(file_path, 'r') as fp:
+            input_lines = parse_lines(fp)
+        profiler.count('lines_parsed', len(input_lines))
+        simulation_input = cls(input_lines, root_folder, **kwargs)
+        parsed_input_cache.put(key, simulation_input._input_lines)
+        return simulation_input
+
+    def to_file(self, file_path, atomic=False):
+        """Writes the contents of the input file to disk in a single write
 
         :param file_path: The path of the file to write
         :type file_path: path-like
+        :param atomic: If `True`, the file is written to a temporary file which is then renamed, so that it is never
+            left partially written
+        :type atomic: bool
+        """
+        return self._input_lines.to_file(file_path, atomic)
+
+    def render(self):
+        """Renders the contents of the input file
+
+        :returns: The contents of the file as a string
+        :rtype: str
+        """
+        return self._input_lines.render()
+
+    def frozen_lines(self):
+        """Copy of the lines of the input as they are now, which is unaffected by later edits. This is O(number of
+        edits), so is a cheap way to record the contents of the file to be written later
+
+        :returns: The lines, which may be written with :meth:`NrelInputLines.to_file`
+        :rtype: :class:`NrelInputLines`
         """
-        with open(file_path, 'w') as fp:
-            for line in self._input_lines:
-                fp.write(str(line))
-        return file_path
+        return copy.copy(self._input_lines)
 
     def hash(self):
-        """Returns a hash of the contents of the file
+        """Returns a hash of the contents of the file. Values are compared in canonical form, so that e.g. `10` and
+        `10.0` hash equal. The hash is kept up to date as values are set, so this is O(1)
 
         :returns: The hash
         :rtype: str
         """
-        keys = [line.key for line in self._input_lines if line.key is not None]
-        values = [line.value for line in self._input_lines if line.value is not None]
-        return string_hash('\n'.join(keys + values))
+        return self._input_lines.digest(self._hash_ignored_keys)
 
     def get_on_blade(self, base_key, blade_number):
         """
@@ -101,48 +140,86 @@ class NRELSimulationInput(SimulationInput):
         key = base_key + '({})'.format(blade_number)
         self[key] = value
 
+    def has_output_list(self):
+        """
+        :return: `True` if the input has an output list (`OutList`) of the channels written by the module
+        """
+        return self._output_list_range() is not None
+
+    @property
+    def output_channels(self):
+        """
+        :return: Names of the channels in the output list, in order
+        """
+        output_list = self._output_list_range()
+        if output_list is None:
+            raise KeyError('parameter \'OutList\' not found')
+        channels = []
+        for i in range(*output_list):
+            channels.extend(name for name in _CHANNEL_SEPARATOR.split(self._input_lines[i].value) if name)
+        return channels
+
+    @output_channels.setter
+    def output_channels(self, channels):
+        """
+        :param channels: Names of the channels to write, which replace the whole output list with one line per channel
+        """
+        output_list = self._output_list_range()
+        if output_list is None:
+            raise KeyError('parameter \'OutList\' not found')
+        self._input_lines.replace_lines(*output_list, [NrelInputLine('"{}"\n'.format(name)) for name in channels])
+
+    def _output_list_range(self):
+        # The OutList line is followed by the channels, one or more per line, up to a line starting with END. It has
+        # no value, so 'OutList' is parsed as its value rather than its key
+        begin = None
+        for i, line in enumerate(self._input_lines):
+            if begin is None:
+                if line.value == 'OutList':
+                    begin = i + 1
+            elif str(line)[:3].upper() == 'END':
+                return begin, i
+        return None if begin is None else (begin, len(self._input_lines))
+
     def __setitem__(self, key, value):
-        self._get_line(key).value = str(value).strip('"')
+        self._input_lines.set_value(self._get_position(key), str(value).strip('"'))
 
     def __getitem__(self, key):
         return self._get_line(key).value.strip('"')
 
     def _get_line(self, key, nth_line=1):
         """
-        Get input line based on key
+        Get input line based on key. The line must not be edited directly, as it may be shared with copies of this input
         :param key: Identifying key of input line
         :param nth_line: If key is duplicated in input, return the line corresponding to the 'nth" occurrence of the key
         :return: Line from self._input_lines container
         """
-        generate = (line for line in self._input_lines if line.key == key)
-        try:
-            if nth_line == 1:
-                return next(generate)
-            else:
-                for _ in range(nth_line):
-                    line = next(generate)
-                return line
-        except StopIteration:
+        return self._input_lines[self._get_position(key, nth_line)]
+
+    def _get_position(self, key, nth_line=1):
+        positions = self._input_lines.positions(key)
+        if not 0 < nth_line <= len(positions):
             raise KeyError('parameter \'{}\' not found'.format(key))
+        return positions[nth_line - 1]
 
     def _get_index(self, key):
-        for i, line in enumerate(self._input_lines):
-            if line and line.key == key:
+        for i in self._input_lines.positions(key):
+            if self._input_lines[i]:
                 return i
         raise KeyError('parameter \'{}\' not found'.format(key))
 
     def _get_indices_if(self, pred):
         lines = []
-        for i, line in enumerate(self._input_lines):
-            if pred(line.key):
-                lines.append(i)
-        return lines
+        for key in self._input_lines.keys():
+            if pred(key):
+                lines.extend(self._input_lines.positions(key))
+        return sorted(lines)
 
     def _absolutise_paths(self, root_folder, lines):
         for i in lines:
             rel_path = self._input_lines[i].value
             if rel_path:
-                self._input_lines[i].value = path.abspath(path.join(root_folder, rel_path))
+                self._input_lines.set_value(i, path.abspath(path.join(root_folder, rel_path)))
 
     @staticmethod
     def _lines_with_paths():
@@ -153,3 +230,7 @@ class TurbsimInput(NRELSimulationInput):
     """
     Handles contents of TurbSim (FAST wind generation) input file
     """
+    # Switches for output files that nothing downstream reads do not change the wind used by the FAST simulations, so
+    # inputs differing only in these share a wind generation task. The hub-height (WrADHH) and tower (WrADTWR) files
+    # may be read by AeroDyn, so their switches are hashed
+    _hash_ignored_keys = ('WrBHHTP', 'WrFHHTP', 'WrFMTFF', 'WrACT')
@@ -19,14 +19,110 @@
 from os import path
 
 import luigi
+from luigi import configuration
 
 from spawn.tasks import SimulationTask
+from spawn.runners import ProcessRunner
+
+from .wind_registry import WindFileRegistry
+from .input_files import flush_background_writes, close_background_writers
+from .output import compact_output
+from ..runners import PythonScriptRunner
+
+# Runners of both TurbSim and FAST tasks. `python` runs an executable that is a Python script
+_RUNNERS = {
+    'process': ProcessRunner,
+    'python': PythonScriptRunner
+}
+
+# Luigi resource of the memory, in MB, of the simulations running at once. Tasks only declare it when a limit is set in
+# the [resources] section of the luigi configuration, because luigi allows one unit of any resource that is not set
+MEMORY_RESOURCE = 'memory_mb'
+
+
+def _memory_resources(memory_mb):
+    limit = configuration.get_config().getint('resources', MEMORY_RESOURCE, 0)
+    if limit <= 0 or memory_mb <= 0:
+        return {}
+    # A task estimated to need more than the limit still runs, on its own
+    return {MEMORY_RESOURCE: min(memory_mb, limit)}
+
+
+class InputFilesParameter(luigi.Parameter):
+    """Implementation of :class:`luigi.Parameter` holding an :class:`InputFileSnapshot` of files yet to be written
+    """
+    def serialize(self, x):
+        """Serialize this object
+        """
+        return str(x) if x is not None else ''
+
 
 class WindGenerationTask(SimulationTask):
     """
     Implementation of :class:`SimulationTask` for TurbSim
     """
     _extension = luigi.Parameter(default='.wnd')
+    _wind_hash = luigi.Parameter(default='', significant=False)
+    _registry_path = luigi.Parameter(default='', significant=False)
+    _memory_mb = luigi.IntParameter(default=0, significant=False)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._dependent_cost = 0
+
+    @property
+    def priority(self):
+        """Priority of this task, which is the total estimated cost of the simulations that depend on it, so that wind
+        files that unblock the most work are generated first
+
+        :rtype: int
+        """
+        return self._dependent_cost
+
+    @property
+    def resources(self):
+        """Resources used by this task, which are its estimated memory if a memory limit is configured
+
+        :rtype: dict
+        """
+        return _memory_resources(self._memory_mb)
+
+    def add_dependent(self, cost):
+        """Record a simulation that depends on this task
+
+        :param cost: Estimated cost of the simulation
+        :type cost: int
+        """
+        self._dependent_cost += cost
+
+    def deps(self):
+        """Dependencies of this task, which luigi gets in the scheduling process before it runs the task. Any input
+        files still being written in the background are written first, so that none are pending when tasks are run in
+        other processes
+
+        :returns: List of the tasks this task depends on
+        :rtype: list
+        """
+        close_background_writers()
+        return super().deps()
+
+    def run(self):
+        """Run this task, registering the wind file in the wind file registry if there is one
+        """
+        flush_background_writes()
+        super().run()
+        if self._registry_path and path.isfile(self.wind_file_path):
+            WindFileRegistry(self._registry_path).register(self._wind_hash, self.wind_file_path)
+
+    @property
+    def available_runners(self):
+        """Runners available for this task, which are the native process and Python scripts
+
+        :returns: Dictionary of runner classes by runner type
+        :rtype: dict
+        """
+        return _RUNNERS
+
     def output(self):
         """The output of this task
 
@@ -46,12 +142,95 @@ class FastSimulationTask(SimulationTask):
     """
     Implementation of :class:`SimulationTask` for FAST
     """
+    _input_files = InputFilesParameter(default=None, significant=False)
+    _extension = luigi.Parameter(default='.outb')
+    _cost = luigi.IntParameter(default=0, significant=False)
+    _compact_output = luigi.BoolParameter(default=False, significant=False)
+    _compact_channels = luigi.ListParameter(default=[], significant=False)
+    _output_decimation = luigi.IntParameter(default=1, significant=False)
+    _compress_output = luigi.BoolParameter(default=False, significant=False)
+    _keep_raw_output = luigi.BoolParameter(default=False, significant=False)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # pylint: disable=not-an-iterable
+        for dependency in self._dependencies:
+            if isinstance(dependency, WindGenerationTask):
+                dependency.add_dependent(self._cost)
+
+    @property
+    def priority(self):
+        """Priority of this task, which is its estimated cost, so that the longest simulations are started first
+
+        :rtype: int
+        """
+        return self._cost
+
+    def deps(self):
+        """Dependencies of this task, which luigi gets in the scheduling process before it runs the task. Any input
+        files still being written in the background are written first, so that none are pending when tasks are run in
+        other processes
+
+        :returns: List of the tasks this task depends on
+        :rtype: list
+        """
+        close_background_writers()
+        return super().deps()
+
+    def run(self):
+        """Run this task, first writing the input files if their writing was deferred when it was spawned, then
+        compacting the output if configured to
+        """
+        flush_background_writes()
+        self.write_input_files()
+        super().run()
+        if self._compact_output:
+            compact_output(self.raw_output_path, self.output().path, channels=list(self._compact_channels) or None,
+                           decimation=self._output_decimation, compress=self._compress_output,
+                           delete_raw=not self._keep_raw_output)
+
+    def complete(self):
+        """Determine if this task is complete. When outputs are compacted, the compact output must also exist
+
+        :returns: ``True`` if this task is complete; otherwise ``False``
+        :rtype: bool
+        """
+        if self._compact_output and not self.output().exists():
+            return False
+        return super().complete()
+
+    def write_input_files(self):
+        """Write the input files of this task if their writing was deferred when it was spawned
+        """
+        if self._input_files is not None:
+            # pylint: disable=no-member
+            self._input_files.write()
+
+    @property
+    def available_runners(self):
+        """Runners available for this task, which are the native process and Python scripts
+
+        :returns: Dictionary of runner classes by runner type
+        :rtype: dict
+        """
+        return _RUNNERS
+
     def output(self):
-        """The output of this task
+        """The output of this task, which is the compact output if outputs are compacted
 
-        :returns: Target to the .outb path
+        :returns: Target to the .outb (or .out for text output) path, or the .npz path if outputs are compacted
         :rtype: :class:`luigi.LocalTarget`
         """
-        run_name_with_path = path.splitext(super().run_name_with_path)[0]
-        output = run_name_with_path + '.outb'
-        return luigi.LocalTarget(output)
+        if self._compact_output:
+            return luigi.LocalTarget(self._output_base + '.npz')
+        return luigi.LocalTarget(self.raw_output_path)
+
+    @property
+    def raw_output_path(self):
+        """The path of the output written by FAST
+        """
+        return self._output_base + self._extension
+
+    @property
+    def _output_base(self):
+        return path.splitext(super().run_name_with_path)[0]
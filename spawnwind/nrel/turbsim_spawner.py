@@ -18,35 +18,85 @@
 """
 from os import path as os_path, makedirs
 import copy
+import math
 
 from ..spawners import WindGenerationSpawner
 from .tasks import WindGenerationTask
+from ..profiling import profiler, timed
 
 
 class TurbsimSpawner(WindGenerationSpawner):
     """Spawns TurbSim wind generation tasks"""
 
-    def __init__(self, turbsim_input):
+    def __init__(self, turbsim_input, wind_file_registry=None, file_writer=None):
+        """Initialises :class:`TurbsimSpawner`
+
+        :param turbsim_input: The TurbSim input from which wind generation tasks are spawned
+        :type turbsim_input: :class:`TurbsimInput`
+        :param wind_file_registry: Registry of previously generated wind files, which is shared by branches
+        :type wind_file_registry: :class:`WindFileRegistry`
+        :param file_writer: Writer of input files in the background. If `None`, files are written when spawned
+        :type file_writer: :class:`BackgroundFileWriter`
+        """
         self._input = turbsim_input
+        self._wind_file_registry = wind_file_registry
+        self._file_writer = file_writer
 
+    @timed('spawn_wind')
     def spawn(self, path_, metadata):
         wind_input_file = os_path.join(path_, 'wind.ipt')
-        if not os_path.isdir(os_path.dirname(wind_input_file)):
-            makedirs(os_path.dirname(wind_input_file))
-        self._input.to_file(wind_input_file)
+        if self._file_writer is not None:
+            self._file_writer.write(wind_input_file, self._input.render())
+        else:
+            if not os_path.isdir(os_path.dirname(wind_input_file)):
+                makedirs(os_path.dirname(wind_input_file))
+            self._input.to_file(wind_input_file, atomic=True)
         extension = '.wnd' if self.wind_type == 'bladed' else '.bts'
+        registry_path = self._wind_file_registry.database_path if self._wind_file_registry else ''
         wind_task = WindGenerationTask('wind ' + path_,
                                        _input_file_path=wind_input_file,
                                        _metadata=metadata,
-                                       _extension=extension)
+                                       _extension=extension,
+                                       _wind_hash=self.input_hash(),
+                                       _registry_path=registry_path,
+                                       _memory_mb=self.estimated_memory_mb())
         return wind_task
 
+    def registered_wind_file(self):
+        if self._wind_file_registry is None:
+            return None
+        return self._wind_file_registry.lookup(self.input_hash())
+
     def branch(self):
+        profiler.count('wind_branches')
         branched_spawner = copy.copy(self)
         #pylint: disable=protected-access
         branched_spawner._input = copy.deepcopy(self._input)
         return branched_spawner
 
+    def estimated_memory_mb(self):
+        """Estimate the memory used by TurbSim: the three components of velocity at each grid point and time step, in
+        single precision and with a copy for the Fourier transforms, and the lower triangle of the coherence matrix of
+        each component in double precision
+
+        :returns: Estimated memory in MB
+        :rtype: int
+        """
+        grid_points = int(self._input['NumGrid_Z']) * int(self._input['NumGrid_Y'])
+        time_steps = self._series_length() / float(self._input['TimeStep'])
+        memory = 3 * 4 * 2 * grid_points * time_steps + 3 * 8 * grid_points * (grid_points + 1) / 2
+        return int(math.ceil(memory / 2 ** 20))
+
+    def _series_length(self):
+        # UsableTime may be 'ALL', in which case the whole analysis time is output
+        lengths = []
+        for key in ['AnalysisTime', 'UsableTime']:
+            try:
+                lengths.append(float(self._input[key]))
+            except ValueError:
+                pass
+        return max(lengths)
+
     def input_hash(self):
         """Get the hash of the input
 
@@ -18,8 +18,57 @@
 Handlers of input files relating to wind inflow
 """
 from os import path
-from .nrel_input_line import NrelInputLine
+import threading
 from .simulation_input import NRELSimulationInput
+from ..profiling import profiler
+
+# Extensions of full-field wind files, which may be set explicitly in place of generated wind files
+_FULL_FIELD_EXTENSIONS = ('.wnd', '.bts')
+
+
+class WindTaskCache:
+    """
+    Thread-safe cache of wind files, and the tasks that generate them, by hash of the wind generation input. Copies of
+    the cache are the cache itself, so that it is shared by all branches of a spawner and equivalent wind inputs
+    anywhere in the spec map to a single wind generation task
+    """
+
+    def __init__(self):
+        """Initialises :class:`WindTaskCache`
+        """
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get_or_create(self, wind_hash, create):
+        """
+        Get the cached wind file and tasks for a hash, creating them if not already cached
+        :param wind_hash: Hash of the wind generation input
+        :param create: Function without arguments returning a tuple of wind file path and list of tasks
+        :return: Tuple of wind file path and list of wind generation tasks
+        """
+        with self._lock:
+            if wind_hash not in self._entries:
+                profiler.count('wind_dedup_misses')
+                self._entries[wind_hash] = create()
+            else:
+                profiler.count('wind_dedup_hits')
+            return self._entries[wind_hash]
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __getstate__(self):
+        # Tasks are not sent to other processes, which keep their own cache (see :mod:`spawnwind.parallel`)
+        return {}
+
+    def __setstate__(self, state):
+        self.__init__()
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
 
 
 class WindInput(NRELSimulationInput):
@@ -38,16 +87,13 @@ class WindInput(NRELSimulationInput):
         """
         super().__init__(lines, root_folder)
         self._wind_gen_spawner = wind_gen_spawner
-        self._wind_task_cache = {}
+        self._wind_task_cache = WindTaskCache()
         self._wind_is_explicit = False
 
     @classmethod
     # pylint: disable=arguments-differ
     def from_file(cls, file_path, wind_gen_spawner):
-        with open(file_path, 'r') as fp:
-            input_lines = fp.readlines()
-        root_folder = path.abspath(path.split(file_path)[0])
-        return cls([NrelInputLine(line) for line in input_lines], root_folder, wind_gen_spawner)
+        return super().from_file(file_path, wind_gen_spawner=wind_gen_spawner)
 
     def get_wind_gen_tasks(self, prereq_dir, metadata):
         """
@@ -86,6 +132,14 @@ class WindInput(NRELSimulationInput):
         """
         raise NotImplementedError()
 
+    @property
+    def full_field_wind(self):
+        """
+        :return: `True` if the wind is read from a full-field (turbulent) wind file, which is interpolated at each time
+            step, or `False` if not or if the type of wind cannot be determined
+        """
+        raise NotImplementedError()
+
     @property
     def wind_speed(self):
         """
@@ -166,21 +220,26 @@ class WindInput(NRELSimulationInput):
         """
         raise NotImplementedError()
 
-    def _spawn_wind_gen_task(self, prereq_dir, metadata):
+    def _generate_wind_file(self, prereq_dir, metadata):
         """
-        Get wind task from hash if equivalent exists, otherwise spawn new wind generation task
+        Get wind file that has already been generated from equivalent inputs if one exists (either by a task spawned
+        by this input or any of its copies, or one registered by the wind generation spawner), otherwise spawn a new
+        wind generation task
         :param prereq_dir: Output directory for prerequisite simulations
         :param metadata: Metadata for siumulation
-        :return: WindGenerationTask
+        :return: Tuple of wind file path and list of wind generation tasks (size 0 or 1)
         """
-        wind_hash = self._wind_gen_spawner.input_hash()
-        if wind_hash in self._wind_task_cache:
-            wind_task = self._wind_task_cache[wind_hash]
-        else:
-            outdir = path.join(prereq_dir, wind_hash)
-            wind_task = self._wind_gen_spawner.spawn(outdir, metadata)
-            self._wind_task_cache[wind_hash] = wind_task
-        return wind_task
+        def create():
+            wind_file = self._wind_gen_spawner.registered_wind_file()
+            if wind_file is not None:
+                return wind_file, []
+            wind_task = self._wind_gen_spawner.spawn(path.join(prereq_dir, wind_hash), metadata)
+            return wind_task.wind_file_path, [wind_task]
+
+        with profiler.time('wind_hash'):
+            wind_hash = self._wind_gen_spawner.input_hash()
+        wind_file, wind_tasks = self._wind_task_cache.get_or_create(wind_hash, create)
+        return wind_file, list(wind_tasks)
 
 
 class AerodynInput(WindInput):
@@ -192,9 +251,9 @@ class AerodynInput(WindInput):
         if self._wind_is_explicit:
             return []
 
-        wind_task = self._spawn_wind_gen_task(prereq_dir, metadata)
-        self._set_wind_file(wind_task.wind_file_path)
-        return [wind_task]
+        wind_file, wind_tasks = self._generate_wind_file(prereq_dir, metadata)
+        self._set_wind_file(wind_file)
+        return wind_tasks
 
     @property
     def wind_type(self):
@@ -205,6 +264,15 @@ class AerodynInput(WindInput):
         if type_ in ['bladed', 'turbsim']:
             self._wind_gen_spawner.wind_type = type_
 
+    @property
+    def full_field_wind(self):
+        if self._wind_is_explicit:
+            return path.splitext(self.wind_file)[1].lower() in _FULL_FIELD_EXTENSIONS
+        try:
+            return self._wind_gen_spawner.wind_type in ['bladed', 'turbsim']
+        except ValueError:
+            return False
+
     def _set_wind_file(self, file):
         self['WindFile'] = file
 
@@ -245,9 +313,9 @@ class InflowWindInput(WindInput):
         if self.wind_type == 'steady' or self.wind_type == 'uniform' or self._wind_is_explicit:
             return []
 
-        wind_task = self._spawn_wind_gen_task(prereq_dir, metadata)
-        self._set_wind_file(wind_task.wind_file_path)
-        return [wind_task]
+        wind_file, wind_tasks = self._generate_wind_file(prereq_dir, metadata)
+        self._set_wind_file(wind_file)
+        return wind_tasks
 
     @property
     def wind_type(self):
@@ -262,6 +330,14 @@ class InflowWindInput(WindInput):
         if type_name in ['bladed', 'turbsim']:
             self._wind_gen_spawner.wind_type = type_name
 
+    @property
+    def full_field_wind(self):
+        # The wind type is set in the input whether or not the wind file is explicit
+        try:
+            return self.wind_type in ['turbsim', 'bladed', 'hawc']
+        except (KeyError, ValueError):
+            return False
+
     @property
     def wind_speed(self):
         if self.wind_type == 'steady':
@@ -278,39 +354,41 @@ class InflowWindInput(WindInput):
 
     @property
     def wind_file(self):
-        return self._get_wind_file_line().value
+        return self._input_lines[self._get_wind_file_position()].value
 
     @wind_file.setter
     def wind_file(self, file):
-        self._get_wind_file_line().value = file
+        self._input_lines.set_value(self._get_wind_file_position(), file)
 
     def _lines_with_paths(self):
         def _is_filepath_key(key):
             return 'filename' in key.lower()
         return self._get_indices_if(_is_filepath_key)
 
-    def _get_wind_file_line(self):
+    def _get_wind_file_position(self):
         type_ = int(self['WindType'])
         filename_key_with_type = 'FilenameT{}'.format(type_)
         if type_ == 2:
             try:
-                return self._get_line(filename_key_with_type)
+                return self._get_position(filename_key_with_type)
             except KeyError:
-                return self._get_line('Filename')
+                return self._get_position('Filename')
         elif type_ == 3:
             try:
-                return self._get_line(filename_key_with_type)
+                return self._get_position(filename_key_with_type)
             except KeyError:
-                return self._get_line('Filename', 2)
+                return self._get_position('Filename', 2)
         elif type_ == 4:
             try:
-                return self._get_line(filename_key_with_type)
+                return self._get_position(filename_key_with_type)
             except KeyError:
-                return self._get_line('FilenameRoot')
+                return self._get_position('FilenameRoot')
         else:
             raise KeyError("Cannot find wind file in InflowWind, type_={}. "\
                            "Set 'wind_type' parameter to an appropriate value".format(type_))
 
     def _set_wind_file(self, file):
-        line = self._get_wind_file_line()
-        line.value = path.splitext(file)[0] if (line.key == 'FilenameRoot' or line.key == 'FilenameT4') else file
+        position = self._get_wind_file_position()
+        key = self._input_lines[position].key
+        value = path.splitext(file)[0] if (key == 'FilenameRoot' or key == 'FilenameT4') else file
+        self._input_lines.set_value(position, value)
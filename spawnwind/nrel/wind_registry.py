@@ -0,0 +1,117 @@
+# spawnwind
+# Copyright (C) 2018-2019, Simmovation Ltd.
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301  USA
+"""
+Persistent registry of generated wind files, so that wind files can be reused across runs, output directories and users
+"""
+import os
+from os import path
+import sqlite3
+import hashlib
+from contextlib import closing
+
+_CHUNK_SIZE = 1 << 20
+
+
+def _file_checksum(file_path):
+    hasher = hashlib.md5()
+    with open(file_path, 'rb') as fp:
+        for chunk in iter(lambda: fp.read(_CHUNK_SIZE), b''):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+class WindFileRegistry:
+    """
+    SQLite database of generated wind files by the hash of the wind generation input that created them.
+    Files are verified by size before being reused, and by checksum if they have been modified since being registered
+    """
+
+    def __init__(self, database_path):
+        """Initialises :class:`WindFileRegistry`
+
+        :param database_path: Path of the SQLite database file, which is created when the first file is registered
+        :type database_path: path-like
+        """
+        self._database_path = path.abspath(database_path)
+
+    @property
+    def database_path(self):
+        """
+        :return: Path of the SQLite database file
+        """
+        return self._database_path
+
+    def lookup(self, wind_hash):
+        """
+        Find a registered wind file. Entries for files that have been deleted or altered are removed
+        :param wind_hash: Hash of the wind generation input
+        :return: Path of the wind file, or `None` if there is no valid registered file
+        """
+        if not path.isfile(self._database_path):
+            return None
+        with closing(self._connect()) as connection:
+            with connection:
+                return self._verified_file(connection, wind_hash)
+
+    def register(self, wind_hash, file_path):
+        """
+        Register a generated wind file, replacing any existing entry for the hash
+        :param wind_hash: Hash of the wind generation input
+        :param file_path: Path of the wind file
+        """
+        file_path = path.abspath(file_path)
+        stat = os.stat(file_path)
+        checksum = _file_checksum(file_path)
+        os.makedirs(path.dirname(self._database_path), exist_ok=True)
+        with closing(self._connect()) as connection:
+            with connection:
+                connection.execute(
+                    'INSERT OR REPLACE INTO wind_files (wind_hash, file_path, size, mtime_ns, checksum) '
+                    'VALUES (?, ?, ?, ?, ?)',
+                    (wind_hash, file_path, stat.st_size, stat.st_mtime_ns, checksum)
+                )
+
+    @staticmethod
+    def _verified_file(connection, wind_hash):
+        row = connection.execute(
+            'SELECT file_path, size, mtime_ns, checksum FROM wind_files WHERE wind_hash = ?', (wind_hash,)
+        ).fetchone()
+        if row is None:
+            return None
+        file_path, size, mtime_ns, checksum = row
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            stat = None
+        if stat is None or stat.st_size != size or \
+                (stat.st_mtime_ns != mtime_ns and _file_checksum(file_path) != checksum):
+            connection.execute('DELETE FROM wind_files WHERE wind_hash = ?', (wind_hash,))
+            return None
+        if stat.st_mtime_ns != mtime_ns:
+            # Only checksum files again when they are touched
+            connection.execute('UPDATE wind_files SET mtime_ns = ? WHERE wind_hash = ?', (stat.st_mtime_ns, wind_hash))
+        return file_path
+
+    def _connect(self):
+        # Several worker processes, or users on a shared file system, may register files at the same time
+        connection = sqlite3.connect(self._database_path, timeout=60.0)
+        connection.execute(
+            'CREATE TABLE IF NOT EXISTS wind_files ('
+            'wind_hash TEXT PRIMARY KEY, file_path TEXT NOT NULL, size INTEGER NOT NULL, '
+            'mtime_ns INTEGER NOT NULL, checksum TEXT NOT NULL)'
+        )
+        return connection
@@ -0,0 +1,170 @@
+# spawnwind
+# Copyright (C) 2018-2019, Simmovation Ltd.
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301  USA
+"""
+Parallel generation of tasks from a specification, spawning the leaves on a pool of processes
+"""
+import os
+import math
+from multiprocessing import Pool
+
+from luigi import configuration
+from spawn.util import PathBuilder, TypedProperty
+from spawn.specification.specification import SpecificationNode, IndexedNode
+
+from .nrel.input_files import close_background_writers
+from .profiling import profiler
+from .schedulers import BackgroundWriteLuigiScheduler
+
+# Spawner of each worker process, which is sent once when the process starts rather than with every chunk of leaves
+_WORKER_STATE = {}
+
+
+def generate_tasks_in_parallel(task_spawner, node, base_path, processes=None, chunk_size=None):
+    """
+    Generate tasks from a specification node, as :func:`spawn.tasks.generate.generate_tasks_from_spec` does, but
+    spawning the leaves in parallel. The specification tree is walked in this process to collect the property values of
+    each leaf. Chunks of leaves are then sent to the pool, where each leaf is spawned from a branch of the spawner with
+    its property values set in order, and the tasks are rebuilt in this process. Tasks spawned by several leaves with
+    equal IDs (such as wind generation tasks) are rebuilt once, from the first leaf in specification order, so the
+    task graph is the same as when spawned in series. If :data:`spawnwind.profiling.profiler` is enabled, the counts and
+    times of the processes are added to it
+
+    :param task_spawner: The spawner, which must be picklable
+    :type task_spawner: :class:`TaskSpawner`
+    :param node: The specification node from which to generate tasks
+    :type node: :class:`SpecificationNode`
+    :param base_path: Root output directory
+    :param processes: Number of processes. Defaults to the number of CPUs
+    :param chunk_size: Number of leaves sent to a process at a time. Defaults to giving each process four chunks
+    :returns: List of tasks, in specification order
+    """
+    if not isinstance(node, SpecificationNode):
+        raise ValueError('node must be of type ' + SpecificationNode.__name__)
+    leaves = list(_collect_leaves(node, (), base_path))
+    processes = processes or os.cpu_count() or 1
+    chunk_size = chunk_size or max(1, math.ceil(len(leaves) / (processes * 4)))
+    chunks = [leaves[i:i + chunk_size] for i in range(0, len(leaves), chunk_size)]
+    initargs = (task_spawner, _luigi_config_sections(), profiler.enabled)
+    with Pool(processes, initializer=_initialise_worker, initargs=initargs) as pool:
+        results = pool.map(_spawn_chunk, chunks)
+    descriptions = []
+    for chunk_descriptions, profile in results:
+        descriptions.extend(chunk_descriptions)
+        if profile is not None:
+            profiler.merge(profile)
+    rebuilt_tasks = {}
+    return [_rebuild_task(description, rebuilt_tasks) for description in descriptions]
+
+
+class ParallelLuigiScheduler(BackgroundWriteLuigiScheduler):
+    """Implementation of :class:`LuigiScheduler` that spawns tasks with :func:`generate_tasks_in_parallel`
+    """
+    def __init__(self, config, processes=None):
+        """Initialise the :class:`ParallelLuigiScheduler`
+
+        :param config: Configuration object
+        :type config: :class:`ConfigurationBase`
+        :param processes: Number of spawning processes. Defaults to the number of CPUs
+        :type processes: int
+        """
+        super().__init__(config)
+        self._processes = processes
+
+    def _generate_tasks(self, spawner, spec):
+        return generate_tasks_in_parallel(spawner, spec.root_node, self._out_dir, self._processes)
+
+
+def _collect_leaves(node, properties, base_path):
+    if node.has_property:
+        index = node.index if isinstance(node, IndexedNode) else None
+        properties = properties + ((node.property_name, node.property_value, index),)
+    if not node.children:
+        yield (
+            str(PathBuilder(base_path).join(node.path)),
+            {**node.ghosts, **node.collected_properties},
+            properties
+        )
+    for child in node.children:
+        yield from _collect_leaves(child, properties, base_path)
+
+
+def _luigi_config_sections():
+    # Tasks built in the workers take parameters, such as the executables, from the luigi configuration set by
+    # `create_spawner`, which processes that are started rather than forked do not have
+    config = configuration.get_config()
+    return {section: dict(config.items(section, raw=True)) for section in config.sections()}
+
+
+def _initialise_worker(task_spawner, luigi_config_sections, profile):
+    config = configuration.get_config()
+    for section, options in luigi_config_sections.items():
+        for name, value in options.items():
+            config.set(section, name, value)
+    # Forked workers start with the counts of this process, which are cleared so that only their own are returned
+    profiler.reset()
+    if profile:
+        profiler.enable()
+    else:
+        profiler.disable()
+    _WORKER_STATE['spawner'] = task_spawner
+
+
+def _spawn_chunk(leaves):
+    descriptions = [_describe_task(_spawn_leaf(_WORKER_STATE['spawner'], *leaf)) for leaf in leaves]
+    # Files written in the background by the worker must be written before its tasks are scheduled
+    close_background_writers()
+    if not profiler.enabled:
+        return descriptions, None
+    # The counts and times of the chunk are returned to be added to the profile of the spawning process
+    profile = profiler.summary()
+    profiler.reset()
+    return descriptions, profile
+
+
+def _spawn_leaf(task_spawner, path_, metadata, properties):
+    branch = task_spawner.branch()
+    for name, value, index in properties:
+        value = _check_type(branch, name, value)
+        if index is not None:
+            getattr(branch, name)[index] = value
+        else:
+            setattr(branch, name, value)
+    return branch.spawn(path_, metadata)
+
+
+def _check_type(task_spawner, name, value):
+    attribute = getattr(type(task_spawner), name, None)
+    if isinstance(attribute, TypedProperty) and not isinstance(value, attribute.type):
+        return attribute.type(value)
+    return value
+
+
+def _describe_task(task):
+    # Tasks are described by their class and parameters, from which they are rebuilt, rather than pickled
+    kwargs = dict(task.param_kwargs)
+    kwargs['_dependencies'] = [_describe_task(dependency) for dependency in kwargs.get('_dependencies', [])]
+    return type(task), kwargs
+
+
+def _rebuild_task(description, rebuilt_tasks):
+    task_cls, kwargs = description
+    key = (task_cls, kwargs['_id'])
+    if key not in rebuilt_tasks:
+        kwargs = dict(kwargs)
+        kwargs['_dependencies'] = [_rebuild_task(d, rebuilt_tasks) for d in kwargs['_dependencies']]
+        rebuilt_tasks[key] = task_cls(**kwargs)
+    return rebuilt_tasks[key]
@@ -0,0 +1,179 @@
+# spawnwind
+# Copyright (C) 2018-2019, Simmovation Ltd.
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301  USA
+"""
+Counters and timers of the phases of spawning, which are off unless enabled and are summarised as JSON
+"""
+import json
+import time
+import atexit
+import threading
+import functools
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class _Timer:
+    __slots__ = ('_profiler', '_name', '_start')
+
+    def __init__(self, profiler_, name):
+        self._profiler = profiler_
+        self._name = name
+        self._start = None
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        # pylint: disable=protected-access
+        self._profiler._add_time(self._name, time.perf_counter() - self._start)
+
+
+class Profiler:
+    """
+    Thread-safe counters and timers. While disabled, counting and timing do nothing, so instrumented code runs at
+    almost full speed. Timed phases may be nested, in which case the time of the inner phase is also counted in the
+    outer phase
+    """
+
+    def __init__(self):
+        """Initialises :class:`Profiler`
+        """
+        self._enabled = False
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._timers = {}
+        self._start_time = None
+
+    @property
+    def enabled(self):
+        """
+        :return: `True` if counting and timing
+        """
+        return self._enabled
+
+    def enable(self, summary_file=None):
+        """
+        Start counting and timing
+        :param summary_file: Path of a file to which the JSON summary is written when the process exits
+        """
+        if not self._enabled:
+            self._enabled = True
+            self._start_time = time.perf_counter()
+        if summary_file:
+            atexit.register(self.write_summary, summary_file)
+
+    def disable(self):
+        """
+        Stop counting and timing, keeping the counts and times so far
+        """
+        self._enabled = False
+
+    def reset(self):
+        """
+        Clear all counts and times
+        """
+        with self._lock:
+            self._counters = {}
+            self._timers = {}
+            self._start_time = time.perf_counter()
+
+    def count(self, name, number=1):
+        """
+        Add to a counter
+        :param name: Name of the counter
+        :param number: Number to add
+        """
+        if self._enabled:
+            with self._lock:
+                self._counters[name] = self._counters.get(name, 0) + number
+
+    def time(self, name):
+        """
+        Time a phase, which is counted each time it is timed
+        :param name: Name of the phase
+        :return: Context manager timing the code it encloses
+        """
+        return _Timer(self, name) if self._enabled else _NULL_TIMER
+
+    def summary(self):
+        """
+        :return: Dictionary of the counters, the count and total time in seconds of each phase and the time since
+            profiling was enabled
+        """
+        with self._lock:
+            return {
+                'elapsed_seconds': time.perf_counter() - self._start_time if self._start_time is not None else 0.0,
+                'counters': dict(sorted(self._counters.items())),
+                'timers': {name: {'count': count, 'total_seconds': total}
+                           for name, (count, total) in sorted(self._timers.items())}
+            }
+
+    def merge(self, summary):
+        """
+        Add the counts and times of a summary, such as that of another process, to this profiler
+        :param summary: Summary returned by :meth:`summary`
+        """
+        with self._lock:
+            for name, number in summary['counters'].items():
+                self._counters[name] = self._counters.get(name, 0) + number
+            for name, timer in summary['timers'].items():
+                count, total = self._timers.get(name, (0, 0.0))
+                self._timers[name] = (count + timer['count'], total + timer['total_seconds'])
+
+    def write_summary(self, file_path):
+        """
+        Write the summary as JSON
+        :param file_path: Path of the file to write
+        """
+        with open(file_path, 'w') as fp:
+            json.dump(self.summary(), fp, indent=2)
+
+    def _add_time(self, name, seconds):
+        with self._lock:
+            count, total = self._timers.get(name, (0, 0.0))
+            self._timers[name] = (count + 1, total + seconds)
+
+
+def timed(name):
+    """
+    Decorator timing each call of a function as a phase of :data:`profiler`
+    :param name: Name of the phase
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not profiler.enabled:
+                return func(*args, **kwargs)
+            with profiler.time(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+profiler = Profiler()
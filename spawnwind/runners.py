@@ -0,0 +1,35 @@
+# spawnwind
+# Copyright (C) 2018-2019, Simmovation Ltd.
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301  USA
+"""Runners for simulation tasks, in addition to those of :mod:`spawn.runners`
+"""
+import sys
+
+from spawn.runners import ProcessRunner
+
+
+class PythonScriptRunner(ProcessRunner):
+    """Runner for executables that are Python scripts, such as stand-ins for FAST and TurbSim when load testing. The
+    script is run by the interpreter running spawnwind, so it need not be executable itself
+    """
+    @property
+    def process_args(self):
+        """The arguments to be provided to the subprocess
+
+        :returns: The Python interpreter, the script and the input file
+        :rtype: list
+        """
+        return [sys.executable] + super().process_args
@@ -0,0 +1,54 @@
+# spawnwind
+# Copyright (C) 2018-2019, Simmovation Ltd.
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301  USA
+"""
+Luigi scheduler that writes the input files queued in the background before any task is scheduled
+"""
+import logging
+
+from luigi import build
+from spawn.schedulers import LuigiScheduler
+from spawn.tasks.generate import generate_tasks_from_spec
+
+from .nrel.input_files import close_background_writers
+
+LOGGER = logging.getLogger()
+
+
+class BackgroundWriteLuigiScheduler(LuigiScheduler):
+    """Implementation of :class:`LuigiScheduler` that, once the tasks are generated, writes all files queued by
+    :class:`BackgroundFileWriter` and stops their threads before the tasks are scheduled
+    """
+    def run(self, spawner, spec):
+        """Run the spec by generating tasks using the spawner
+
+        :param spawner: The task spawner
+        :type spawner: :class:`TaskSpawner`
+        :param spec: The specification
+        :type spec: :class:`SpecificationModel`
+        """
+        tasks = self._generate_tasks(spawner, spec)
+        close_background_writers()
+        success = build(
+            tasks, worker_scheduler_factory=self._worker_scheduler_factory,
+            local_scheduler=self._local, workers=self._workers,
+            scheduler_port=self._port, scheduler_host=self._host
+        )
+        if not success:
+            LOGGER.error('Error running spawn tasks - see logs for details')
+
+    def _generate_tasks(self, spawner, spec):
+        return generate_tasks_from_spec(spawner, spec.root_node, self._out_dir)
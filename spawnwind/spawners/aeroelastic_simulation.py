@@ -34,6 +34,21 @@ class AeroelasticSimulationSpawner(TaskSpawner):
         doc='Simulation time in seconds, excluding time before start of output',
         abstract=True
     )
+    output_time_step = FloatProperty(doc='Time step in seconds between output samples', abstract=True)
+    output_format = StringProperty(
+        possible_values=['text', 'binary', 'both'],
+        doc="""Format of the output file:
+        'text' - text file only
+        'binary' - binary file only
+        'both' - text and binary files
+        """,
+        abstract=True
+    )
+    output_channels = TypedProperty(
+        (list, tuple, str),
+        doc='Names of the channels written to the output, as a list or a comma-separated string',
+        abstract=True
+    )
 
     # Initial conditions
     initial_rotor_speed = FloatProperty(doc='Rotor speed at start of simulation in rpm', abstract=True)
@@ -34,3 +34,10 @@ class WindGenerationSpawner(TaskSpawner):
     turbulence_seed = IntProperty(doc='Random number seed for turbulence generation', abstract=True)
     wind_shear = FloatProperty(doc='Vertical wind shear exponent', abstract=True)
     upflow = FloatProperty(doc='Wind inclination in degrees from the horizontal', abstract=True)
+
+    def registered_wind_file(self):
+        """Find an existing wind file generated from the same inputs as this spawner would spawn a task with
+
+        :returns: Path of the wind file, or `None` if there is none
+        """
+        return None
@@ -0,0 +1,137 @@
+# spawn
+# Copyright (C) 2018, Simmovation Ltd.
+# 
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301  USA
+import math
+from os import path
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+# pylint: disable=wrong-import-position
+from spawnwind.nrel import FastSimulationTask
+from spawnwind.analysis import turning_points, rainflow, damage_sums, weibull_bin_probabilities, \
+    run_set_equivalent_loads, lifetime_equivalent_loads
+
+
+def _reference_rainflow(values):
+    """Four-point rainflow counting, one turning point at a time"""
+    points = [values[0]]
+    for value in values[1:]:
+        if value == points[-1]:
+            continue
+        if len(points) >= 2 and (points[-1] - points[-2]) * (value - points[-1]) > 0:
+            points[-1] = value
+        else:
+            points.append(value)
+    stack, ranges = [], []
+    for point in points:
+        stack.append(point)
+        while len(stack) >= 4:
+            a, b, c, d = stack[-4:]
+            if abs(c - b) <= abs(b - a) and abs(c - b) <= abs(d - c):
+                ranges.append(abs(c - b))
+                del stack[-3:-1]
+            else:
+                break
+    half_ranges = [abs(b - a) for a, b in zip(stack[:-1], stack[1:])]
+    return sorted(ranges), sorted(half_ranges)
+
+
+def test_turning_points_of_series_with_plateaus():
+    values = [0.0, 1.0, 2.0, 2.0, 1.0, 1.0, 3.0, 3.0, 3.0, 0.0]
+    assert list(turning_points(values)) == [0.0, 2.0, 1.0, 3.0, 0.0]
+
+
+def test_rainflow_counts_closed_cycle_and_residue():
+    ranges, counts = rainflow([0.0, 5.0, 1.0, 4.0, 0.0])
+    assert sorted(zip(ranges, counts)) == [(3.0, 1.0), (5.0, 0.5), (5.0, 0.5)]
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_rainflow_equals_reference(seed):
+    values = np.cumsum(np.random.RandomState(seed).normal(size=2000))
+    if seed == 0:
+        values = np.round(values)  # equal ranges
+    ranges, counts = rainflow(values)
+    expected_full, expected_half = _reference_rainflow(list(values))
+    assert sorted(ranges[counts == 1.0]) == pytest.approx(expected_full)
+    assert sorted(ranges[counts == 0.5]) == pytest.approx(expected_half)
+
+
+def test_rainflow_of_short_series():
+    assert len(rainflow([])[0]) == 0
+    ranges, counts = rainflow([1.0, 3.0])
+    assert list(ranges) == [2.0] and list(counts) == [0.5]
+
+
+def test_damage_sums_of_sine_wave():
+    time = np.linspace(0.0, 100.0, 100001)
+    values = 3.0 * np.sin(2 * math.pi * time)
+    sums = damage_sums(values, [1, 4])
+    # 99 closed cycles of range 6 and residue half cycles of 3, 6 and 3
+    assert sums[0] == pytest.approx(99 * 6.0 + 0.5 * (3.0 + 6.0 + 3.0), rel=1e-6)
+    assert sums[1] == pytest.approx(99 * 6.0 ** 4 + 0.5 * (3.0 ** 4 + 6.0 ** 4 + 3.0 ** 4), rel=1e-6)
+
+
+def test_weibull_bin_probabilities_of_rayleigh_distribution():
+    probabilities = weibull_bin_probabilities([4.0, 6.0, 8.0], 10.0)
+    scale = 2.0 * 10.0 / math.sqrt(math.pi)
+    assert probabilities[6.0] == pytest.approx(math.exp(-(5.0 / scale) ** 2) - math.exp(-(7.0 / scale) ** 2))
+    assert probabilities[4.0] == pytest.approx(math.exp(-(3.0 / scale) ** 2) - math.exp(-(5.0 / scale) ** 2))
+
+
+def _spawned_task(tmpdir, write_outb, name, metadata, amplitude):
+    run_dir = tmpdir.mkdir(name)
+    task = FastSimulationTask(name, _input_file_path=path.join(run_dir, 'fast.fst'), _exe_path='',
+                              _runner_type='process', _metadata=metadata)
+    time = np.arange(0.0, 100.0, 0.01)
+    values = amplitude * np.sin(2 * math.pi * time)[:, np.newaxis]
+    write_outb(task.output().path, 3, time, values, ['RootMyb1'])
+    return task
+
+
+def test_run_set_equivalent_loads_of_sine_waves(tmpdir, write_outb):
+    tasks = [_spawned_task(tmpdir, write_outb, 'a', {'wind_speed': 8.0}, 1.0),
+             _spawned_task(tmpdir, write_outb, 'b', {'wind_speed': 10.0}, 2.0)]
+    columns = run_set_equivalent_loads(tasks, exponents=[4, 10], processes=1)
+    assert list(columns['channel']) == ['RootMyb1'] * 4
+    assert list(columns['exponent']) == [4.0, 10.0, 4.0, 10.0]
+    assert list(columns['wind_speed']) == [8.0, 8.0, 10.0, 10.0]
+    # 1 Hz sine waves, so the 1 Hz equivalent load is the range of the sine wave
+    assert columns['equivalent_load'] == pytest.approx([2.0, 2.0, 4.0, 4.0], rel=1e-2)
+
+
+def test_run_set_equivalent_loads_raises_value_error_when_metadata_clashes_with_result_column(tmpdir, write_outb):
+    tasks = [_spawned_task(tmpdir, write_outb, 'a', {'wind_speed': 8.0, 'exponent': 3}, 1.0)]
+    with pytest.raises(ValueError):
+        run_set_equivalent_loads(tasks, exponents=[4], processes=1)
+
+
+def test_lifetime_equivalent_loads_weight_simulations_by_wind_speed(tmpdir, write_outb):
+    tasks = [_spawned_task(tmpdir, write_outb, 'a', {'wind_speed': 8.0, 'turbulence_seed': 1}, 1.0),
+             _spawned_task(tmpdir, write_outb, 'b', {'wind_speed': 8.0, 'turbulence_seed': 2}, 1.0),
+             _spawned_task(tmpdir, write_outb, 'c', {'wind_speed': 10.0}, 2.0),
+             _spawned_task(tmpdir, write_outb, 'd', {'wind_file': 'gust.wnd'}, 100.0)]
+    lifetime_years, exponent = 20.0, 4
+    columns = lifetime_equivalent_loads(tasks, 10.0, exponents=[exponent], lifetime_years=lifetime_years,
+                                        equivalent_cycles=1e7, processes=1)
+    probabilities = weibull_bin_probabilities([8.0, 10.0], 10.0)
+    lifetime = lifetime_years * 365.25 * 24 * 3600
+    # The simulations at 8 m/s share its probability; each 100 s simulation has about 100 cycles of its range
+    damage = lifetime * (probabilities[8.0] * 2.0 ** exponent + probabilities[10.0] * 4.0 ** exponent)
+    assert list(columns['channel']) == ['RootMyb1']
+    assert columns['equivalent_load'][0] == pytest.approx((damage / 1e7) ** (1.0 / exponent), rel=1e-2)
@@ -0,0 +1,122 @@
+# spawn
+# Copyright (C) 2018, Simmovation Ltd.
+# 
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301  USA
+import csv
+from os import path
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+# pylint: disable=wrong-import-position
+from spawnwind.nrel import FastSimulationTask
+from spawnwind.analysis import StreamingStatistics, output_statistics, run_set_statistics, read_table
+
+CHANNELS = ['GenPwr', 'TwrBsMyt']
+
+
+def _time_and_values(seed):
+    time = np.arange(0.0, 60.0, 0.05)
+    values = np.random.RandomState(seed).normal(size=(len(time), len(CHANNELS))) * [100.0, 1e4] + [1e3, 5e4]
+    return time, values
+
+
+def _expected(time, values):
+    return {
+        name: {
+            'min': values[:, i].min(), 'max': values[:, i].max(),
+            'mean': values[:, i].mean(), 'std': values[:, i].std(),
+            'time_of_min': time[values[:, i].argmin()], 'time_of_max': time[values[:, i].argmax()]
+        } for i, name in enumerate(CHANNELS)
+    }
+
+
+def _assert_statistics_equal(actual, expected):
+    assert set(actual) == set(expected)
+    for name in expected:
+        for statistic, value in expected[name].items():
+            assert actual[name][statistic] == pytest.approx(value, rel=1e-9), (name, statistic)
+
+
+@pytest.mark.parametrize('chunk_size', [1, 7, 100, 10000])
+def test_streaming_statistics_equal_those_of_whole_series(chunk_size):
+    time, values = _time_and_values(0)
+    statistics = StreamingStatistics(CHANNELS)
+    for begin in range(0, len(time), chunk_size):
+        rows = slice(begin, begin + chunk_size)
+        statistics.update(time[rows], {name: values[rows, i] for i, name in enumerate(CHANNELS)})
+    _assert_statistics_equal(statistics.result(), _expected(time, values))
+
+
+def test_statistics_without_values_are_nan():
+    result = StreamingStatistics(CHANNELS).result()
+    assert all(np.isnan(v) for statistics in result.values() for v in statistics.values())
+
+
+def test_output_statistics_read_in_chunks(tmpdir, write_outb):
+    time, values = _time_and_values(1)
+    file_path = path.join(tmpdir, 'fast.outb')
+    write_outb(file_path, 3, time, values, CHANNELS)
+    result = output_statistics(file_path, chunk_size=64, start_time=10.0)
+    in_window = time >= 10.0 - 1e-9
+    _assert_statistics_equal(result, _expected(time[in_window], values[in_window]))
+
+
+def _spawned_task(tmpdir, write_outb, name, metadata, seed):
+    run_dir = tmpdir.mkdir(name)
+    task = FastSimulationTask(name, _input_file_path=path.join(run_dir, 'fast.fst'), _exe_path='',
+                              _runner_type='process', _metadata=metadata)
+    if seed is not None:
+        write_outb(task.output().path, 3, *_time_and_values(seed), CHANNELS)
+    return task
+
+
+@pytest.mark.parametrize('processes', [1, 2])
+def test_run_set_statistics_has_row_per_channel_of_each_completed_run(tmpdir, write_outb, processes):
+    tasks = [
+        _spawned_task(tmpdir, write_outb, 'a', {'wind_speed': 8.0, 'turbulence_seed': 1}, 2),
+        _spawned_task(tmpdir, write_outb, 'b', {'wind_speed': 10.0, 'initial_yaw': -8.0}, 3),
+        _spawned_task(tmpdir, write_outb, 'not_run', {'wind_speed': 12.0}, None)
+    ]
+    table_file = path.join(tmpdir, 'statistics.npz')
+    columns = run_set_statistics(tasks, processes=processes, table_file=table_file)
+    assert list(columns) == ['output_file', 'initial_yaw', 'turbulence_seed', 'wind_speed', 'channel', 'min', 'max',
+                             'mean', 'std', 'time_of_min', 'time_of_max']
+    assert list(columns['output_file']) == [tasks[0].output().path] * 2 + [tasks[1].output().path] * 2
+    assert list(columns['channel']) == CHANNELS * 2
+    assert list(columns['wind_speed']) == [8.0, 8.0, 10.0, 10.0]
+    assert np.isnan(columns['initial_yaw'][0]) and columns['initial_yaw'][2] == -8.0
+    expected = _expected(*_time_and_values(3))
+    assert columns['max'][3] == pytest.approx(expected['TwrBsMyt']['max'])
+    stored = read_table(table_file)
+    assert list(stored) == list(columns)
+    assert np.array_equal(stored['mean'], columns['mean'])
+
+
+def test_run_set_statistics_raises_value_error_when_metadata_clashes_with_result_column(tmpdir, write_outb):
+    tasks = [_spawned_task(tmpdir, write_outb, 'a', {'wind_speed': 8.0, 'channel': 'blade 1'}, 2)]
+    with pytest.raises(ValueError):
+        run_set_statistics(tasks, processes=1)
+
+
+def test_run_set_statistics_written_as_csv(tmpdir, write_outb):
+    tasks = [_spawned_task(tmpdir, write_outb, 'a', {'wind_speed': 8.0}, 4)]
+    table_file = path.join(tmpdir, 'statistics.csv')
+    run_set_statistics(tasks, processes=1, table_file=table_file)
+    with open(table_file) as fp:
+        rows = list(csv.DictReader(fp))
+    assert [row['channel'] for row in rows] == CHANNELS
+    assert float(rows[0]['wind_speed']) == 8.0
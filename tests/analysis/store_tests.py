@@ -0,0 +1,95 @@
+# spawn
+# Copyright (C) 2018, Simmovation Ltd.
+# 
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301  USA
+import os
+from os import path
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+# pylint: disable=wrong-import-position
+from spawnwind.nrel import FastSimulationTask
+from spawnwind.analysis import ColumnarStore, collect_outputs, dlc_partition
+
+CHANNELS = ['GenPwr', 'TwrBsMyt']
+
+
+def _time_and_values(wind_speed, yaw):
+    time = np.arange(0.0, 20.0, 0.1)
+    values = np.stack([wind_speed * 100.0 + np.sin(time), yaw * 1000.0 + wind_speed * np.cos(time)], axis=1)
+    return time, values
+
+
+@pytest.fixture
+def spawned_tasks(tmpdir, write_outb):
+    runs_dir = str(tmpdir.mkdir('runs'))
+    tasks = []
+    for dlc in ['dlc1.2', 'dlc6.4']:
+        for wind_speed in [8.0, 10.0]:
+            for yaw in [-10.0, 10.0]:
+                run_dir = path.join(runs_dir, 'fatigue', dlc, 'WS_{}'.format(wind_speed), 'yaw{}'.format(yaw))
+                os.makedirs(run_dir)
+                task = FastSimulationTask('{}_{}_{}'.format(dlc, wind_speed, yaw),
+                                          _input_file_path=path.join(run_dir, 'fast.fst'), _exe_path='',
+                                          _runner_type='process',
+                                          _metadata={'wind_speed': wind_speed, 'initial_yaw': yaw})
+                write_outb(task.output().path, 3, *_time_and_values(wind_speed, yaw), CHANNELS)
+                tasks.append(task)
+    return runs_dir, tasks
+
+
+def test_dlc_partition_is_first_dlc_directory():
+    assert dlc_partition(path.join('fatigue', 'dlc1.2', 'WS_8', 'yaw-10', 'fast.outb'), {}) == 'dlc1.2'
+    assert dlc_partition(path.join('custom', 'run1', 'fast.outb'), {}) == 'custom'
+    assert dlc_partition('fast.outb', {}) == 'default'
+
+
+@pytest.mark.parametrize('processes', [1, 2])
+def test_collects_partition_per_dlc(tmpdir, spawned_tasks, processes):
+    runs_dir, tasks = spawned_tasks
+    store = collect_outputs(tasks, path.join(tmpdir, 'store'), runs_dir, processes=processes)
+    assert store.partitions == ['dlc1.2', 'dlc6.4']
+    assert store.channels('dlc1.2') == CHANNELS
+    runs = store.runs('dlc1.2')
+    assert sorted(runs) == ['initial_yaw', 'output_file', 'row_count', 'row_start', 'wind_speed']
+    assert list(runs['wind_speed']) == [8.0, 8.0, 10.0, 10.0]
+    assert list(runs['row_count']) == [200] * 4
+    assert list(runs['row_start']) == [0, 200, 400, 600]
+
+
+def test_select_reads_matching_runs(tmpdir, spawned_tasks):
+    runs_dir, tasks = spawned_tasks
+    store = collect_outputs(tasks, path.join(tmpdir, 'store'), runs_dir, processes=1)
+    selected = store.select('dlc1.2', ['Time', 'TwrBsMyt'], initial_yaw=10.0)
+    assert [metadata['initial_yaw'] for metadata, _ in selected] == [10.0, 10.0]
+    for metadata, channels in selected:
+        time, values = _time_and_values(metadata['wind_speed'], 10.0)
+        assert 'dlc1.2' in metadata['output_file']
+        assert np.allclose(channels['Time'], time)
+        assert np.allclose(channels['TwrBsMyt'], values[:, 1], rtol=1e-6)
+    assert max(channels['TwrBsMyt'].max() for _, channels in selected) == pytest.approx(10010.0, rel=1e-6)
+
+
+def test_collects_selected_channels_in_time_window(tmpdir, spawned_tasks):
+    runs_dir, tasks = spawned_tasks
+    store = collect_outputs(tasks, path.join(tmpdir, 'store'), runs_dir, channels=['GenPwr'], start_time=10.0,
+                            processes=1)
+    assert store.channels('dlc6.4') == ['GenPwr']
+    (_, channels), = ColumnarStore(path.join(tmpdir, 'store')).select('dlc6.4', ['Time', 'GenPwr'], wind_speed=8.0,
+                                                                      initial_yaw=-10.0)
+    assert channels['Time'][0] == pytest.approx(10.0)
+    assert len(channels['GenPwr']) == 100
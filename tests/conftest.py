@@ -14,6 +14,7 @@
 # You should have received a copy of the GNU General Public License
 # along with this program; if not, write to the Free Software Foundation,
 # Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301  USA
+import struct
 from os import path, pardir
 
 import pytest
@@ -113,3 +114,42 @@ def plugin_loader(tmpdir, fast_version, fast_input_file, exe_paths, turbsim_inpu
         outdir=str(tmpdir)
     )
     return PluginLoader(CompositeConfiguration(command_line_configuration, default_config))
+
+@pytest.fixture(scope='session')
+def write_outb():
+    np = pytest.importorskip('numpy')
+
+    def _names(names, length):
+        return b''.join(n.ljust(length).encode('ascii') for n in names)
+
+    def _write_outb(file_path, file_id, time, values, channels, units=None):
+        """Write an .outb file in the layout FAST uses for each FileID, with 16-bit channels scaled to their range"""
+        units = units or ['(-)'] * len(channels)
+        num_samples, num_channels = values.shape
+        name_length = 12 if file_id == 4 else 10
+        with open(file_path, 'wb') as fp:
+            fp.write(struct.pack('<h', file_id))
+            if file_id == 4:
+                fp.write(struct.pack('<h', name_length))
+            fp.write(struct.pack('<ii', num_channels, num_samples))
+            if file_id == 1:
+                time_scale, time_offset = 1000.0, 0.0
+                fp.write(struct.pack('<dd', time_scale, time_offset))
+            else:
+                fp.write(struct.pack('<dd', time[0], time[1] - time[0]))
+            if file_id != 3:
+                minimum, maximum = values.min(axis=0), values.max(axis=0)
+                scales = (65535.0 / np.maximum(maximum - minimum, 1e-6)).astype(np.float32)
+                offsets = (-32768.0 - minimum * scales).astype(np.float32)
+                fp.write(scales.tobytes() + offsets.tobytes())
+            description = b'Test output'
+            fp.write(struct.pack('<i', len(description)) + description)
+            fp.write(_names(['Time'] + channels, name_length))
+            fp.write(_names(['(s)'] + units, name_length))
+            if file_id == 1:
+                fp.write(np.round(time * time_scale + time_offset).astype('<i4').tobytes())
+            if file_id == 3:
+                fp.write(values.astype('<f8').tobytes())
+            else:
+                fp.write(np.round(values * scales + offsets).astype('<i2').tobytes())
+    return _write_outb
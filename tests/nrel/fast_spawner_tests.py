@@ -14,14 +14,22 @@
 # You should have received a copy of the GNU General Public License
 # along with this program; if not, write to the Free Software Foundation,
 # Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301  USA
+import os
 from os import path
+import pickle
+import multiprocessing
 import tempfile
+import threading
 import pytest
 from spawn.config.command_line import CommandLineConfiguration
 from spawn.schedulers.luigi import LuigiScheduler
 from spawn.parsers import SpecificationParser, DictSpecificationProvider
 
-from spawnwind.nrel import TurbsimSpawner, FastSimulationSpawner, TurbsimInput, WindGenerationTask
+from spawnwind.nrel import TurbsimSpawner, FastSimulationSpawner, TurbsimInput, WindGenerationTask, ModuleStore, \
+    BackgroundFileWriter
+from spawnwind.nrel.nrel_input_line import parse_lines
+from spawnwind.nrel import input_files
+from spawnwind.nrel.input_files import _BACKGROUND_WRITERS
 
 @pytest.fixture(scope='function')
 def turbsim_input(turbsim_input_file):
@@ -106,6 +114,119 @@ def test_run_succeeds_with_large_output_start_time_with_branching(turbsim_input,
     task.run()
     assert task.complete()
 
+def _read_spawned_value(folder, key):
+    for file_name in ['fast.input', 'EDFile.input']:
+        file_path = path.join(folder, file_name)
+        if path.isfile(file_path):
+            with open(file_path) as fp:
+                for line in fp:
+                    if line.split()[1:2] == [key]:
+                        return line.split()[0]
+    return None
+
+def test_branch_writes_edits_made_after_branching(turbsim_input, fast_input, tmpdir):
+    spawner = FastSimulationSpawner(fast_input, TurbsimSpawner(turbsim_input), tmpdir)
+    spawner.wind_file = path.join(tmpdir, 'wind.wnd')
+    branch = spawner.branch()
+    branch.initial_yaw = 12.5
+    branch.spawn(path.join(tmpdir, 'a'), {})
+    spawner.spawn(path.join(tmpdir, 'b'), {})
+    assert _read_spawned_value(path.join(tmpdir, 'a'), 'NacYaw') == '12.5'
+    assert _read_spawned_value(path.join(tmpdir, 'b'), 'NacYaw') in ['0', '0.0']
+
+def test_output_channels_are_selected_on_branch(turbsim_input, fast_input, tmpdir):
+    spawner = FastSimulationSpawner(fast_input, TurbsimSpawner(turbsim_input), tmpdir)
+    all_channels = spawner.output_channels
+    branch = spawner.branch()
+    branch.output_channels = 'GenPwr, RotSpeed'
+    assert sorted(branch.output_channels) == ['GenPwr', 'RotSpeed']
+    assert spawner.output_channels == all_channels
+    branch.output_channels = ['TwrBsMyt', 'GenPwr', 'RotSpeed']
+    assert sorted(branch.output_channels) == ['GenPwr', 'RotSpeed', 'TwrBsMyt']
+
+
+def test_output_channel_not_written_by_any_module_raises_value_error(turbsim_input, fast_input, tmpdir):
+    spawner = FastSimulationSpawner(fast_input, TurbsimSpawner(turbsim_input), tmpdir)
+    if fast_input.output_list_in_main_file:
+        spawner.output_channels = ['NotInBaseInput']
+        assert spawner.output_channels == ['NotInBaseInput']
+    else:
+        with pytest.raises(ValueError):
+            spawner.output_channels = ['NotInBaseInput']
+
+def test_output_time_step_is_set_on_branch(turbsim_input, fast_input, tmpdir):
+    spawner = FastSimulationSpawner(fast_input, TurbsimSpawner(turbsim_input), tmpdir)
+    time_step = spawner.output_time_step
+    branch = spawner.branch()
+    branch.output_time_step = 0.05
+    assert branch.output_time_step == pytest.approx(0.05)
+    assert spawner.output_time_step == pytest.approx(time_step)
+
+
+def test_output_time_step_that_is_not_multiple_of_time_step_raises_value_error_in_v7(turbsim_input, fast_input,
+                                                                                      fast_version, tmpdir):
+    if fast_version != 'v7':
+        pytest.skip('FAST v8 writes output at any time step')
+    spawner = FastSimulationSpawner(fast_input, TurbsimSpawner(turbsim_input), tmpdir)
+    with pytest.raises(ValueError):
+        spawner.output_time_step = 0.03
+
+
+@pytest.mark.parametrize('output_format,extension', [('text', '.out'), ('binary', '.outb'), ('both', '.outb')])
+def test_task_output_follows_output_format(turbsim_input, fast_input, tmpdir, output_format, extension):
+    spawner = FastSimulationSpawner(fast_input, TurbsimSpawner(turbsim_input), tmpdir)
+    spawner.wind_file = path.join(tmpdir, 'wind.wnd')
+    spawner.output_format = output_format
+    assert spawner.output_format == output_format
+    task = spawner.spawn(path.join(tmpdir, 'a'), {})
+    assert task.output().path == path.join(tmpdir, 'a', 'fast' + extension)
+
+
+def test_task_output_is_binary_when_input_has_no_output_format(turbsim_input, fast_input, fast_input_file, tmpdir):
+    with open(fast_input_file) as fp:
+        lines = [line for line in parse_lines(fp) if line.key != 'OutFileFmt']
+    fast_input = type(fast_input)(lines, path.dirname(path.abspath(fast_input_file)))
+    spawner = FastSimulationSpawner(fast_input, TurbsimSpawner(turbsim_input), tmpdir)
+    spawner.wind_file = path.join(tmpdir, 'wind.wnd')
+    assert spawner.spawn(path.join(tmpdir, 'a'), {}).output().path.endswith('.outb')
+
+
+def test_unknown_output_format_code_spawns_binary_output_and_raises_value_error_on_get(turbsim_input, fast_input,
+                                                                                        tmpdir):
+    fast_input['OutFileFmt'] = 5
+    spawner = FastSimulationSpawner(fast_input, TurbsimSpawner(turbsim_input), tmpdir)
+    spawner.wind_file = path.join(tmpdir, 'wind.wnd')
+    assert spawner.spawn(path.join(tmpdir, 'a'), {}).output().path.endswith('.outb')
+    with pytest.raises(ValueError):
+        spawner.output_format
+
+
+def test_compacting_spawns_task_with_compacted_channels(turbsim_input, fast_input, tmpdir):
+    spawner = FastSimulationSpawner(fast_input, TurbsimSpawner(turbsim_input), tmpdir, compact_output=True,
+                                    compact_channels=['genpwr', 'RotSpeed'])
+    spawner.wind_file = path.join(tmpdir, 'wind.wnd')
+    task = spawner.spawn(path.join(tmpdir, 'a'), {})
+    assert task.output().path == path.join(tmpdir, 'a', 'fast.npz')
+    assert list(task._compact_channels) == ['genpwr', 'RotSpeed']
+
+
+def test_compacting_text_output_raises_value_error_on_spawn(turbsim_input, fast_input, tmpdir):
+    spawner = FastSimulationSpawner(fast_input, TurbsimSpawner(turbsim_input), tmpdir, compact_output=True)
+    spawner.wind_file = path.join(tmpdir, 'wind.wnd')
+    spawner.output_format = 'text'
+    with pytest.raises(ValueError):
+        spawner.spawn(path.join(tmpdir, 'a'), {})
+
+
+def test_compacting_channel_not_in_output_lists_raises_value_error_on_spawn(turbsim_input, fast_input, tmpdir):
+    spawner = FastSimulationSpawner(fast_input, TurbsimSpawner(turbsim_input), tmpdir, compact_output=True,
+                                    compact_channels=['GenPwr', 'TwrBsMyt'])
+    spawner.wind_file = path.join(tmpdir, 'wind.wnd')
+    spawner.output_channels = ['GenPwr']
+    with pytest.raises(ValueError):
+        spawner.spawn(path.join(tmpdir, 'a'), {})
+
+
 def test_properties_of_spawner_sub_modules_are_independent_on_branches(turbsim_input, fast_input, tmpdir):
     spawner = FastSimulationSpawner(fast_input, TurbsimSpawner(turbsim_input), tmpdir)
     branch = spawner.branch()
@@ -126,3 +247,208 @@ def test_fails_with_invalid_parameter(turbsim_input, fast_input, tmpdir, plugin_
     config = CommandLineConfiguration(workers=2, runner_type='process', prereq_outdir='prerequisites', outdir=tmpdir, local=True)
     scheduler = LuigiScheduler(config)
     scheduler.run(spawner, spec)
+
+
+def test_sibling_branches_with_same_wind_share_wind_task(turbsim_input, fast_input, tmpdir):
+    spawner = FastSimulationSpawner(fast_input, TurbsimSpawner(turbsim_input), path.join(tmpdir, 'prereq'))
+    spawner.wind_type = 'bladed'
+    spawner.wind_speed = 8.0
+    branch_a = spawner.branch()
+    branch_a.initial_yaw = -8.0
+    branch_b = spawner.branch()
+    branch_b.initial_yaw = 8.0
+    task_a = branch_a.spawn(path.join(tmpdir, 'a'), {})
+    task_b = branch_b.spawn(path.join(tmpdir, 'b'), {'yaw': 8.0})
+    assert task_a.requires()[0] is task_b.requires()[0]
+    assert len(spawner._wind_input._wind_task_cache) == 1
+
+
+def test_shared_wind_task_is_prioritised_by_cost_of_dependent_simulations(turbsim_input, fast_input, tmpdir):
+    spawner = FastSimulationSpawner(fast_input, TurbsimSpawner(turbsim_input), path.join(tmpdir, 'prereq'))
+    spawner.wind_type = 'bladed'
+    spawner.wind_speed = 9.0
+    branch = spawner.branch()
+    branch.initial_yaw = 8.0
+    task_a = spawner.spawn(path.join(tmpdir, 'a'), {})
+    task_b = branch.spawn(path.join(tmpdir, 'b'), {})
+    wind_task = task_a.requires()[0]
+    assert task_a.priority > 0
+    assert wind_task.priority == task_a.priority + task_b.priority
+    assert wind_task.resources == {}
+
+
+def test_explicit_wind_file_is_spawned_when_turbsim_writes_no_full_field_file_in_v7(turbsim_input, fast_input,
+                                                                                     fast_version, tmpdir):
+    if fast_version != 'v7':
+        pytest.skip('FAST v8 takes the wind type from InflowWind')
+    turbsim_input['WrBLFF'] = 'False'
+    turbsim_input['WrADFF'] = 'False'
+    spawner = FastSimulationSpawner(fast_input, TurbsimSpawner(turbsim_input), path.join(tmpdir, 'prereq'))
+    spawner.wind_file = path.join(tmpdir, 'wind.wnd')
+    full_field = spawner.spawn(path.join(tmpdir, 'a'), {})
+    branch = spawner.branch()
+    branch.wind_file = path.join(tmpdir, 'wind.hh')
+    hub_height = branch.spawn(path.join(tmpdir, 'b'), {})
+    assert not full_field.requires()
+    assert 0 < hub_height.priority < full_field.priority
+
+
+def test_longer_simulation_has_higher_priority(turbsim_input, fast_input, tmpdir):
+    spawner = FastSimulationSpawner(fast_input, TurbsimSpawner(turbsim_input), path.join(tmpdir, 'prereq'))
+    spawner.wind_file = path.join(tmpdir, 'wind.wnd')
+    spawner.simulation_time = 10.0
+    branch = spawner.branch()
+    branch.simulation_time = 20.0
+    assert spawner.spawn(path.join(tmpdir, 'a'), {}).priority < branch.spawn(path.join(tmpdir, 'b'), {}).priority
+
+
+def test_wind_task_memory_estimate_grows_with_grid_and_duration(turbsim_input):
+    spawner = TurbsimSpawner(turbsim_input)
+    memory = spawner.estimated_memory_mb()
+    larger = spawner.branch()
+    larger._input['NumGrid_Z'] = 2 * int(turbsim_input['NumGrid_Z'])
+    longer = spawner.branch()
+    longer.duration = 20 * spawner.duration
+    assert 0 < memory < larger.estimated_memory_mb()
+    assert memory < longer.estimated_memory_mb()
+
+
+def _read_files(directory):
+    contents = {}
+    for name in os.listdir(directory):
+        with open(path.join(directory, name)) as fp:
+            contents[name] = fp.read().replace(directory, '<dir>')
+    return contents
+
+
+def test_deferred_writes_produce_same_files_when_task_is_run(turbsim_input, fast_input, tmpdir):
+    eager_spawner = FastSimulationSpawner(fast_input, TurbsimSpawner(turbsim_input), path.join(tmpdir, 'prereq'))
+    deferred_spawner = FastSimulationSpawner(fast_input, TurbsimSpawner(turbsim_input), path.join(tmpdir, 'prereq'),
+                                             deferred_writes=True)
+    for spawner in [eager_spawner, deferred_spawner]:
+        spawner.wind_file = path.join(tmpdir, 'wind.wnd')
+        spawner.initial_yaw = 12.5
+    eager_spawner.spawn(path.join(tmpdir, 'eager'), {})
+    task = deferred_spawner.spawn(path.join(tmpdir, 'deferred'), {})
+    deferred_spawner.initial_yaw = 0.0
+    assert not path.isdir(path.join(tmpdir, 'deferred'))
+    task.write_input_files()
+    assert _read_files(path.join(tmpdir, 'deferred')) == _read_files(path.join(tmpdir, 'eager'))
+
+
+@pytest.mark.parametrize('deferred_writes', [False, True])
+def test_module_store_shares_identical_module_files(turbsim_input, fast_input, tmpdir, deferred_writes):
+    store = ModuleStore(path.join(tmpdir, 'modules'))
+    spawner = FastSimulationSpawner(fast_input, TurbsimSpawner(turbsim_input), path.join(tmpdir, 'prereq'),
+                                    deferred_writes=deferred_writes, module_store=store)
+    tasks = []
+    for name, simulation_time, wind_file in [('a', 60.0, 'wind1.wnd'), ('b', 120.0, 'wind1.wnd'),
+                                             ('c', 60.0, 'wind2.wnd')]:
+        branch = spawner.branch()
+        branch.simulation_time = simulation_time
+        branch.wind_file = path.join(tmpdir, wind_file)
+        tasks.append(branch.spawn(path.join(tmpdir, name), {}))
+    for task in tasks:
+        task.write_input_files()
+    module_files = [_read_module_files(path.join(tmpdir, name)) for name in 'abc']
+    assert module_files[0] == module_files[1]
+    assert module_files[0] != module_files[2]
+    assert all(path.dirname(path.dirname(f)) == store.root_dir for f in module_files[0])
+    for task in tasks:
+        assert _read_spawned_value(path.dirname(task.run_name_with_path), 'TMax') is not None
+
+
+def _read_module_files(directory):
+    with open(path.join(directory, 'fast.input')) as fp:
+        return sorted(line.split()[0].strip('"') for line in fp if line.split()[1:2] and
+                      line.split()[1] in ['EDFile', 'ServoFile', 'AeroFile', 'InflowFile', 'ADFile'])
+
+
+def test_background_writer_produces_same_files_once_flushed(turbsim_input, fast_input, tmpdir):
+    eager_spawner = FastSimulationSpawner(fast_input, TurbsimSpawner(turbsim_input), path.join(tmpdir, 'prereq'))
+    writer = BackgroundFileWriter(threads=2, max_pending=2)
+    background_spawner = FastSimulationSpawner(fast_input, TurbsimSpawner(turbsim_input), path.join(tmpdir, 'prereq'),
+                                               file_writer=writer)
+    for spawner in [eager_spawner, background_spawner]:
+        spawner.wind_file = path.join(tmpdir, 'wind.wnd')
+        spawner.initial_yaw = 12.5
+    eager_spawner.spawn(path.join(tmpdir, 'eager'), {})
+    for i in range(5):
+        background_spawner.branch().spawn(path.join(tmpdir, 'background', str(i)), {})
+    task = background_spawner.spawn(path.join(tmpdir, 'background', 'last'), {})
+    background_spawner.initial_yaw = 0.0
+    writer.close()
+    assert _read_files(path.join(tmpdir, 'background', 'last')) == _read_files(path.join(tmpdir, 'eager'))
+
+
+def test_background_writer_starts_threads_on_first_write_and_stops_them_on_close(tmpdir):
+    thread_count = threading.active_count()
+    writer = BackgroundFileWriter(threads=2)
+    assert threading.active_count() == thread_count
+    writer.write(path.join(tmpdir, 'a', 'file.txt'), 'contents')
+    assert threading.active_count() == thread_count + 2
+    writer.close()
+    assert threading.active_count() == thread_count
+    assert writer not in _BACKGROUND_WRITERS
+    with open(path.join(tmpdir, 'a', 'file.txt')) as fp:
+        assert fp.read() == 'contents'
+
+
+def test_unpickled_background_writer_starts_no_threads():
+    writer = pickle.loads(pickle.dumps(BackgroundFileWriter(threads=2)))
+    thread_count = threading.active_count()
+    writer.flush()
+    writer.close()
+    assert threading.active_count() == thread_count
+
+
+def test_tasks_close_background_writers_when_scheduled(turbsim_input, fast_input, tmpdir):
+    writer = BackgroundFileWriter(threads=2)
+    spawner = FastSimulationSpawner(fast_input, TurbsimSpawner(turbsim_input), path.join(tmpdir, 'prereq'),
+                                    file_writer=writer)
+    spawner.wind_file = path.join(tmpdir, 'wind.wnd')
+    task = spawner.spawn(path.join(tmpdir, 'a'), {})
+    assert writer in _BACKGROUND_WRITERS
+    task.deps()
+    assert writer not in _BACKGROUND_WRITERS
+    assert path.isfile(path.join(tmpdir, 'a', 'fast.input'))
+
+
+def _flush_in_child(writer, results):
+    try:
+        writer.flush()
+        results.put('flushed')
+    except RuntimeError:
+        results.put('raised')
+
+
+@pytest.mark.skipif('sys.platform == "win32"')
+def test_background_writer_flush_in_forked_process_raises_while_files_are_queued(tmpdir, monkeypatch):
+    release = threading.Event()
+    monkeypatch.setattr(input_files, 'write_file', lambda *args, **kwargs: release.wait())
+    writer = BackgroundFileWriter(threads=1)
+    writer.write(path.join(tmpdir, 'file.txt'), 'contents')
+    context = multiprocessing.get_context('fork')
+    results = context.Queue()
+    child = context.Process(target=_flush_in_child, args=(writer, results))
+    child.start()
+    child.join(10)
+    release.set()
+    writer.close()
+    assert not child.is_alive()
+    assert results.get(timeout=1) == 'raised'
+
+
+def test_background_writer_errors_are_raised_until_cleared(tmpdir):
+    blocking_file = path.join(tmpdir, 'not_a_directory')
+    with open(blocking_file, 'w') as fp:
+        fp.write('')
+    writer = BackgroundFileWriter(threads=1)
+    writer.write(path.join(blocking_file, 'file.txt'), 'contents')
+    for _ in range(2):
+        with pytest.raises(OSError):
+            writer.flush()
+    with pytest.raises(OSError):
+        writer.close()
+    assert len(writer.clear_errors()) == 1
+    writer.flush()
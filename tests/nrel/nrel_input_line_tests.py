@@ -1,5 +1,8 @@
+import os
+import copy
 import pytest
-from spawnwind.nrel.nrel_input_line import NrelInputLine
+from spawnwind.nrel.nrel_input_line import NrelInputLine, NrelInputLines, parse_lines, canonical_value
+from spawnwind.nrel.input_cache import ParsedInputCache
 
 
 @pytest.mark.parametrize('line,value,key', [
@@ -51,3 +54,116 @@ def test_can_change_value_many_times():
     line.value = '256'
     assert '256' == line.value
     assert 'Key' == line.key
+
+
+def test_copies_of_lines_share_unedited_lines_and_are_independent():
+    lines = NrelInputLines([NrelInputLine('4   Key   - a comment'), NrelInputLine('"a/path"   ThePath')])
+    lines_copy = copy.deepcopy(lines)
+    lines_copy.set_value(0, '8')
+    assert lines[0].value == '4'
+    assert lines_copy[0].value == '8'
+    assert lines_copy[1] is lines[1]
+    lines.set_value(0, '16')
+    assert lines_copy[0].value == '8'
+    assert lines.positions('ThePath') == (1,)
+
+
+def test_parse_lines_tokenises_the_same_as_single_lines():
+    lines = [
+        '4  Ref      - a comment\n',
+        '      "a spacey/path" ThePath   - a comment\n',
+        '---------------\n',
+        '\n',
+        '"path/to/file.txt"'
+    ]
+    for parsed, line in zip(parse_lines(lines), lines):
+        single = NrelInputLine(line)
+        assert (parsed.key, parsed.value, bool(parsed), str(parsed)) == \
+            (single.key, single.value, bool(single), str(single))
+
+
+def test_parsed_input_cache_evicts_least_recently_used():
+    cache = ParsedInputCache(max_entries=2)
+    lines = NrelInputLines(parse_lines(['14    Ref   - comment\n']))
+    cache.put(('a',), lines)
+    cache.put(('b',), lines)
+    cache.get(('a',))
+    cache.put(('c',), lines)
+    assert cache.get(('b',)) is None
+    assert cache.get(('a',))[0].value == '14'
+    assert len(cache) == 2
+
+
+def test_digest_is_updated_on_edit_to_match_digest_of_edited_file():
+    lines = NrelInputLines(parse_lines(['14    Ref   - comment\n', '"a.txt"    Path   - comment\n']))
+    original_digest = lines.digest()
+    edited = copy.copy(lines)
+    edited.set_value(0, '15')
+    edited.set_value(1, 'b.txt')
+    assert edited.digest() != original_digest
+    assert edited.digest() == NrelInputLines(parse_lines(str(line) for line in edited)).digest()
+    edited.set_value(0, '14')
+    edited.set_value(1, 'a.txt')
+    assert edited.digest() == original_digest
+    assert lines.digest() == original_digest
+
+
+def test_digest_differs_when_values_are_swapped_between_lines():
+    lines = NrelInputLines(parse_lines(['14    Ref   - comment\n', '15    Ref   - comment\n']))
+    swapped = NrelInputLines(parse_lines(['15    Ref   - comment\n', '14    Ref   - comment\n']))
+    assert lines.digest() != swapped.digest()
+
+
+def test_digest_differs_for_large_integers_equal_as_floats():
+    lines = NrelInputLines(parse_lines(['9007199254740993    RandSeed1   - comment\n']))
+    other = NrelInputLines(parse_lines(['9007199254740992    RandSeed1   - comment\n']))
+    assert lines.digest() != other.digest()
+
+
+@pytest.mark.parametrize('value,canonical', [
+    ('10', '10'), ('10.0', '10'), ('1e1', '10'), ('"10"', '10'), ('2.5', '2.5'), ('True', 'true'),
+    ('9007199254740993', '9007199254740993')
+])
+def test_canonical_value(value, canonical):
+    assert canonical_value(value) == canonical
+
+
+def test_render_is_updated_after_edit_and_not_shared_with_copies():
+    lines = NrelInputLines(parse_lines(['14    Ref   - comment\n', '"a.txt"    Path   - comment\n']))
+    assert lines.render() == '14    Ref   - comment\n"a.txt"    Path   - comment\n'
+    edited = copy.copy(lines)
+    edited.set_value(0, '15')
+    assert edited.render() == '15    Ref   - comment\n"a.txt"    Path   - comment\n'
+    assert lines.render() == '14    Ref   - comment\n"a.txt"    Path   - comment\n'
+
+
+def test_copies_do_not_keep_rendered_contents_of_edited_lines():
+    lines = NrelInputLines(parse_lines(['14    Ref   - comment\n', '"a.txt"    Path   - comment\n']))
+    lines.set_value(0, '15')
+    rendered = lines.render()
+    copied = copy.copy(lines)
+    assert copied._rendered is None
+    assert copied.render() == rendered
+
+
+@pytest.mark.parametrize('atomic', [False, True])
+def test_to_file_writes_rendered_lines(tmpdir, atomic):
+    lines = NrelInputLines(parse_lines(['14    Ref   - comment\n', '"a.txt"    Path   - comment\n']))
+    file_path = lines.to_file(os.path.join(tmpdir, 'input.ipt'), atomic=atomic)
+    with open(file_path) as fp:
+        assert fp.read() == lines.render()
+    assert os.listdir(tmpdir) == ['input.ipt']
+
+
+def test_replacing_lines_moves_following_lines_and_updates_index_and_digest():
+    lines = NrelInputLines(parse_lines(['14    Ref   - comment\n', '"a"\n', '"b"\n', '15    Next   - comment\n']))
+    original = copy.copy(lines)
+    lines.set_value(0, '16')
+    lines.replace_lines(1, 3, parse_lines(['"c"\n']))
+    assert len(lines) == 3
+    assert lines.positions('Next') == (2,)
+    assert lines.render() == '16    Ref   - comment\n"c"\n15    Next   - comment\n'
+    assert lines.digest() == NrelInputLines(parse_lines(str(line) for line in lines)).digest()
+    assert len(original) == 4
+    assert original.positions('Next') == (3,)
+    assert original.render() == '14    Ref   - comment\n"a"\n"b"\n15    Next   - comment\n'
@@ -0,0 +1,141 @@
+# spawn
+# Copyright (C) 2018, Simmovation Ltd.
+# 
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301  USA
+from os import path
+
+import pytest
+
+from spawnwind.nrel.output import FastOutput, CompactOutput, compact_output, open_output, read_outb
+
+np = pytest.importorskip('numpy')
+
+CHANNELS = ['GenPwr', 'RootMyb1', 'TwrBsMyt']
+UNITS = ['(kW)', '(kN-m)', '(kN-m)']
+
+
+@pytest.fixture
+def time_and_values():
+    time = np.arange(0.0, 10.0 + 1e-9, 0.05)
+    values = np.stack([1000.0 + 500.0 * np.sin(time), 2000.0 * np.cos(time), 100.0 * time], axis=1)
+    return time, values
+
+
+@pytest.mark.parametrize('file_id', [1, 2, 3, 4])
+def test_reads_all_channels(tmpdir, write_outb, time_and_values, file_id):
+    time, values = time_and_values
+    file_path = path.join(tmpdir, 'fast.outb')
+    write_outb(file_path, file_id, time, values, CHANNELS, UNITS)
+    output = read_outb(file_path)
+    assert list(output.keys()) == ['Time'] + CHANNELS
+    assert np.allclose(output['Time'], time)
+    tolerance = 0.0 if file_id == 3 else 1e-4 * (values.max() - values.min())
+    for i, name in enumerate(CHANNELS):
+        assert np.allclose(output[name], values[:, i], atol=tolerance, rtol=0.0)
+
+
+@pytest.mark.parametrize('file_id', [1, 2, 3])
+def test_reads_header(tmpdir, write_outb, time_and_values, file_id):
+    file_path = path.join(tmpdir, 'fast.outb')
+    write_outb(file_path, file_id, *time_and_values, CHANNELS, UNITS)
+    output = FastOutput(file_path)
+    assert output.file_id == file_id
+    assert output.channels == CHANNELS
+    assert output.units == dict(zip(CHANNELS, UNITS))
+    assert output.description == 'Test output'
+    assert output.num_samples == len(time_and_values[0])
+
+
+@pytest.mark.parametrize('file_id', [1, 2, 3])
+def test_reads_time_window_of_selected_channels(tmpdir, write_outb, time_and_values, file_id):
+    time, values = time_and_values
+    file_path = path.join(tmpdir, 'fast.outb')
+    write_outb(file_path, file_id, time, values, CHANNELS, UNITS)
+    output = read_outb(file_path, ['Time', 'TwrBsMyt'], start_time=2.0, end_time=3.0)
+    in_window = (time >= 2.0 - 1e-9) & (time <= 3.0 + 1e-9)
+    assert list(output.keys()) == ['Time', 'TwrBsMyt']
+    assert np.allclose(output['Time'], time[in_window])
+    assert np.allclose(output['TwrBsMyt'], values[in_window, 2], atol=0.1, rtol=0.0)
+
+
+def test_uncompressed_channel_is_view_of_file(tmpdir, write_outb, time_and_values):
+    file_path = path.join(tmpdir, 'fast.outb')
+    write_outb(file_path, 3, *time_and_values, CHANNELS, UNITS)
+    channel = FastOutput(file_path).channel('GenPwr')
+    assert isinstance(channel.base, np.memmap) or isinstance(channel, np.memmap)
+    assert not channel.flags.writeable
+
+
+def test_unknown_channel_raises_key_error(tmpdir, write_outb, time_and_values):
+    file_path = path.join(tmpdir, 'fast.outb')
+    write_outb(file_path, 2, *time_and_values, CHANNELS, UNITS)
+    with pytest.raises(KeyError):
+        FastOutput(file_path).channel('NotAChannel')
+
+
+def test_raises_value_error_for_file_that_is_not_fast_output(tmpdir):
+    file_path = path.join(tmpdir, 'fast.outb')
+    with open(file_path, 'wb') as fp:
+        fp.write(b'not a FAST output file')
+    with pytest.raises(ValueError):
+        FastOutput(file_path)
+
+
+@pytest.mark.parametrize('compress', [False, True])
+def test_compacted_output_keeps_selected_channels_decimated(tmpdir, write_outb, time_and_values, compress):
+    time, values = time_and_values
+    raw_path = path.join(tmpdir, 'fast.outb')
+    write_outb(raw_path, 3, time, values, CHANNELS, UNITS)
+    compact_path = compact_output(raw_path, path.join(tmpdir, 'fast.npz'), channels=['TwrBsMyt', 'GenPwr'],
+                                  decimation=4, compress=compress)
+    with open_output(compact_path) as output:
+        assert isinstance(output, CompactOutput)
+        assert output.channels == ['TwrBsMyt', 'GenPwr']
+        assert output.units == {'TwrBsMyt': '(kN-m)', 'GenPwr': '(kW)'}
+        assert output.description == 'Test output'
+        assert output.decimation == 4
+        assert np.array_equal(output.time(), time[::4])
+        channel = output.channel('GenPwr')
+        assert channel.dtype == np.float32
+        assert np.allclose(channel, values[::4, 0], rtol=1e-6)
+        window = output.read(['Time', 'TwrBsMyt'], start_time=2.0, end_time=3.0)
+        assert np.allclose(window['Time'], [t for t in time[::4] if 2.0 <= t <= 3.0])
+    assert path.isfile(raw_path)
+
+
+def test_compacted_channels_are_matched_in_any_case(tmpdir, write_outb, time_and_values):
+    raw_path = path.join(tmpdir, 'fast.outb')
+    write_outb(raw_path, 3, *time_and_values, CHANNELS, UNITS)
+    compact_path = compact_output(raw_path, path.join(tmpdir, 'fast.npz'), channels=['twrbsmyt', 'GENPWR'])
+    with open_output(compact_path) as output:
+        assert output.channels == ['TwrBsMyt', 'GenPwr']
+        assert np.allclose(output.channel('GenPwr'), time_and_values[1][:, 0], rtol=1e-6)
+
+
+def test_compacting_deletes_raw_output_when_asked(tmpdir, write_outb, time_and_values):
+    raw_path = path.join(tmpdir, 'fast.outb')
+    write_outb(raw_path, 2, *time_and_values, CHANNELS, UNITS)
+    compact_path = compact_output(raw_path, path.join(tmpdir, 'fast.npz'), delete_raw=True)
+    assert not path.isfile(raw_path)
+    assert CompactOutput(compact_path).channels == CHANNELS
+
+
+def test_compacting_unknown_channel_keeps_raw_output(tmpdir, write_outb, time_and_values):
+    raw_path = path.join(tmpdir, 'fast.outb')
+    write_outb(raw_path, 2, *time_and_values, CHANNELS, UNITS)
+    with pytest.raises(KeyError):
+        compact_output(raw_path, path.join(tmpdir, 'fast.npz'), channels=['NotAChannel'], delete_raw=True)
+    assert path.isfile(raw_path)
+    assert not path.isfile(path.join(tmpdir, 'fast.npz'))
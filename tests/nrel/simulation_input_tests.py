@@ -15,6 +15,7 @@
 # along with this program; if not, write to the Free Software Foundation,
 # Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301  USA
 from os import path
+import copy
 import pytest
 import tempfile
 
@@ -132,3 +133,111 @@ def test_hash_is_different_for_different_inputs():
     input2 = NRELSimulationInput([NrelInputLine(line) for line in lines], '')
     assert input1.hash() != input2.hash()
 
+
+def test_get_line_returns_nth_occurrence_of_duplicated_key():
+    lines = [
+        '"first.dat"     Filename   - This is just a comment',
+        '14              Ref        - This is just a comment',
+        '"second.dat"    Filename   - This is just a comment'
+    ]
+    input_ = NRELSimulationInput([NrelInputLine(line) for line in lines], '')
+    assert input_._get_line('Filename').value == 'first.dat'
+    assert input_._get_line('Filename', 2).value == 'second.dat'
+    with pytest.raises(KeyError):
+        input_._get_line('Filename', 3)
+
+
+def test_lookups_are_valid_after_editing_values(fast8_input):
+    fast8_input['TMax'] = 1234.5
+    fast8_input['EDFile'] = '"C:/this is a spacey/path.ipt"'
+    assert fast8_input['TMax'] == '1234.5'
+    assert fast8_input['EDFile'] == 'C:/this is a spacey/path.ipt'
+    assert fast8_input['DT'] == fast8_input._get_line('DT').value
+
+
+def test_loading_cached_file_does_not_share_edits(base_fast_input_folder):
+    input_file = path.join(base_fast_input_folder, 'v8', 'NREL5MW.fst')
+    input1 = Fast8Input.from_file(input_file)
+    input1['TMax'] = 1234.5
+    input2 = Fast8Input.from_file(input_file)
+    assert input2['TMax'] != '1234.5'
+    assert input2['EDFile'] == input1['EDFile']
+
+
+def test_loading_modified_file_is_not_cached(tmpdir):
+    filepath = path.join(tmpdir, 'input.ipt')
+    with open(filepath, 'w') as fp:
+        fp.write('14            Ref   - This is just a comment\n')
+    assert NRELSimulationInput.from_file(filepath)['Ref'] == '14'
+    with open(filepath, 'w') as fp:
+        fp.write('150           Ref   - This is just a comment\n')
+    assert NRELSimulationInput.from_file(filepath)['Ref'] == '150'
+
+
+def test_hash_is_equal_for_equal_edits_in_any_order(turbsim_input):
+    input1 = copy.deepcopy(turbsim_input)
+    input1['URef'] = 11.0
+    input1['RandSeed1'] = 123
+    input2 = copy.deepcopy(turbsim_input)
+    input2['RandSeed1'] = 123
+    input2['URef'] = 11.0
+    assert input1.hash() == input2.hash()
+    assert input1.hash() != turbsim_input.hash()
+
+
+@pytest.mark.parametrize('key,value1,value2', [
+    ('URef', 10, '10.0'),
+    ('URef', '1e1', 10.0),
+    ('RandSeed1', 123, '123'),
+    ('WrBLFF', 'True', 'true'),
+    ('WrACT', 'True', 'False'),
+    ('WrFMTFF', 'True', 'False')
+])
+def test_turbsim_hash_is_equal_for_equivalent_inputs(turbsim_input, key, value1, value2):
+    input1 = copy.deepcopy(turbsim_input)
+    input1[key] = value1
+    input2 = copy.deepcopy(turbsim_input)
+    input2[key] = value2
+    assert input1.hash() == input2.hash()
+
+
+@pytest.mark.parametrize('key,value1,value2', [
+    ('URef', 10, 10.5),
+    ('RandSeed1', 123, 124),
+    ('WrBLFF', 'True', 'False'),
+    ('WrADHH', 'True', 'False'),
+    ('WrADTWR', 'True', 'False')
+])
+def test_turbsim_hash_is_different_for_different_inputs(turbsim_input, key, value1, value2):
+    input1 = copy.deepcopy(turbsim_input)
+    input1[key] = value1
+    input2 = copy.deepcopy(turbsim_input)
+    input2[key] = value2
+    assert input1.hash() != input2.hash()
+
+
+@pytest.mark.parametrize('input_fixture,channels', [
+    ('fast7_input', ['WindVxi', 'WindVyi', 'WindVzi', 'GenPwr', 'GenTq']),
+    ('elastodyn_input', ['OoPDefl1', 'IPDefl1', 'TwstDefl1', 'BldPitch1', 'YawPzn']),
+    ('servodyn_input', ['GenPwr', 'GenTq'])
+])
+def test_reads_output_channels(input_fixture, channels, request):
+    input_ = request.getfixturevalue(input_fixture)
+    assert input_.has_output_list()
+    assert input_.output_channels[:len(channels)] == channels
+
+
+def test_output_channels_are_replaced_and_following_lines_kept(fast7_input):
+    edited = copy.deepcopy(fast7_input)
+    edited.output_channels = ['GenPwr', 'RotSpeed']
+    assert edited.output_channels == ['GenPwr', 'RotSpeed']
+    assert edited.render().splitlines()[-2:] == fast7_input.render().splitlines()[-2:]
+    assert edited['NBlGages'] == fast7_input['NBlGages']
+    assert edited.hash() != fast7_input.hash()
+    assert len(fast7_input.output_channels) == 39
+
+
+def test_input_without_output_list_raises_key_error(fast8_input):
+    assert not fast8_input.has_output_list()
+    with pytest.raises(KeyError):
+        fast8_input.output_channels = ['GenPwr']
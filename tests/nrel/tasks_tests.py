@@ -17,7 +17,9 @@
 import pytest
 from os import path
 import tempfile
-from spawnwind.nrel import FastSimulationTask, WindGenerationTask
+import luigi
+from spawnwind.nrel import FastSimulationTask, WindGenerationTask, WindFileRegistry
+from spawnwind.nrel.tasks import MEMORY_RESOURCE
 
 
 def _check_run_fails(task, error_file):
@@ -44,3 +46,63 @@ def test_run_wind_generation_task_with_error():
         fp.write('some bad wind input data')
     task = WindGenerationTask('wind', _input_file_path=input_file)
     _check_run_fails(task, path.join(temp_dir.name, 'turbsim.err'))
+
+
+def test_wind_generation_task_registers_wind_file(tmpdir):
+    input_file = path.join(tmpdir, 'turbsim.ipt')
+    with open(path.join(tmpdir, 'turbsim.wnd'), 'w') as fp:
+        fp.write('wind data')
+    registry = WindFileRegistry(path.join(tmpdir, 'wind_files.db'))
+    task = WindGenerationTask('wind', _input_file_path=input_file, _exe_path='', _runner_type='process',
+                              _wind_hash='abc', _registry_path=registry.database_path)
+    task.run()
+    assert registry.lookup('abc') == task.wind_file_path
+
+
+def test_python_runner_runs_script_with_interpreter(tmpdir):
+    script = path.join(tmpdir, 'fake_fast.py')
+    with open(script, 'w') as fp:
+        fp.write('import sys\nopen(sys.argv[1][:-4] + ".outb", "w").write("output")\n')
+    input_file = path.join(tmpdir, 'fast.fst')
+    with open(input_file, 'w') as fp:
+        fp.write('FAST input data')
+    task = FastSimulationTask('fast', _input_file_path=input_file, _exe_path=script, _runner_type='python')
+    task.run()
+    assert task.complete()
+    assert task.output().exists()
+
+
+def test_compacts_output_after_run(tmpdir, write_outb):
+    np = pytest.importorskip('numpy')
+    time = np.arange(0.0, 10.0, 0.05)
+    source = path.join(tmpdir, 'source.outb')
+    write_outb(source, 3, time, np.stack([time, 2.0 * time], axis=1), ['GenPwr', 'RotSpeed'])
+    script = path.join(tmpdir, 'fake_fast.py')
+    with open(script, 'w') as fp:
+        fp.write('import shutil, sys\nshutil.copy({!r}, sys.argv[1][:-4] + ".outb")\n'.format(source))
+    input_file = path.join(tmpdir, 'fast.fst')
+    with open(input_file, 'w') as fp:
+        fp.write('FAST input data')
+    task = FastSimulationTask('fast', _input_file_path=input_file, _exe_path=script, _runner_type='python',
+                              _compact_output=True, _compact_channels=['RotSpeed'], _output_decimation=2)
+    task.run()
+    assert task.complete()
+    assert task.output().path.endswith('.npz')
+    assert not path.isfile(task.raw_output_path)
+    compact = np.load(task.output().path)
+    assert list(compact['channels']) == ['RotSpeed']
+    assert np.allclose(compact['channel_0'], 2.0 * time[::2])
+
+
+def test_wind_generation_task_declares_memory_only_when_limit_is_configured(tmpdir):
+    task = WindGenerationTask('wind', _input_file_path=path.join(tmpdir, 'turbsim.ipt'), _exe_path='',
+                              _runner_type='process', _memory_mb=300)
+    assert task.resources == {}
+    config = luigi.configuration.get_config()
+    config.set('resources', MEMORY_RESOURCE, '200')
+    try:
+        assert task.resources == {MEMORY_RESOURCE: 200}
+        config.set('resources', MEMORY_RESOURCE, '1000')
+        assert task.resources == {MEMORY_RESOURCE: 300}
+    finally:
+        config.remove_option('resources', MEMORY_RESOURCE)
@@ -5,6 +5,7 @@ import luigi
 
 from spawnwind.nrel.nrel_input_line import NrelInputLine
 from spawnwind.nrel.wind_input import InflowWindInput
+from spawnwind.nrel import TurbsimSpawner, WindFileRegistry
 
 
 @pytest.fixture(scope='function')
@@ -66,3 +67,15 @@ def test_wind_spawner_produces_output(inflow_wind_input, wind_type, tmpdir):
     luigi.build(tasks, local_scheduler=True, log_level='WARNING')
     for t in tasks:
         assert path.isfile(t.wind_file_path)
+
+
+def test_uses_registered_wind_file_without_spawning_task(inflow_wind_input, tmpdir):
+    inflow_wind_input.wind_type = 'bladed'
+    wind_file = path.join(tmpdir, 'existing.wnd')
+    with open(wind_file, 'w') as fp:
+        fp.write('wind data')
+    registry = WindFileRegistry(path.join(tmpdir, 'wind_files.db'))
+    registry.register(inflow_wind_input.wind_gen_spawner.input_hash(), wind_file)
+    inflow_wind_input.wind_gen_spawner = TurbsimSpawner(inflow_wind_input.wind_gen_spawner._input, registry)
+    assert inflow_wind_input.get_wind_gen_tasks(path.join(tmpdir, 'prereq'), {}) == []
+    assert inflow_wind_input.wind_file == path.splitext(wind_file)[0]
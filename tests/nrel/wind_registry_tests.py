@@ -0,0 +1,70 @@
+# spawn
+# Copyright (C) 2018, Simmovation Ltd.
+# 
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301  USA
+import os
+from os import path
+
+import pytest
+
+from spawnwind.nrel import WindFileRegistry
+
+
+@pytest.fixture
+def wind_file(tmpdir):
+    file_path = path.join(tmpdir, 'wind.wnd')
+    with open(file_path, 'wb') as fp:
+        fp.write(b'\x01\x02\x03\x04')
+    return file_path
+
+
+@pytest.fixture
+def registry(tmpdir):
+    return WindFileRegistry(path.join(tmpdir, 'registry', 'wind_files.db'))
+
+
+def test_lookup_of_unregistered_hash_returns_none(registry):
+    assert registry.lookup('abc') is None
+    assert not path.isfile(registry.database_path)
+
+
+def test_lookup_returns_registered_file(registry, wind_file):
+    registry.register('abc', wind_file)
+    assert registry.lookup('abc') == wind_file
+    assert WindFileRegistry(registry.database_path).lookup('abc') == wind_file
+    assert registry.lookup('def') is None
+
+
+def test_deleted_file_is_not_returned(registry, wind_file):
+    registry.register('abc', wind_file)
+    os.remove(wind_file)
+    assert registry.lookup('abc') is None
+
+
+@pytest.mark.parametrize('contents', [b'\x01\x02\x03', b'\x04\x03\x02\x01'])
+def test_altered_file_is_not_returned(registry, wind_file, contents):
+    registry.register('abc', wind_file)
+    stat = os.stat(wind_file)
+    with open(wind_file, 'wb') as fp:
+        fp.write(contents)
+    os.utime(wind_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000))
+    assert registry.lookup('abc') is None
+
+
+def test_touched_file_with_same_contents_is_returned(registry, wind_file):
+    registry.register('abc', wind_file)
+    stat = os.stat(wind_file)
+    os.utime(wind_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000))
+    assert registry.lookup('abc') == wind_file
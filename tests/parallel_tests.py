@@ -0,0 +1,81 @@
+# spawn
+# Copyright (C) 2018, Simmovation Ltd.
+# 
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301  USA
+from os import path
+import multiprocessing
+
+import pytest
+
+from spawn.config import DefaultConfiguration
+from spawn.parsers import SpecificationParser
+from spawn.plugins import PluginLoader
+from spawn.tasks.generate import generate_tasks_from_spec
+
+from spawnwind.nrel import TurbsimSpawner, FastSimulationSpawner, TurbsimInput
+from spawnwind import parallel
+from spawnwind.parallel import generate_tasks_in_parallel
+
+
+@pytest.fixture
+def spec_model():
+    spec_dict = {
+        'spec': {
+            'wind_speed': [6.0, 8.0, 10.0],
+            'turbulence_seed': [1, 2],
+            'initial_yaw': [-8.0, 8.0]
+        }
+    }
+    return SpecificationParser(PluginLoader(DefaultConfiguration())).parse(spec_dict)
+
+
+@pytest.mark.parametrize('deferred_writes', [False, True])
+def test_parallel_spawn_generates_same_tasks_as_serial_spawn(turbsim_input_file, fast_input, spec_model, tmpdir,
+                                                             deferred_writes):
+    spawner = FastSimulationSpawner(fast_input, TurbsimSpawner(TurbsimInput.from_file(turbsim_input_file)),
+                                    path.join(tmpdir, 'prereq'), deferred_writes=deferred_writes)
+    spawner.wind_type = 'bladed'
+    serial_tasks = generate_tasks_from_spec(spawner, spec_model.root_node, path.join(tmpdir, 'runs'))
+    parallel_tasks = generate_tasks_in_parallel(spawner, spec_model.root_node, path.join(tmpdir, 'runs'),
+                                                processes=2, chunk_size=5)
+    assert [t.to_str_params() for t in parallel_tasks] == [t.to_str_params() for t in serial_tasks]
+    for parallel_task, serial_task in zip(parallel_tasks, serial_tasks):
+        assert [d.to_str_params() for d in parallel_task.requires()] == \
+            [d.to_str_params() for d in serial_task.requires()]
+    wind_tasks = {id(d) for t in parallel_tasks for d in t.requires()}
+    assert len(wind_tasks) == 6
+
+
+def test_parallel_spawn_in_started_processes_generates_same_tasks_as_serial_spawn(turbsim_input_file, fast_input,
+                                                                                  spec_model, tmpdir, monkeypatch):
+    # Processes are started rather than forked on Windows and macOS, so they do not inherit the luigi configuration
+    monkeypatch.setattr(parallel, 'Pool', multiprocessing.get_context('spawn').Pool)
+    spawner = FastSimulationSpawner(fast_input, TurbsimSpawner(TurbsimInput.from_file(turbsim_input_file)),
+                                    path.join(tmpdir, 'prereq'))
+    spawner.wind_type = 'bladed'
+    serial_tasks = generate_tasks_from_spec(spawner, spec_model.root_node, path.join(tmpdir, 'runs'))
+    parallel_tasks = generate_tasks_in_parallel(spawner, spec_model.root_node, path.join(tmpdir, 'runs'),
+                                                processes=2)
+    assert [t.to_str_params() for t in parallel_tasks] == [t.to_str_params() for t in serial_tasks]
+
+
+def test_deferred_files_spawned_in_parallel_are_written(turbsim_input_file, fast_input, spec_model, tmpdir):
+    spawner = FastSimulationSpawner(fast_input, TurbsimSpawner(TurbsimInput.from_file(turbsim_input_file)),
+                                    path.join(tmpdir, 'prereq'), deferred_writes=True)
+    spawner.wind_type = 'bladed'
+    tasks = generate_tasks_in_parallel(spawner, spec_model.root_node, path.join(tmpdir, 'runs'), processes=2)
+    assert not path.isdir(path.join(tmpdir, 'runs'))
+    tasks[0].write_input_files()
+    assert path.isfile(tasks[0]._input_file_path)
@@ -0,0 +1,120 @@
+# spawn
+# Copyright (C) 2018, Simmovation Ltd.
+# 
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301  USA
+import json
+from os import path
+
+import pytest
+
+from spawn.config import DefaultConfiguration
+from spawn.parsers import SpecificationParser
+from spawn.plugins import PluginLoader
+
+from spawnwind.profiling import Profiler, profiler
+from spawnwind.nrel import TurbsimSpawner, FastSimulationSpawner, TurbsimInput
+from spawnwind.nrel.input_files import write_file
+from spawnwind.parallel import generate_tasks_in_parallel
+
+
+@pytest.fixture
+def enabled_profiler():
+    profiler.reset()
+    profiler.enable()
+    yield profiler
+    profiler.disable()
+    profiler.reset()
+
+
+def test_disabled_profiler_does_not_count_or_time():
+    profiler_ = Profiler()
+    profiler_.count('things')
+    with profiler_.time('phase'):
+        pass
+    assert profiler_.summary()['counters'] == {}
+    assert profiler_.summary()['timers'] == {}
+
+
+def test_summary_contains_counts_and_times(tmpdir):
+    profiler_ = Profiler()
+    profiler_.enable()
+    profiler_.count('things', 3)
+    profiler_.count('things')
+    for _ in range(2):
+        with profiler_.time('phase'):
+            pass
+    summary_file = path.join(tmpdir, 'profile.json')
+    profiler_.write_summary(summary_file)
+    with open(summary_file) as fp:
+        summary = json.load(fp)
+    assert summary['counters'] == {'things': 4}
+    assert summary['timers']['phase']['count'] == 2
+    assert summary['timers']['phase']['total_seconds'] >= 0.0
+
+
+def test_merge_adds_counts_and_times_of_summary():
+    profiler_ = Profiler()
+    profiler_.enable()
+    profiler_.count('things', 2)
+    with profiler_.time('phase'):
+        pass
+    other = Profiler()
+    other.enable()
+    other.count('things', 3)
+    other.count('others')
+    with other.time('phase'):
+        pass
+    profiler_.merge(other.summary())
+    summary = profiler_.summary()
+    assert summary['counters'] == {'things': 5, 'others': 1}
+    assert summary['timers']['phase']['count'] == 2
+
+
+def test_bytes_written_are_counted_encoded(enabled_profiler, tmpdir):
+    write_file(path.join(tmpdir, 'file.txt'), 'Wöhler')
+    assert enabled_profiler.summary()['counters']['bytes_written'] == 7
+
+
+def test_spawning_in_parallel_is_profiled(enabled_profiler, turbsim_input_file, fast_input, tmpdir):
+    spec = SpecificationParser(PluginLoader(DefaultConfiguration())).parse(
+        {'spec': {'wind_speed': [6.0, 8.0], 'initial_yaw': [-8.0, 0.0, 8.0]}})
+    spawner = FastSimulationSpawner(fast_input, TurbsimSpawner(TurbsimInput.from_file(turbsim_input_file)),
+                                    path.join(tmpdir, 'prereq'))
+    spawner.wind_type = 'bladed'
+    generate_tasks_in_parallel(spawner, spec.root_node, path.join(tmpdir, 'runs'), processes=2, chunk_size=2)
+    summary = enabled_profiler.summary()
+    assert summary['counters']['leaves'] == 6
+    assert summary['timers']['spawn']['count'] == 6
+    assert summary['counters']['files_written'] > 6
+
+
+def test_spawning_is_profiled(enabled_profiler, turbsim_input_file, fast_input, tmpdir):
+    spawner = FastSimulationSpawner(fast_input, TurbsimSpawner(TurbsimInput.from_file(turbsim_input_file)),
+                                    path.join(tmpdir, 'prereq'))
+    spawner.wind_type = 'bladed'
+    for i, yaw in enumerate([-8.0, 0.0, 8.0]):
+        branch = spawner.branch()
+        branch.initial_yaw = yaw
+        branch.spawn(path.join(tmpdir, str(i)), {})
+    summary = enabled_profiler.summary()
+    assert summary['counters']['branches'] == 3
+    assert summary['counters']['leaves'] == 3
+    assert summary['counters']['wind_dedup_misses'] == 1
+    assert summary['counters']['wind_dedup_hits'] == 2
+    assert summary['counters']['files_written'] > 3
+    assert summary['counters']['bytes_written'] > 0
+    assert summary['counters'].get('lines_parsed', 0) + summary['counters'].get('input_file_cache_hits', 0) > 0
+    assert summary['timers']['set_initial_yaw']['count'] == 3
+    assert summary['timers']['spawn']['count'] == 3